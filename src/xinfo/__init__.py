@@ -3,3 +3,13 @@
 from xinfo._version import __version__ as version
 
 __version__ = version
+
+
+def __getattr__(name):
+    # The catalog is imported on first use, so that the command line starts
+    # without loading the modules reading binaries
+    if name == "Catalog":
+        from xinfo.catalog import Catalog
+
+        return Catalog
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
@@ -0,0 +1,98 @@
+"""binutils commands run by coroutines, without a shell.
+
+Commands of several coroutines run at the same time, up to a limit, and
+their output is parsed like the output of the commands of binutils.py.
+"""
+
+import asyncio
+import logging
+from asyncio.subprocess import PIPE, STDOUT
+
+import xinfo.binutils as binutils
+import xinfo.config.settings as settings
+import xinfo.profiler as profiler
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Reader:
+    """Read the Oracle binary with at most limit commands at a time.
+
+    nm lists the symbols of the whole binary, so it runs once for all
+    symbol lookups of a reader.
+    """
+
+    def __init__(self, limit):
+        self._limit = asyncio.Semaphore(limit)
+        self._nm = None
+
+    async def _run(self, *args):
+        cmd = " ".join(args)
+        LOGGER.debug(cmd)
+        async with self._limit:
+            proc = await asyncio.create_subprocess_exec(
+                *args, stdout=PIPE, stderr=STDOUT
+            )
+            output, _ = await proc.communicate()
+        profiler.add_bytes_read(len(output))
+        output = output.decode().rstrip("\n")
+        binutils._check_output(proc.returncode, output, cmd)
+        return output
+
+    async def objdump(self, start_addr, len_):
+        """Return a byte-array from the Oracle binary."""
+        output = await self._run(
+            "objdump",
+            "-s",
+            "--start-address=%d" % start_addr,
+            "--stop-address=%d" % (start_addr + len_),
+            settings.ora_binary,
+        )
+        return binutils._parse_objdump(output, start_addr, len_)
+
+    async def objdump_symbol(self, symbol):
+        """Return the bytes of a symbol."""
+        return await self.objdump(*binutils.get_addr_len(symbol))
+
+    async def get_strs_from_addrs(self, addr_list):
+        """Get NULL terminated strings for a list of (address, max_string_len)
+        pairs. Nearby strings are read with one objdump call."""
+        ranges = list(binutils._coalesce(addr_list))
+        dumps = await asyncio.gather(
+            *(self.objdump(start, end - start) for start, end, _ in ranges)
+        )
+        return binutils._get_strs_from_dumps(ranges, dumps)
+
+    async def get_symbols(self, addr_list):
+        """Get symbols for the given addresses, like binutils.get_symbols."""
+        if self._nm is None:
+            self._nm = asyncio.ensure_future(
+                self._run("nm", *binutils.NM_ARGS, settings.ora_binary)
+            )
+        symbols = binutils._parse_nm(await self._nm, addr_list)
+        binutils._check_symbols(addr_list, symbols)
+        return symbols
+
+
+async def _gather(funcs, limit):
+    reader = Reader(limit)
+    return await asyncio.gather(*(func(reader) for func in funcs))
+
+
+def is_loop_running():
+    """Return True if the current thread runs an event loop, in which run
+    cannot be called."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def run(funcs, limit):
+    """Run coroutine functions taking a Reader at the same time, with at most
+    limit commands at a time. Return their results in order.
+
+    The current thread must not run an event loop.
+    """
+    return asyncio.run(_gather(funcs, limit))
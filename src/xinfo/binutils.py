@@ -2,17 +2,42 @@
 
 import logging
 import subprocess
-import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
 
 import xinfo.config.settings as settings
+import xinfo.elf as elf
+import xinfo.profiler as profiler
 
 LOGGER = logging.getLogger(__name__)
 
+# Strings closer than STR_READ_GAP bytes are read together, up to
+# STR_READ_MAX bytes per objdump call
+STR_READ_GAP = 4096
+STR_READ_MAX = 1024 * 1024
+
+
+def _map_jobs(func, iterable):
+    """Return a list of func results, computed by settings.jobs threads.
+
+    Results are in the same order as the iterable.
+    """
+    if settings.jobs > 1:
+        with ThreadPoolExecutor(max_workers=settings.jobs) as executor:
+            return list(executor.map(settings.bind(func), iterable))
+    return list(map(func, iterable))
+
 
 def _get_cmd_output(cmd):
     LOGGER.debug(cmd)
-    exitcode, output = subprocess.getstatusoutput(cmd)
+    with profiler.phase("binutils", cmd=cmd):
+        exitcode, output = subprocess.getstatusoutput(cmd)
+        profiler.add_bytes_read(len(output))
+    _check_output(exitcode, output, cmd)
+    return output
+
+
+def _check_output(exitcode, output, cmd):
     LOGGER.debug("exitcode=%r output=%r", exitcode, output)
 
     if exitcode != 0:
@@ -21,31 +46,32 @@ def _get_cmd_output(cmd):
             % (exitcode, output, cmd)
         )
 
-    return output
-
 
 def get_addr_len(symbol):
     """Return address and length of the given symbol."""
-    cmd = "nm -S %(ora_binary)s | grep -w %(symbol)s | awk '{print $1, $2}'"
-
-    cmd = cmd % dict(ora_binary=settings.ora_binary, symbol=symbol)
-
-    output = _get_cmd_output(cmd)
+    symbols = elf.get_elf(settings.ora_binary).symbols
 
-    if not output:
+    if symbol not in symbols:
         raise ValueError("%s symbol not found" % (symbol))
 
-    addr, len_ = output.split()
-
-    return (int(addr, 16), int(len_, 16))
+    return symbols[symbol]
 
 
 def objdump(start_addr, len_):
     """Return a byte-array from the Oracle binary for the given parameters."""
+    if settings.backend == "binutils":
+        return _objdump(start_addr, len_)
+    return elf.get_elf(settings.ora_binary).read(start_addr, len_)
+
+
+def _objdump(start_addr, len_):
+    """Read bytes from the Oracle binary using objdump.
+
+    Gaps between sections within the range are filled with zeros.
+    """
     cmd = (
-        "objdump -s --start-address=%(start_addr)d --stop-address=%(stop_addr)d %(ora_binary)s"
-        " | awk '/Contents/{m=1;next;} m {print substr($0, length($1)+3, 36)}'"
-        " | tr -d ' '"
+        "objdump -s --start-address=%(start_addr)d --stop-address=%(stop_addr)d"
+        " %(ora_binary)s"
     )
     cmd = cmd % dict(
         ora_binary=settings.ora_binary,
@@ -53,20 +79,43 @@ def objdump(start_addr, len_):
         stop_addr=start_addr + len_,
     )
 
-    output = _get_cmd_output(cmd)
+    return _parse_objdump(_get_cmd_output(cmd), start_addr, len_)
 
-    dump = bytearray()
 
-    for line in output.split("\n"):
-        dump.extend(bytes.fromhex(line))
+def _parse_objdump(output, start_addr, len_):
+    """Return the bytes of objdump -s output from start_addr."""
+    dump = bytearray(len_)
+    dump_len = 0
 
+    # Data lines look like: " 3b00 0a000000 00000000 1c200000 00000000  ........"
+    for line in output.split("\n"):
+        if not line.startswith(" "):
+            continue
+        addr, _, hex_dump = line[1:].partition(" ")
+        data = bytes.fromhex(hex_dump[:35])
+        offset = int(addr, 16) - start_addr
+        dump[offset : offset + len(data)] = data
+        dump_len = max(dump_len, offset + len(data))
+
+    del dump[dump_len:]
     return dump
 
 
-@lru_cache
 def get_str_from_addr(addr, max_string_len):
     """Get a NULL terminated string from the address."""
-    dump = objdump(addr, max_string_len)
+    if settings.backend == "binutils":
+        return _get_str_from_objdump(settings.ora_binary, addr, max_string_len)
+    return elf.get_elf(settings.ora_binary).read_str(addr, max_string_len)
+
+
+@lru_cache
+def _get_str_from_objdump(ora_binary, addr, max_string_len):
+    """Get a NULL terminated string using objdump."""
+    return _get_str_from_dump(_objdump(addr, max_string_len))
+
+
+def _get_str_from_dump(dump):
+    """Get a NULL terminated string from the beginning of the dump."""
     if b"\x00" not in dump:
         raise ValueError(
             (
@@ -80,29 +129,108 @@ def get_str_from_addr(addr, max_string_len):
     return nam
 
 
+def _coalesce(addr_list):
+    """Merge (address, length) pairs into ranges read with a single objdump.
+
+    Yield (start, end, pairs) for each range.
+    """
+    start = end = None
+    pairs = []
+    for addr, len_ in sorted(set(addr_list)):
+        if pairs and (
+            addr > end + STR_READ_GAP or max(end, addr + len_) - start > STR_READ_MAX
+        ):
+            yield start, end, pairs
+            pairs = []
+        if not pairs:
+            start = end = addr
+        end = max(end, addr + len_)
+        pairs.append((addr, len_))
+    if pairs:
+        yield start, end, pairs
+
+
+def get_strs_from_addrs(addr_list):
+    """Get NULL terminated strings for a list of (address, max_string_len) pairs.
+
+    Return an address to string dictionary. The binutils backend reads nearby
+    strings with one objdump call instead of one call per string.
+    """
+    if settings.backend != "binutils":
+        elf_file = elf.get_elf(settings.ora_binary)
+        return {addr: elf_file.read_str(addr, len_) for addr, len_ in addr_list}
+
+    ranges = list(_coalesce(addr_list))
+    dumps = _map_jobs(lambda r: _objdump(r[0], r[1] - r[0]), ranges)
+
+    return _get_strs_from_dumps(ranges, dumps)
+
+
+def _get_strs_from_dumps(ranges, dumps):
+    """Return an address to string dictionary of the dumps of coalesced ranges."""
+    strs = dict()
+    for (start, end, pairs), dump in zip(ranges, dumps):
+        LOGGER.debug("Read %d strings from 0x%x-0x%x", len(pairs), start, end)
+        for addr, len_ in pairs:
+            offset = addr - start
+            strs[addr] = _get_str_from_dump(dump[offset : offset + len_])
+    return strs
+
+
 def objdump_symbol(symbol):
     """Call objdump for a given symbol."""
     return objdump(*get_addr_len(symbol))
 
 
 def get_symbols(addr_list):
-    """Get symbols for a list of addresses."""
-    with tempfile.NamedTemporaryFile(mode="w") as fp:
-        LOGGER.debug(fp.name)
-        for addr in addr_list:
-            print(format(addr, "x"), file=fp)
-        fp.flush()
-
-        cmd = "nm %(ora_binary)s | grep -f %(file_name)s" % dict(
-            ora_binary=settings.ora_binary, file_name=fp.name
+    """Get symbols for a list of addresses.
+
+    An address inside a function is resolved as symbol+offset. Aliases
+    resolve to the first global symbol in the symbol table with both
+    backends.
+    """
+    if settings.backend == "binutils":
+        symbols = _get_symbols_from_nm(addr_list)
+    else:
+        addr_index = elf.get_elf(settings.ora_binary).addr_index
+        symbols = elf.get_symbols(addr_index, addr_list)
+
+    _check_symbols(addr_list, symbols)
+    return symbols
+
+
+def _check_symbols(addr_list, symbols):
+    missing = [addr for addr in addr_list if addr not in symbols]
+    if missing:
+        raise ValueError(
+            "Symbols not found for addresses: %s" % ", ".join(map(hex, missing))
         )
-        output = _get_cmd_output(cmd)
 
-        symbols = dict()
-        for line in output.split("\n"):
-            LOGGER.debug(line)
-            addr, _, symbol = line.split()
-            func_ptr = int.from_bytes(bytes.fromhex(addr), byteorder="big")
-            symbols[func_ptr] = symbol
 
-    return symbols
+# Symbols with sizes, in symbol table order
+NM_ARGS = ("--defined-only", "--print-size", "--no-sort")
+
+
+def _get_symbols_from_nm(addr_list):
+    """Get symbols for the given addresses using nm."""
+    cmd = "nm %s %s" % (" ".join(NM_ARGS), settings.ora_binary)
+    return _parse_nm(_get_cmd_output(cmd), addr_list)
+
+
+def _parse_nm(output, addr_list):
+    """Return address to symbol of the nm output for the given addresses,
+    resolved like the symbol table of the ELF backend."""
+    entries = []
+    for line in output.split("\n"):
+        fields = line.split()
+        if len(fields) == 3:
+            # Symbols without a size
+            fields.insert(1, "0")
+        if len(fields) != 4:
+            continue
+        addr, size, type_, name = fields
+        # Lower case types are local symbols, except unique global ones
+        is_global = type_.isupper() or type_ == "u"
+        entries.append((int(addr, 16), int(size, 16), name, is_global))
+
+    return elf.get_symbols(elf.build_addr_index(entries), addr_list)
@@ -1,48 +1,383 @@
 """Caching utilities."""
 
+import hashlib
+import logging
 import os
-import pickle
+import stat
 import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+
+import xinfo.cachefile as cachefile
+import xinfo.config.settings as settings
+import xinfo.elf as elf
+import xinfo.profiler as profiler
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    # Windows: cache entries are not locked
+    fcntl = None
+
+LOGGER = logging.getLogger(__name__)
 
 CACHE_DIR = tempfile.gettempdir()
 
+# Path to ((inode, mtime_ns), object) of loaded cache files, least recently
+# used first
+_objects = OrderedDict()
+_objects_lock = threading.Lock()
+# Loaded cache files kept, and mapped files kept open, by this process
+MAX_OBJECTS = 4096
+MAX_MAPPED = 32
+
+# (path, fingerprint) pairs of the Oracle binary recorded by this process
+_binaries = set()
+
+# Directories checked by make_private_dir
+_private_dirs = set()
+
+SAMPLE_BLOCKS = 16
+SAMPLE_BLOCK_SIZE = 64 * 1024
+
+
+def get_build_id(path):
+    """Return the ELF build ID of a file, or None."""
+    try:
+        return elf.get_elf(path).build_id
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=8)
+def _get_fingerprint(path, dev, ino, size, mtime_ns):
+    build_id = get_build_id(path)
+    if build_id:
+        return build_id
+
+    # No build ID: identify the file by its stat data and a hash of sampled
+    # blocks, so that large files are never read in full.
+    h = hashlib.sha1(repr((dev, ino, size, mtime_ns)).encode())
+    with open(path, "rb") as fp:
+        step = max(size // SAMPLE_BLOCKS, SAMPLE_BLOCK_SIZE)
+        for offset in range(0, size, step):
+            fp.seek(offset)
+            h.update(fp.read(SAMPLE_BLOCK_SIZE))
+    return h.hexdigest()
+
+
+def get_fingerprint(path):
+    """Return a cheap identity of the binary used to namespace cache entries."""
+    st = os.stat(path)
+    return _get_fingerprint(path, st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def make_private_dir(path):
+    """Create a directory of the current user with mode 0700 if missing.
+    Return its path.
+
+    CACHE_DIR can be written by all users, so the directory of a user must
+    not have been created by another one. Raise RuntimeError if it belongs
+    to another user or is not a directory.
+    """
+    if path in _private_dirs:
+        return path
+    os.makedirs(path, 0o700, exist_ok=True)
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid():
+        raise RuntimeError(
+            "%s is not a directory of the current user, remove it" % path
+        )
+    if stat.S_IMODE(st.st_mode) != 0o700:
+        os.chmod(path, 0o700)
+    _private_dirs.add(path)
+    return path
 
-def _get_path(fname):
-    """Full path in the cache directory."""
-    return os.path.join(CACHE_DIR, fname)
+
+def get_root():
+    """Cache directory of the current user, created on first use. Other users
+    cannot read or write the files of a user, so each one has their own
+    directory."""
+    if hasattr(os, "getuid"):
+        return make_private_dir(os.path.join(CACHE_DIR, "xinfo-%d" % os.getuid()))
+    return os.path.join(CACHE_DIR, "xinfo")  # pragma: no cover
+
+
+def get_path(fname):
+    """Full path in the cache directory of the current Oracle binary."""
+    return os.path.join(get_root(), get_fingerprint(settings.ora_binary), fname)
+
+
+def _get_version(path):
+    """Return (inode, mtime_ns) identifying a published file, or None."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns
+
+
+@contextmanager
+def locked(path):
+    """Hold an exclusive advisory lock on a cache entry within the context.
+
+    Processes populating the same entry wait for each other, so an entry
+    is extracted from the Oracle binary once.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd = os.open(path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        if fcntl is not None:
+            with profiler.phase("cache.lock"):
+                fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        # Closing the file releases the lock
+        os.close(fd)
+
+
+def _keep_object(path, version, obj):
+    """Keep a loaded cache file, and release the least recently used files
+    beyond MAX_OBJECTS files or MAX_MAPPED mapped files.
+
+    The mapping of a released file is closed once no caller uses it.
+    """
+    with _objects_lock:
+        _objects[path] = (version, obj)
+        _objects.move_to_end(path)
+        mapped = [p for p, (_, o) in _objects.items() if o.mapped]
+        released = mapped[: max(len(mapped) - MAX_MAPPED, 0)]
+        released += list(_objects)[: max(len(_objects) - MAX_OBJECTS, 0)]
+        for p in released:
+            _objects.pop(p, None)
 
 
 def _load_object_from_file(fname):
-    """Read and return an object from the pickle data stored in a file."""
-    with open(_get_path(fname), "rb") as fp:
-        obj = pickle.load(fp)
-        return obj
+    """Return the dictionary stored in a cache file.
+
+    Rows are read from the file as they are accessed. Recently used files are
+    kept until they change, so a long-running process opens each file once.
+    """
+    path = get_path(fname)
+    version = _get_version(path)
+    if version is None:
+        raise FileNotFoundError(path)
+    with _objects_lock:
+        if path in _objects and _objects[path][0] == version:
+            _objects.move_to_end(path)
+            return _objects[path][1]
+    with profiler.phase("cache.load", fname=fname):
+        obj = cachefile.CacheFile(path, get_fingerprint(settings.ora_binary))
+        profiler.add_bytes_read(cachefile.HEADER.size)
+    _keep_object(path, version, obj)
+    return obj
+
 
+def _load_cached(fname):
+    """Return the dictionary of a valid cache file, or None."""
+    try:
+        return _load_object_from_file(fname)
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        # Files of an older format are rebuilt
+        LOGGER.debug("Cannot use the cache file: %s", e)
+        return None
 
-def _save_object_to_file(obj, fname):
-    """Write a pickled representation of obj to the open file object file."""
-    with open(_get_path(fname), "wb") as fp:
-        pickle.dump(obj, fp)
 
+def _publish(path, write):
+    """Write a file with a function of a binary file object, and rename it to
+    path once complete.
 
-def _load_and_save(fname, func, *args):
-    """Call a func to save an object to a file cache. Return the object."""
+    Readers see either the previous file or the new one. Mapped files of the
+    previous version stay readable.
+    """
+    dirname = os.path.dirname(path)
+    os.makedirs(dirname, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=dirname, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fp:
+            write(fp)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def _get_binary_path():
+    """Path of the file recording the fingerprints of the Oracle binary path."""
+    name = hashlib.sha1(os.path.realpath(settings.ora_binary).encode()).hexdigest()
+    return os.path.join(get_root(), "binaries", name)
+
+
+def _read_fingerprints(path):
+    try:
+        with open(path) as fp:
+            return fp.read().split()
+    except FileNotFoundError:
+        return []
+
+
+def _record_binary(fingerprint):
+    """Record the fingerprint of the Oracle binary at its path, after the
+    fingerprint of the binary previously found at that path."""
+    path = _get_binary_path()
+    if (path, fingerprint) in _binaries:
+        return
+    fingerprints = _read_fingerprints(path)
+    if fingerprints[:1] != [fingerprint]:
+        data = "\n".join([fingerprint] + fingerprints[:1]) + "\n"
+        _publish(path, lambda fp: fp.write(data.encode()))
+    _binaries.add((path, fingerprint))
+
+
+def _get_previous_fingerprint(fingerprint):
+    """Fingerprint of the binary previously found at the path of the Oracle
+    binary, or None."""
+    fingerprints = _read_fingerprints(_get_binary_path())
+    if fingerprints[:1] == [fingerprint]:
+        fingerprints = fingerprints[1:]
+    return fingerprints[0] if fingerprints else None
+
+
+def _save_object_to_file(obj, fname, indexes=(), source=""):
+    """Write a dictionary to a temporary file and publish it as a cache file."""
+    fingerprint = get_fingerprint(settings.ora_binary)
+    path = get_path(fname)
+    _publish(path, lambda fp: cachefile.write(fp, obj, fingerprint, indexes, source))
+    with _objects_lock:
+        # The previous file stays readable by its users
+        _objects.pop(path, None)
+    _record_binary(fingerprint)
+
+
+def _get_source(fname, source, depends, variant, *args):
+    """Return the bytes of a structure in the Oracle binary and their hash.
+
+    The hash includes the variant and the hashes of the cache files in
+    depends.
+    """
+    with profiler.phase("cache.source", fname=fname):
+        data = source(*args)
+    h = hashlib.sha1(data)
+    if variant:
+        h.update(b"\0" + variant.encode())
+    for dep in depends:
+        obj = _load_cached(dep)
+        h.update(b"\0" + (obj.source if obj is not None else "").encode())
+    return data, h.hexdigest()
+
+
+def _load_and_save(fname, indexes, source, depends, variant, func, *args):
+    """Call a func to save an object to a file cache. Return the cached object.
+
+    If a source function is given, func is called with the bytes it returns.
+    """
+    digest = ""
+    if source is not None:
+        data, digest = _get_source(fname, source, depends, variant, *args)
+        args = (data,) + args
     obj = func(*args)
-    _save_object_to_file(obj, fname)
-    return obj
+    _save_object_to_file(obj, fname, indexes, digest)
+    return _load_object_from_file(fname)
+
 
+def _load_previous(fname):
+    """Return the cache file of the binary previously found at the path of
+    the Oracle binary, or None."""
+    previous = _get_previous_fingerprint(get_fingerprint(settings.ora_binary))
+    if previous is None:
+        return None
+    path = os.path.join(get_root(), previous, fname)
+    try:
+        return cachefile.CacheFile(path)
+    except (FileNotFoundError, ValueError):
+        return None
 
-def _file_in_cache(fname):
-    return os.path.isfile(_get_path(fname))
 
+def _refresh(fname, indexes, source, depends, variant, func, *args):
+    """Return a cache file, extracting it again only if the bytes of its
+    structure changed.
 
-def lazy_load(fname, force, func, *args):
-    """Get an object from a file, or get it from the Oracle binary."""
-    if force:
-        obj = _load_and_save(fname, func, *args)
+    A cache file of the binary previously found at the same path is copied
+    if its structure bytes are the same. Files without a source function
+    are derived from other cache files and are always rebuilt.
+    """
+    if source is None:
+        return _load_and_save(fname, indexes, source, depends, variant, func, *args)
+    data, digest = _get_source(fname, source, depends, variant, *args)
+    obj = _load_cached(fname)
+    if obj is not None and obj.source == digest:
+        LOGGER.debug("%s is unchanged", fname)
+        return obj
+    previous = _load_previous(fname)
+    if previous is not None and previous.source == digest:
+        LOGGER.debug("%s is unchanged since the previous binary", fname)
+        rows = OrderedDict(previous.items())
     else:
-        if _file_in_cache(fname):
-            obj = _load_object_from_file(fname)
-        else:
-            obj = _load_and_save(fname, func, *args)
-    return obj
+        LOGGER.debug("%s changed", fname)
+        rows = None
+    if previous is not None:
+        previous.close()
+    if rows is None:
+        rows = func(data, *args)
+    _save_object_to_file(rows, fname, indexes, digest)
+    return _load_object_from_file(fname)
+
+
+def get_cached(fname):
+    """Return a dictionary from a valid cache file, or None."""
+    with profiler.phase("cache.lazy_load", fname=fname):
+        return _load_cached(fname)
+
+
+def save(fname, obj, indexes=()):
+    """Publish a dictionary built by the caller as a cache file."""
+    with locked(get_path(fname)):
+        _save_object_to_file(obj, fname, indexes)
+
+
+def lazy_load(
+    fname, force, func, *args, indexes=(), source=None, depends=(), variant=""
+):
+    """Get a dictionary from a cache file, or get it from the Oracle binary.
+
+    Fields in indexes can be looked up with CacheFile.lookup. If a source
+    function is given, func parses the bytes it returns, and their hash is
+    stored with the file to refresh it when they change. The hashes of the
+    cache files in depends are included, and the variant, a string of the
+    settings func depends on.
+    """
+    with profiler.phase("cache.lazy_load", fname=fname):
+        return _lazy_load(fname, force, indexes, source, depends, variant, func, *args)
+
+
+def _lazy_load(fname, force, indexes, source, depends, variant, func, *args):
+    path = get_path(fname)
+    if force and settings.forced is not None and path in settings.forced:
+        # Already extracted again by this command
+        force = False
+    refresh = not force and settings.refresh is not None
+    if refresh and path not in settings.refresh:
+        with locked(path):
+            obj = _refresh(fname, indexes, source, depends, variant, func, *args)
+        # Each file is checked once
+        settings.refresh.add(path)
+        return obj
+    version = _get_version(path)
+    if not force:
+        obj = _load_cached(fname)
+        if obj is not None:
+            return obj
+    with locked(path):
+        # Use the file published by another process while waiting
+        if not force or _get_version(path) != version:
+            obj = _load_cached(fname)
+            if obj is not None:
+                return obj
+        obj = _load_and_save(fname, indexes, source, depends, variant, func, *args)
+        if force and settings.forced is not None:
+            settings.forced.add(path)
+        return obj
@@ -0,0 +1,467 @@
+"""Cache file format read through mmap.
+
+A cache file stores a dictionary of rows, such as kqftab_map, as fixed-width
+records and a shared string pool, so that a row or a single field can be
+decoded without reading the rest of the file. Layout, little-endian:
+
+    header   magic, format version, flags, key type, numbers of fields, rows
+             and indexes, section offsets, file size, the binary
+             fingerprint and the hash of the structure bytes in the binary
+    fields   type and name of each field
+    rows     presence bitmask of the fields, key and one 8-byte cell per
+             field: a signed integer, or the offset and length of a string
+    indexes  per indexed field, row numbers sorted by the field value, or
+             by the upper case value for case-insensitive indexes
+    strings  UTF-8 strings
+
+Dictionaries of scalars, such as table hashes, are stored as rows with a
+single field.
+"""
+
+import mmap
+import operator
+import os
+import struct
+from collections import OrderedDict
+from collections.abc import ItemsView, Mapping, ValuesView
+
+MAGIC = b"XINF"
+VERSION = 3
+
+# magic, version, flags, key type, fields, rows, indexes, offsets of the
+# fields, rows, indexes and strings sections, file size, fingerprint, source
+HEADER = struct.Struct("<4sHHcxHIIQQQQQ64s64s")
+# type, name offset, name length
+FIELD = struct.Struct("<c3xII")
+# field number, index flags, number of rows, offset of the row numbers
+INDEX = struct.Struct("<HHIQ")
+
+# Rows are scalars, stored in a single field
+FLAG_SCALAR = 0x1
+# Keys are 1, 2, ..., n, so the row of a key is known without a lookup
+FLAG_SEQUENTIAL = 0x2
+
+# Index flags: values are compared in upper case
+NOCASE = 0x1
+
+INT = b"q"
+STR = b"s"
+# Struct formats of cells
+CELL_FORMATS = {INT: "q", STR: "II"}
+SCALAR_FIELD = "value"
+MAX_FIELDS = 64
+# Smaller files are read in full instead of being mapped, so that they hold
+# no file descriptor
+MMAP_MIN_SIZE = 64 * 1024
+
+
+def _type_of(value, what):
+    if isinstance(value, int) and not isinstance(value, bool):
+        return INT
+    if isinstance(value, str):
+        return STR
+    raise ValueError("Cannot store %s %r in a cache file" % (what, value))
+
+
+def _get_fields(rows):
+    """Return the fields of all rows, keeping the order of fields within rows."""
+    fields = OrderedDict()
+    order = []
+    for row in rows:
+        pos = 0
+        for name, value in row.items():
+            type_ = _type_of(value, "field %s =" % name)
+            if name in fields:
+                if fields[name] != type_:
+                    raise ValueError("Field %s has values of several types" % name)
+                pos = order.index(name) + 1
+            else:
+                fields[name] = type_
+                order.insert(pos, name)
+                pos += 1
+    return [(name, fields[name]) for name in order]
+
+
+class _StringPool(object):
+    def __init__(self):
+        self.data = bytearray()
+        self._offsets = {}
+
+    def add(self, s):
+        """Return (offset, length) of a string, stored once."""
+        if s not in self._offsets:
+            b = s.encode()
+            self._offsets[s] = (len(self.data), len(b))
+            self.data += b
+        return self._offsets[s]
+
+
+def _cell(value, type_, pool):
+    return pool.add(value) if type_ == STR else (value,)
+
+
+def _index_spec(index):
+    """Return (field, flags) of a field name or a (field, flags) pair."""
+    if isinstance(index, str):
+        return index, 0
+    return index
+
+
+def _sort_key(value, flags):
+    return value.upper() if flags & NOCASE else value
+
+
+def write(fp, obj, fingerprint, indexes=(), source=""):
+    """Write a dictionary of rows to a binary file object.
+
+    Rows are dictionaries of integers and strings, or scalars. Fields in
+    indexes, given as names or (name, NOCASE) pairs, can be looked up
+    without scanning rows. source is the hash of the bytes the rows were
+    parsed from, if any.
+    """
+    flags = 0
+    keys = list(obj)
+    rows = list(obj.values())
+    if rows and not all(isinstance(row, Mapping) for row in rows):
+        flags |= FLAG_SCALAR
+        rows = [{SCALAR_FIELD: row} for row in rows]
+    if keys == list(range(1, len(keys) + 1)):
+        flags |= FLAG_SEQUENTIAL
+
+    key_types = {_type_of(k, "key") for k in keys}
+    if len(key_types) > 1:
+        raise ValueError("Keys have several types")
+    key_type = key_types.pop() if key_types else INT
+
+    fields = _get_fields(rows)
+    indexes = [_index_spec(index) for index in indexes]
+    # Indexed fields which no row has are stored as empty string fields
+    fields += [
+        (name, STR)
+        for name in OrderedDict.fromkeys(name for name, _ in indexes)
+        if name not in dict(fields)
+    ]
+    if len(fields) > MAX_FIELDS:
+        raise ValueError("Too many fields: %d" % len(fields))
+    numbers = {name: i for i, (name, _) in enumerate(fields)}
+    for name, flags in indexes:
+        if flags & NOCASE and fields[numbers[name]][1] != STR:
+            raise ValueError("Cannot index integer field %s without case" % name)
+
+    pool = _StringPool()
+    row_struct = _row_struct(key_type, [t for _, t in fields])
+    fields_data = b"".join(FIELD.pack(t, *pool.add(name)) for name, t in fields)
+    rows_data = bytearray()
+    for key, row in zip(keys, rows):
+        mask = 0
+        cells = list(_cell(key, key_type, pool))
+        for i, (name, type_) in enumerate(fields):
+            if name in row:
+                mask |= 1 << i
+                cells += _cell(row[name], type_, pool)
+            else:
+                cells += (0,) * len(CELL_FORMATS[type_])
+        rows_data += row_struct.pack(mask, *cells)
+
+    fields_offset = HEADER.size
+    rows_offset = fields_offset + len(fields_data)
+    indexes_offset = rows_offset + len(rows_data)
+    offset = indexes_offset + INDEX.size * len(indexes)
+    index_dir, index_data = bytearray(), bytearray()
+    for name, flags in indexes:
+        ordered = sorted(
+            (_sort_key(row[name], flags), n)
+            for n, row in enumerate(rows)
+            if name in row
+        )
+        index_dir += INDEX.pack(numbers[name], flags, len(ordered), offset)
+        data = struct.pack("<%dI" % len(ordered), *(n for _, n in ordered))
+        index_data += data
+        offset += len(data)
+
+    fp.write(
+        HEADER.pack(
+            MAGIC,
+            VERSION,
+            flags,
+            key_type,
+            len(fields),
+            len(rows),
+            len(indexes),
+            fields_offset,
+            rows_offset,
+            indexes_offset,
+            offset,
+            offset + len(pool.data),
+            fingerprint.encode(),
+            source.encode(),
+        )
+    )
+    fp.write(fields_data)
+    fp.write(rows_data)
+    fp.write(index_dir)
+    fp.write(index_data)
+    fp.write(pool.data)
+
+
+def _row_struct(key_type, types):
+    return struct.Struct(
+        "<Q" + CELL_FORMATS[key_type] + "".join(CELL_FORMATS[t] for t in types)
+    )
+
+
+class CacheFile(Mapping):
+    """A read-only dictionary of rows in a memory-mapped cache file.
+
+    Rows are decoded on access, so commands which need a few rows read
+    a few pages of the file. Files of MMAP_MIN_SIZE bytes or more are
+    mapped and hold a file descriptor until close() is called; smaller
+    files are read in full.
+    """
+
+    def __init__(self, path, fingerprint=None):
+        self.path = path
+        with open(path, "rb") as fp:
+            size = os.fstat(fp.fileno()).st_size
+            if size < HEADER.size:
+                raise ValueError("%s is not a cache file" % path)
+            self.mapped = size >= MMAP_MIN_SIZE
+            if self.mapped:
+                self._mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self._mm = fp.read()
+        try:
+            self._read_header(path, fingerprint, size)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        """Release the mapping of the file. Rows cannot be read afterwards."""
+        if self.mapped:
+            self._mm.close()
+
+    def _read_header(self, path, fingerprint, size):
+        (
+            magic,
+            version,
+            self._flags,
+            self._key_type,
+            nfields,
+            self._nrows,
+            nindexes,
+            fields_offset,
+            self._rows_offset,
+            indexes_offset,
+            self._strings_offset,
+            file_size,
+            file_fingerprint,
+            source,
+        ) = HEADER.unpack_from(self._mm)
+        if magic != MAGIC:
+            raise ValueError("%s is not a cache file" % path)
+        if version != VERSION:
+            raise ValueError(
+                "%s has format version %d instead of %d" % (path, version, VERSION)
+            )
+        self.fingerprint = file_fingerprint.rstrip(b"\0").decode()
+        self.source = source.rstrip(b"\0").decode()
+        if fingerprint is not None and self.fingerprint != fingerprint:
+            raise ValueError(
+                "%s belongs to another binary: %s" % (path, self.fingerprint)
+            )
+        if file_size != size:
+            raise ValueError("%s is truncated" % path)
+
+        self._fields = []
+        for i in range(nfields):
+            type_, offset, len_ = FIELD.unpack_from(
+                self._mm, fields_offset + i * FIELD.size
+            )
+            self._fields.append((self._str(offset, len_), type_))
+        self._row = _row_struct(self._key_type, [t for _, t in self._fields])
+        if self._rows_offset + self._nrows * self._row.size != indexes_offset:
+            raise ValueError("%s is corrupted" % path)
+
+        # Field name to (struct, offset) of its cell in a row
+        self._cells = {}
+        offset = struct.calcsize("<Q" + CELL_FORMATS[self._key_type])
+        for i, (name, type_) in enumerate(self._fields):
+            cell = struct.Struct("<" + CELL_FORMATS[type_])
+            self._cells[name] = (i, cell, offset)
+            offset += cell.size
+
+        # Field name to (number of rows, offset of the row numbers)
+        self._indexes = {}
+        for i in range(nindexes):
+            field, flags, count, offset = INDEX.unpack_from(
+                self._mm, indexes_offset + i * INDEX.size
+            )
+            self._indexes[self._fields[field][0]] = (flags, count, offset)
+        self._rows = None
+
+    def _str(self, offset, len_):
+        start = self._strings_offset + offset
+        return self._mm[start : start + len_].decode()
+
+    def _get_row_numbers(self):
+        """Key to row number, for files without sequential keys."""
+        if self._rows is None:
+            self._rows = {self._get_key(n): n for n in range(self._nrows)}
+        return self._rows
+
+    def _get_key(self, n):
+        cell = struct.unpack_from(
+            "<" + CELL_FORMATS[self._key_type],
+            self._mm,
+            self._rows_offset + n * self._row.size + 8,
+        )
+        return self._str(*cell) if self._key_type == STR else cell[0]
+
+    def _get_row(self, n):
+        mask, *cells = self._row.unpack_from(
+            self._mm, self._rows_offset + n * self._row.size
+        )
+        cells = iter(cells[len(CELL_FORMATS[self._key_type]) :])
+        row = OrderedDict()
+        for i, (name, type_) in enumerate(self._fields):
+            value = next(cells)
+            if type_ == STR:
+                value = self._str(value, next(cells))
+            if mask & (1 << i):
+                row[name] = value
+        if self._flags & FLAG_SCALAR:
+            return row[SCALAR_FIELD]
+        return row
+
+    def _get_field(self, n, name):
+        """Decode a single field of a row. Return None if the row has no value."""
+        i, cell, offset = self._cells[name]
+        start = self._rows_offset + n * self._row.size
+        (mask,) = struct.unpack_from("<Q", self._mm, start)
+        if not mask & (1 << i):
+            return None
+        value = cell.unpack_from(self._mm, start + offset)
+        return self._str(*value) if len(value) == 2 else value[0]
+
+    def _find_row(self, key):
+        if self._flags & FLAG_SEQUENTIAL:
+            if isinstance(key, int) and 1 <= key <= self._nrows:
+                return key - 1
+            return None
+        return self._get_row_numbers().get(key)
+
+    def __getitem__(self, key):
+        n = self._find_row(key)
+        if n is None:
+            raise KeyError(key)
+        return self._get_row(n)
+
+    def __contains__(self, key):
+        return self._find_row(key) is not None
+
+    def __iter__(self):
+        for n in range(self._nrows):
+            yield self._get_key(n)
+
+    def __len__(self):
+        return self._nrows
+
+    def items(self):
+        return _ItemsView(self)
+
+    def values(self):
+        return _ValuesView(self)
+
+    def _iter_items(self):
+        for n in range(self._nrows):
+            yield self._get_key(n), self._get_row(n)
+
+    def _field_type(self, field):
+        return self._fields[self._cells[field][0]][1] if field in self._cells else None
+
+    def _range(self, field, value, match):
+        """Return row numbers of an indexed field from the first value not
+        less than value, while the values match."""
+        flags, count, offset = self._indexes[field]
+        value = _sort_key(value, flags)
+
+        def indexed(i):
+            n = struct.unpack_from("<I", self._mm, offset + i * 4)[0]
+            return n, _sort_key(self._get_field(n, field), flags)
+
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if indexed(mid)[1] < value:
+                lo = mid + 1
+            else:
+                hi = mid
+        numbers = []
+        for i in range(lo, count):
+            n, v = indexed(i)
+            if not match(v, value):
+                break
+            numbers.append(n)
+        return numbers
+
+    def _scan(self, field, value, match):
+        """Return row numbers of rows with a field value matching value."""
+        numbers = []
+        for n in range(self._nrows):
+            v = self._get_field(n, field)
+            if v is not None and match(v, value):
+                numbers.append(n)
+        return numbers
+
+    def _find(self, field, value, match, indexed=True):
+        if indexed and field in self._indexes:
+            numbers = self._range(field, value, match)
+        else:
+            numbers = self._scan(field, value, match)
+        # Keys in file order
+        return [self._get_key(n) for n in sorted(numbers)]
+
+    def scan(self, field, match):
+        """Return the keys of rows with a field value for which match returns
+        True, in file order. Only the field is decoded."""
+        if field not in self._cells:
+            return []
+        return self._find(field, None, lambda v, _: match(v), indexed=False)
+
+    def lookup(self, field, value):
+        """Return the keys of rows with a field value, in file order.
+
+        Indexed fields are binary searched, other fields are scanned.
+        Case-insensitive indexes match values in any case.
+        """
+        if _type_of(value, "value") != self._field_type(field):
+            return []
+        return self._find(field, value, operator.eq)
+
+    def lookup_prefix(self, field, prefix):
+        """Return the keys of rows with a string field starting with prefix,
+        in file order.
+
+        Indexed fields are range scanned from the first value not less than
+        the prefix.
+        """
+        if self._field_type(field) != STR:
+            return []
+        return self._find(field, prefix, str.startswith)
+
+    def __repr__(self):
+        return "%s(%r)" % (type(self).__name__, OrderedDict(self.items()))
+
+
+class _ItemsView(ItemsView):
+    """Items decoded row by row, without looking up each key."""
+
+    def __iter__(self):
+        return self._mapping._iter_items()
+
+
+class _ValuesView(ValuesView):
+    def __iter__(self):
+        for _, row in self._mapping._iter_items():
+            yield row
@@ -0,0 +1,163 @@
+"""X$ table catalogs of Oracle binaries, for use as a library.
+
+    import xinfo
+
+    catalog = xinfo.Catalog("/u01/app/oracle/product/19.0.0/dbhome_1/bin/oracle", 19)
+    catalog.table("X$KSUSE")
+    catalog.columns("X$KSUSE")
+
+Structures are read from the cache, or extracted from the binary, the first
+time they are used. Loaded cache files are kept by the cache, which releases
+the least recently used ones. Each catalog loads its structures with its own
+settings, so threads can query several binaries at the same time.
+"""
+
+import threading
+from collections import OrderedDict
+
+import xinfo.cache as cache
+import xinfo.config.settings as settings
+import xinfo.x.columns as xcolumns
+import xinfo.x.kqf as kqf
+import xinfo.x.kqfcop as kqfcop
+import xinfo.x.kqftab as kqftab
+import xinfo.x.kqftap as kqftap
+import xinfo.x.tables as xtables
+
+# (fingerprint, version, backend) to the catalog used by commands, least
+# recently used first
+_catalogs = OrderedDict()
+_catalogs_lock = threading.Lock()
+MAX_CATALOGS = 16
+
+
+class Catalog:
+    """X$ tables of an Oracle binary.
+
+    A catalog can be shared by threads. Each structure is extracted once,
+    under a lock of its own, and is then read from the cache without
+    locking. Loads use the settings of the catalog in the loading thread
+    only, so other structures and other catalogs are loaded at the same
+    time. backend and jobs default to the settings.
+    """
+
+    def __init__(self, binary, version, backend=None, jobs=None):
+        self.binary = binary
+        self.version = version
+        self.backend = backend
+        self.jobs = jobs
+        # Keys of the structures loaded once
+        self._loaded = set()
+        # Structure key to the lock held while loading it first
+        self._locks = {}
+        self._lock = threading.Lock()
+        # Cache paths extracted again when forcing the cache outside commands
+        self._forced = set()
+
+    def __repr__(self):
+        return "Catalog(%r, %r)" % (self.binary, self.version)
+
+    def _settings(self):
+        """Use the settings of the catalog in the current thread within the
+        context."""
+        values = dict(ora_binary=self.binary, ora_version=self.version)
+        if self.backend is not None:
+            values["backend"] = self.backend
+        if self.jobs is not None:
+            values["jobs"] = self.jobs
+        if settings.forced is None:
+            values["forced"] = self._forced
+        return settings.local(**values)
+
+    def _get(self, key, load, *args):
+        """Return a structure from the cache, loading it under its lock on
+        first use."""
+        with self._settings():
+            if key in self._loaded:
+                return load(*args)
+            with self._lock:
+                lock = self._locks.setdefault(key, threading.Lock())
+            with lock:
+                obj = load(*args)
+                self._loaded.add(key)
+                return obj
+
+    def prefetch(self, *names):
+        """Extract the kqftab, kqftap and kqfcop structures in names which are
+        missing in the cache at the same time."""
+        with self._settings():
+            kqf.prefetch(*names)
+
+    @property
+    def tables(self):
+        """kqftab index to the name, obj, xstruct and column array of tables."""
+        return self._get("tables", xtables.get_tables)
+
+    @property
+    def kqftab(self):
+        """kqftab index to the kqftab entry of tables."""
+        return self._get("kqftab", kqftab.get_kqftab)
+
+    @property
+    def kqftap(self):
+        """kqftab index to the column array and callbacks of tables."""
+        return self._get("kqftap", kqftap.get_kqftap)
+
+    @property
+    def kqfcop(self):
+        """kqfcop index to the pointer and name of column functions."""
+        return self._get("kqfcop", kqfcop.get_kqfcop)
+
+    def table(self, name):
+        """Return (index, table) of an X$ table name in any case."""
+        return xtables.lookup_table(self.tables, name)
+
+    def match(self, expr):
+        """Return (index, table) pairs of tables with names matching a glob
+        expression in any case, in kqftab order."""
+        return xtables.match_tables(self.tables, expr)
+
+    def columns(self, name):
+        """Return the columns of an X$ table name in any case."""
+        _, table = self.table(name)
+        if "columns" not in table:
+            raise ValueError("Table %s has no kqftap entry" % table["nam"])
+        return self._get_columns(table["columns"])
+
+    def _get_columns(self, xstruct):
+        return self._get(("columns", xstruct), xcolumns.get_xstruct, xstruct)
+
+    def iter_columns(self, tables):
+        """Return an iterator of (table, columns) for (table, xstruct) pairs.
+
+        Columns are loaded by a pool of workers, and each table is yielded as
+        soon as its columns are ready. Nothing is locked while the caller
+        handles a table.
+        """
+        # Column functions are read from kqfcop
+        self.kqfcop
+        jobs = self.jobs if self.jobs is not None else settings.jobs
+        return xcolumns.iter_loaded(list(tables), self._get_columns, jobs)
+
+
+def get_catalog():
+    """Return the catalog of the Oracle binary in the settings.
+
+    The MAX_CATALOGS most recently used catalogs are kept by the process,
+    so a long-running process loads each structure once. A new catalog is
+    loaded when the cache is forced or refreshed.
+    """
+    key = (
+        cache.get_fingerprint(settings.ora_binary),
+        settings.ora_version,
+        settings.backend,
+    )
+    with _catalogs_lock:
+        if key not in _catalogs or settings.force or settings.refresh is not None:
+            _catalogs[key] = Catalog(
+                settings.ora_binary, settings.ora_version, settings.backend
+            )
+        _catalogs.move_to_end(key)
+        while len(_catalogs) > MAX_CATALOGS:
+            _catalogs.popitem(last=False)
+        return _catalogs[key]
@@ -3,47 +3,97 @@
 import argparse
 import importlib
 import logging
-import logging.config
 import os
-import subprocess
 import sys
 import traceback
+from collections import OrderedDict
 
-import yaml
-
+import xinfo.client as client
 import xinfo.config.settings as settings
+import xinfo.profiler as profiler
 from xinfo._version import __version__
 
 LOGGER = None
 
+# A logging configuration file in YAML used instead of the default one
+LOGGING_CONFIG_ENV = "XINFO_LOGGING_CONFIG"
+LOG_FORMAT = (
+    "%(asctime)s [%(levelname)s %(name)s.%(funcName)s][%(threadName)s] %(message)s"
+)
+
+# Command name to (module, help). Only the module of the command being run
+# is imported.
+COMMANDS = OrderedDict(
+    [
+        (
+            "columns",
+            ("xinfo.commands.columns", "Find columns of all X$ tables by name"),
+        ),
+        ("desc", ("xinfo.commands.desc", "Describe X$ tables")),
+        ("diff", ("xinfo.commands.diff", "Compare X$ tables of two Oracle binaries")),
+        ("list", ("xinfo.commands.list", "List X$ tables")),
+        (
+            "scan",
+            (
+                "xinfo.commands.scan",
+                "Extract the catalogs of the Oracle binaries under directories",
+            ),
+        ),
+        (
+            "serve",
+            ("xinfo.commands.serve", "Serve xinfo commands over a Unix domain socket"),
+        ),
+        ("sql", ("xinfo.commands.sql", "Query the X$ catalog with SQL")),
+        (
+            "where-used",
+            (
+                "xinfo.commands.where_used",
+                "Find X$ tables and columns using a function",
+            ),
+        ),
+    ]
+)
+
 
 def _setup_logging():
     global LOGGER
-    log_file_path = os.path.join(
-        os.path.dirname(os.path.abspath(__file__)), "config/logging.yaml"
-    )
-    with open(log_file_path, "r") as stream:
-        config = yaml.load(stream, Loader=yaml.FullLoader)
-    logging.config.dictConfig(config)
+    if LOGGER is not None:
+        # Already configured by a previous command in this process
+        return
+    configure_logging()
     LOGGER = logging.getLogger(__name__)
 
 
-def _load_actions():
-    """Load argparse actions."""
-    this_module_dir = os.path.dirname(os.path.realpath(__file__))
-    module_dir_name = "commands"
-    module_dir = os.path.join(this_module_dir, module_dir_name)
-    package = ".".join([__package__, module_dir_name])
-    actions = []
-    for filename in os.listdir(module_dir):
-        filename = os.path.join(module_dir, filename)
-        if os.path.isfile(filename):
-            basename = os.path.basename(filename)
-            base, extension = os.path.splitext(basename)
-            if extension == ".py" and not basename.startswith("_"):
-                module = importlib.import_module("." + base, package=package)
-                actions.append(module.get_cmd_args())
-    return actions
+def configure_logging():
+    """Configure logging from the file in LOGGING_CONFIG_ENV, or write log
+    records to the current stdout."""
+    config_path = os.environ.get(LOGGING_CONFIG_ENV)
+    if config_path:
+        from logging.config import dictConfig
+
+        try:
+            import yaml
+        except ImportError:
+            raise RuntimeError(
+                "PyYAML is needed to read %s, install xinfo[yaml]" % LOGGING_CONFIG_ENV
+            ) from None
+
+        with open(config_path, "r") as stream:
+            config = yaml.load(stream, Loader=yaml.FullLoader)
+        dictConfig(config)
+    else:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        root = logging.getLogger()
+        root.addHandler(handler)
+        root.setLevel(logging.INFO)
+
+
+def _load_command(cmd):
+    """Import a command module. Return (action, args_cb, help)."""
+    module = importlib.import_module(COMMANDS[cmd][0])
+    _, command = module.get_cmd_args()
+    return command
 
 
 def _ora_bin_default():
@@ -72,6 +122,17 @@ def _ora_binary(path):
     return path
 
 
+def _positive_int(value):
+    """Positive integer validation."""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError("%s is not a positive integer" % value)
+    return number
+
+
 def _ora_version_default():
     """Oracle version default value."""
     oh = os.environ.get("ORACLE_HOME")
@@ -88,6 +149,8 @@ def _ora_version_default():
             ("Wrong ORACLE_HOME = %s. %s does not exist" % (oh, ora_version_bin))
         )
 
+    import subprocess
+
     cmd = f"{ora_version_bin} -majorVersion"
     LOGGER.debug(cmd)
     exitcode, output = subprocess.getstatusoutput(cmd)
@@ -132,6 +195,25 @@ def _get_common_parsers():
             "if no version is specified"
         ),
     )
+    oracle_parser.add_argument(
+        "--backend",
+        default="elf",
+        choices=["elf", "binutils"],
+        help=(
+            "The way to read the Oracle binary: the built-in ELF reader, "
+            "or objdump and nm from the binutils package"
+        ),
+    )
+    oracle_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=_positive_int,
+        default=1,
+        help=(
+            "The number of parallel workers reading the Oracle binary "
+            "and extracting columns of several tables"
+        ),
+    )
 
     force_parser = argparse.ArgumentParser(add_help=False)
     force_parser.add_argument(
@@ -140,6 +222,15 @@ def _get_common_parsers():
         action="store_true",
         help="Set to true to refresh the local cache",
     )
+    force_parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help=(
+            "Extract again only the structures whose bytes changed, reusing "
+            "the cache of the binary previously found at the same path. The "
+            "strings and symbols they point to are not compared"
+        ),
+    )
 
     logging_parser = argparse.ArgumentParser(add_help=False)
     logging_group = logging_parser.add_mutually_exclusive_group()
@@ -163,18 +254,37 @@ def _get_common_parsers():
         "-o",
         "--output",
         default="table",
-        choices=["table", "json", "html"],
-        help="The formatting style for command output",
+        choices=["table", "json", "html", "ndjson", "csv"],
+        help=(
+            "The formatting style for command output. "
+            "json, ndjson and csv are written as rows are produced"
+        ),
+    )
+
+    profile_parser = argparse.ArgumentParser(add_help=False)
+    profile_parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=(
+            "Print wall time, calls, started processes, bytes read "
+            "and peak memory of each phase to stderr"
+        ),
+    )
+    profile_parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="Write phases to a file in the Chrome trace event format",
     )
 
-    return [oracle_parser, force_parser, logging_parser, fmt_parser]
+    return [oracle_parser, force_parser, logging_parser, fmt_parser, profile_parser]
 
 
 def _handle_common_args(args):
     if args.verbose or args.quiet:
         log_level = logging.DEBUG if args.verbose else logging.WARNING
+        # The root logger level applies to modules imported later
         loggers = [logging.getLogger(name) for name in logging.root.manager.loggerDict]
-        for logger in loggers:
+        for logger in [logging.getLogger()] + loggers:
             logger.setLevel(log_level)
 
     if args.ora_binary:
@@ -191,15 +301,43 @@ def _handle_common_args(args):
         else:
             settings.ora_version = ora_version
 
+    if args.backend:
+        settings.backend = args.backend
+
+    if args.jobs:
+        settings.jobs = args.jobs
+
     if args.force:
         settings.force = args.force
+        settings.forced = set()
+
+    if args.refresh:
+        settings.refresh = set()
 
     if args.output:
         settings.format_type = args.output
 
 
+def _report_profile(args):
+    if not profiler.is_enabled():
+        return
+    profiler.disable()
+    if args.profile:
+        profiler.print_summary(sys.stderr)
+    if args.trace:
+        profiler.write_trace(args.trace)
+
+
 def main():
     """Command line entry point."""
+    exit_code = client.request(sys.argv[1:])
+    if exit_code is not None:
+        return exit_code
+    return run(sys.argv[1:])
+
+
+def run(argv):
+    """Run a command in-process."""
     try:
         _setup_logging()
 
@@ -213,27 +351,41 @@ def main():
             metavar="[command]", description="Available commands"
         )
 
-        actions = _load_actions()
-        spd = {}
-        for cmd, (action, args_cb, help_) in actions:
-            spd[cmd] = sp = subparsers.add_parser(
-                cmd, help=help_, parents=_get_common_parsers(), description=help_
+        # Only the parser of the command being run gets its arguments
+        cmd = argv[0] if argv and argv[0] in COMMANDS else None
+        for name, (_, help_) in COMMANDS.items():
+            if name != cmd:
+                subparsers.add_parser(name, help=help_, description=help_)
+                continue
+            action, args_cb, _ = _load_command(cmd)
+            # Commands can replace common options
+            sp = subparsers.add_parser(
+                cmd,
+                help=help_,
+                parents=_get_common_parsers(),
+                description=help_,
+                conflict_handler="resolve",
             )
             sp.set_defaults(command=cmd)
             if args_cb is not None:
                 args_cb(sp)
 
-        if len(sys.argv) == 1:
+        if not argv:
             parser.print_help(sys.stderr)
             return 1
 
-        args = parser.parse_args()
+        args = parser.parse_args(argv)
 
         _handle_common_args(args)
         LOGGER.debug(args)
-        action = dict(actions)[args.command][0]
-        action(args)
-        sys.stdout.flush()
+        if args.profile or args.trace:
+            profiler.enable(memory=args.profile)
+        try:
+            with profiler.phase("command", command=args.command):
+                action(args)
+            sys.stdout.flush()
+        finally:
+            _report_profile(args)
         return 0
     except argparse.ArgumentTypeError:
         raise
@@ -0,0 +1,85 @@
+"""Client running commands on the xinfo server, if it is running."""
+
+import os
+import sys
+import tempfile
+
+# Set to use in-process execution even when the server is running
+NO_DAEMON_ENV = "XINFO_NO_DAEMON"
+SOCKET_ENV = "XINFO_SOCKET"
+
+# Environment variables used to resolve default command arguments and to
+# configure logging
+FORWARDED_ENV = ("ORACLE_HOME", "XINFO_LOGGING_CONFIG")
+
+RECV_SIZE = 65536
+# Seconds to wait for the server before running a command in-process
+TIMEOUT = 600
+
+
+def get_socket_dir():
+    """Return the directory of the default server socket, which only the
+    current user can use."""
+    return os.path.join(tempfile.gettempdir(), "xinfo-%d" % os.getuid())
+
+
+def get_socket_path():
+    """Return the server socket path of the current user."""
+    return os.environ.get(SOCKET_ENV) or os.path.join(get_socket_dir(), "server.sock")
+
+
+def recv_all(sock):
+    """Read from a socket until the peer shuts down writing."""
+    chunks = []
+    while True:
+        chunk = sock.recv(RECV_SIZE)
+        if not chunk:
+            return b"".join(chunks)
+        chunks.append(chunk)
+
+
+def request(argv):
+    """Run a command on the server.
+
+    Return the exit code, or None if the server is not running.
+    """
+    # scan starts its own worker processes
+    if os.environ.get(NO_DAEMON_ENV) or argv[:1] in (["serve"], ["scan"]):
+        return None
+
+    path = get_socket_path()
+    try:
+        uid = os.stat(path).st_uid
+    except FileNotFoundError:
+        return None
+    if uid != os.getuid():
+        # Commands and their environment are only sent to servers of the user
+        sys.stderr.write("xinfo: ignoring %s of another user\n" % path)
+        return None
+
+    message = dict(
+        argv=argv,
+        cwd=os.getcwd(),
+        env={k: os.environ[k] for k in FORWARDED_ENV if k in os.environ},
+    )
+    # Imported only when the server is running
+    import json
+    import socket
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(TIMEOUT)
+            sock.connect(path)
+            sock.sendall(json.dumps(message).encode())
+            sock.shutdown(socket.SHUT_WR)
+            response = json.loads(recv_all(sock))
+    except (ConnectionError, FileNotFoundError, PermissionError):
+        # The server is gone: fall back to in-process execution
+        return None
+    except socket.timeout:
+        sys.stderr.write("xinfo: no answer from %s, running in-process\n" % path)
+        return None
+
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    return response["exit_code"]
@@ -0,0 +1,39 @@
+"""Find columns of all X$ tables."""
+
+import logging
+
+import xinfo.x.column_index as column_index
+from xinfo.formatter import get_formatter
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _add_columns_args(p):
+    """argparse arguments."""
+    p.add_argument(
+        "pattern",
+        help="A column name or an expression in any case, e.g. '*SQL_ID*' or '%%SQL_ID%%'",
+    )
+    p.add_argument("--dty", type=int, help="Only columns of a data type")
+    p.add_argument("--siz", type=int, help="Only columns of a size")
+    p.add_argument(
+        "--func", help="Only columns with a kqfcop function matching an expression"
+    )
+
+
+def find_columns(args):
+    """Find columns of all X$ tables."""
+    LOGGER.debug(args)
+
+    rows = column_index.search(args.pattern, args.dty, args.siz, args.func)
+
+    formatter = get_formatter(args.output)
+    formatter.write("columns", enumerate(rows, 1), fields=column_index.FIELDS)
+
+
+def get_cmd_args():
+    """argparse setup."""
+    return (
+        "columns",
+        (find_columns, _add_columns_args, "Find columns of all X$ tables by name"),
+    )
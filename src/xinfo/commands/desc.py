@@ -1,10 +1,10 @@
 """Describe X$ tables."""
 
 import logging
+from collections import OrderedDict
 
 import xinfo.x.columns as xcolumns
-import xinfo.x.kqftab as kqftab
-import xinfo.x.kqftap as kqftap
+from xinfo.catalog import get_catalog
 from xinfo.formatter import get_formatter
 
 LOGGER = logging.getLogger(__name__)
@@ -12,24 +12,65 @@ LOGGER = logging.getLogger(__name__)
 
 def _add_desc_args(p):
     """argparse arguments."""
-    p.add_argument("table", help="An X$ table to describe")
+    group = p.add_mutually_exclusive_group(required=True)
+    group.add_argument(
+        "table",
+        nargs="?",
+        help="An X$ table to describe, or an expression for X$ tables, in any case, e.g. 'X$KSU*'",
+    )
+    group.add_argument("--all", action="store_true", help="Describe all X$ tables")
+
+
+def _is_expr(table):
+    """Return True if the table name contains wildcards."""
+    return any(c in table for c in "*?[")
+
+
+def _get_xstructs(catalog, args):
+    """Return table name to xstruct pairs for the tables to describe."""
+    rows = catalog.tables.items() if args.all else catalog.match(args.table)
+    xstructs = OrderedDict()
+    for _, v in rows:
+        if "columns" not in v:
+            LOGGER.debug("No kqftap entry for %s", v["nam"])
+            continue
+        xstructs[v["nam"]] = v["columns"]
+    return xstructs
+
+
+def _describe_tables(catalog, args):
+    """Yield (table name, columns) pairs for all X$ tables matching the expression."""
+    xstructs = _get_xstructs(catalog, args)
+    LOGGER.debug(xstructs)
+    return catalog.iter_columns(xstructs.items())
+
+
+def _flatten(tables):
+    """Yield one row per column with the table name for tabular output."""
+    n = 0
+    for table, xdesc in tables:
+        for col in xdesc.values():
+            n += 1
+            yield n, OrderedDict(table=table, **col)
 
 
 def describe_table(args):
     """Describe an X$ table."""
     LOGGER.debug(args)
 
-    indx = kqftab.get_index(args.table)
-    kqftap_map = kqftap.get_kqftap()
-    xstruct = kqftap_map[indx]["xstruct"]
-    LOGGER.debug(xstruct)
-
-    xdesc = xcolumns.get_xstruct(xstruct)
-    LOGGER.debug(xdesc)
+    catalog = get_catalog()
+    fields = xcolumns.FIELDS
+    if args.all or _is_expr(args.table):
+        response = _describe_tables(catalog, args)
+        if args.output != "json":
+            response = _flatten(response)
+            fields = ("table",) + fields
+    else:
+        response = catalog.columns(args.table)
+        LOGGER.debug(response)
 
     formatter = get_formatter(args.output)
-    output = formatter("desc", xdesc)
-    print(output)
+    formatter.write("desc", response, fields=fields)
 
 
 def get_cmd_args():
@@ -0,0 +1,50 @@
+"""Compare X$ tables of two Oracle binaries."""
+
+import logging
+import os
+
+import xinfo.diff as xdiff
+from xinfo.formatter import get_formatter
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _add_diff_args(p):
+    """argparse arguments."""
+    # Replaces the common option to take both binaries
+    p.add_argument(
+        "-b",
+        "--ora-binary",
+        action="append",
+        required=True,
+        help=(
+            "An Oracle binary to compare. Specify it twice: "
+            "the old binary first, then the new one"
+        ),
+    )
+
+
+def diff_binaries(args):
+    """Show X$ tables and columns added, removed or changed between binaries."""
+    LOGGER.debug(args)
+
+    if len(args.ora_binary) != 2:
+        raise ValueError(
+            "Two Oracle binaries should be specified, got %d" % len(args.ora_binary)
+        )
+    for path in args.ora_binary:
+        if not os.path.exists(path):
+            raise ValueError("%s does not exist" % path)
+
+    rows = xdiff.diff(*args.ora_binary)
+
+    formatter = get_formatter(args.output)
+    formatter.write("diff", enumerate(rows, 1), fields=xdiff.FIELDS)
+
+
+def get_cmd_args():
+    """argparse setup."""
+    return (
+        "diff",
+        (diff_binaries, _add_diff_args, "Compare X$ tables of two Oracle binaries"),
+    )
@@ -1,11 +1,10 @@
 """List X$ tables."""
 
-import fnmatch
 import logging
 from collections import OrderedDict
 
 import xinfo.x.kqftab as kqftab
-import xinfo.x.kqftap as kqftap
+from xinfo.catalog import get_catalog
 from xinfo.formatter import get_formatter
 
 LOGGER = logging.getLogger(__name__)
@@ -16,7 +15,7 @@ def _add_list_args(p):
     p.add_argument(
         "expr",
         nargs="?",
-        help="An expression for X$ tables to list, e.g. 'X$KSU*'. Returns all tables if not specified",
+        help="An expression for X$ tables to list in any case, e.g. 'X$KSU*'. Returns all tables if not specified",
     )
     p.add_argument(
         "--with-kqftap", action="store_true", help="Include kqftap structure in output"
@@ -27,23 +26,26 @@ def list_tables(args):
     """List X$ tables."""
     LOGGER.debug(args)
 
-    kqftab_map = kqftab.get_kqftab()
+    catalog = get_catalog()
+    if args.with_kqftap:
+        catalog.prefetch("kqftab", "kqftap")
+    kqftab_map = catalog.kqftab
+    rows = kqftab_map.items()
 
     if args.expr:
-        kqftab_map = OrderedDict(
-            (k, v)
-            for k, v in kqftab_map.items()
-            if fnmatch.filter([v["nam"]], args.expr)
-        )
+        rows = ((k, kqftab_map[k]) for k, _ in catalog.match(args.expr))
 
     if args.with_kqftap:
-        kqftap_map = kqftap.get_kqftap()
-        for k, v in kqftab_map.items():
-            v["kqftap"] = kqftap_map[k]
+        kqftap_map = catalog.kqftap
+        # Tables without a kqftap entry are listed as they are
+        rows = (
+            (k, OrderedDict(v, kqftap=kqftap_map[k]) if k in kqftap_map else v)
+            for k, v in rows
+        )
 
+    fields = kqftab.FIELDS + ("kqftap",) if args.with_kqftap else kqftab.FIELDS
     formatter = get_formatter(args.output)
-    output = formatter("list", kqftab_map)
-    print(output)
+    formatter.write("list", rows, fields=fields)
 
 
 def get_cmd_args():
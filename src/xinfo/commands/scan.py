@@ -0,0 +1,63 @@
+"""Extract the catalogs of the Oracle binaries under directories."""
+
+import logging
+
+import xinfo.scan as xscan
+from xinfo.formatter import get_formatter
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _add_scan_args(p):
+    """argparse arguments."""
+    p.add_argument(
+        "roots",
+        nargs="*",
+        help="Directories to search for bin/oracle, or Oracle binaries",
+    )
+    # Replace the common options: versions are found next to each binary
+    p.add_argument(
+        "-b",
+        "--ora-binary",
+        action="append",
+        dest="binaries",
+        default=[],
+        help="An Oracle binary to scan along with the roots. Can be repeated",
+    )
+    # The binary of the settings is not used
+    p.set_defaults(ora_binary=None)
+    p.add_argument(
+        "--ora-version",
+        type=int,
+        default=None,
+        help=(
+            "The major Oracle version of binaries without bin/oraversion "
+            "next to them"
+        ),
+    )
+
+
+def scan_homes(args):
+    """Extract each unique binary once and summarize every binary found."""
+    LOGGER.debug(args)
+
+    roots = args.roots + args.binaries
+    if not roots:
+        raise ValueError("Specify directories to search or Oracle binaries")
+
+    rows = xscan.scan(roots, args.ora_version)
+
+    formatter = get_formatter(args.output)
+    formatter.write("scan", enumerate(rows, 1), fields=xscan.FIELDS)
+
+
+def get_cmd_args():
+    """argparse setup."""
+    return (
+        "scan",
+        (
+            scan_homes,
+            _add_scan_args,
+            "Extract the catalogs of the Oracle binaries under directories",
+        ),
+    )
@@ -0,0 +1,46 @@
+"""Serve xinfo commands from a long-running process."""
+
+import logging
+
+import xinfo.server as server
+import xinfo.x.kqf as kqf
+import xinfo.x.kqfcop as kqfcop
+import xinfo.x.kqftab as kqftab
+import xinfo.x.kqftap as kqftap
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _add_serve_args(p):
+    """argparse arguments."""
+    p.add_argument(
+        "--socket",
+        help=(
+            "The Unix domain socket to listen on. "
+            "The default is xinfo-<uid>/server.sock in the temporary directory"
+        ),
+    )
+
+
+def serve(args):
+    """Load the catalogs of the Oracle binary and serve requests."""
+    LOGGER.debug(args)
+
+    kqf.prefetch(*kqf.STRUCTURES)
+    kqftab.get_kqftab()
+    kqftap.get_kqftap()
+    kqfcop.get_kqfcop()
+
+    server.serve(args.socket)
+
+
+def get_cmd_args():
+    """argparse setup."""
+    return (
+        "serve",
+        (
+            serve,
+            _add_serve_args,
+            "Serve xinfo commands over a Unix domain socket",
+        ),
+    )
@@ -0,0 +1,35 @@
+"""Query the X$ catalog with SQL."""
+
+import logging
+
+import xinfo.db as db
+from xinfo.formatter import get_formatter
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _add_sql_args(p):
+    """argparse arguments."""
+    p.add_argument(
+        "query",
+        help=(
+            "A query against the catalog tables kqftab, kqftap, kqfcop, columns, "
+            "and the xcolumns view of X$ table columns, e.g. "
+            "\"SELECT table_name FROM xcolumns WHERE nam = 'CON_ID' AND siz = 2\""
+        ),
+    )
+
+
+def run_query(args):
+    """Run a query against the X$ catalog."""
+    LOGGER.debug(args)
+
+    rows = db.iter_query(args.query)
+
+    formatter = get_formatter(args.output)
+    formatter.write("sql", enumerate(rows, 1))
+
+
+def get_cmd_args():
+    """argparse setup."""
+    return ("sql", (run_query, _add_sql_args, "Query the X$ catalog with SQL"))
@@ -0,0 +1,38 @@
+"""Find X$ tables and columns using a function."""
+
+import logging
+
+import xinfo.x.symbol_index as symbol_index
+from xinfo.formatter import get_formatter
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _add_where_used_args(p):
+    """argparse arguments."""
+    p.add_argument(
+        "symbol",
+        help="A function name or an expression, e.g. 'ksl*'",
+    )
+
+
+def where_used(args):
+    """Find X$ tables and columns using a function."""
+    LOGGER.debug(args)
+
+    rows = symbol_index.where_used(args.symbol)
+
+    formatter = get_formatter(args.output)
+    formatter.write("where-used", enumerate(rows, 1), fields=symbol_index.FIELDS)
+
+
+def get_cmd_args():
+    """argparse setup."""
+    return (
+        "where-used",
+        (
+            where_used,
+            _add_where_used_args,
+            "Find X$ tables and columns using a function",
+        ),
+    )
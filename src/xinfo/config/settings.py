@@ -1,6 +1,64 @@
-"""Application settings."""
+"""Application settings.
 
+Settings are module attributes. A thread can use other values within
+local(), for example to read another Oracle binary, while other threads
+keep using the module values.
+"""
+
+import sys
+import threading
+import types
+from contextlib import contextmanager
+from functools import wraps
+
+backend = "elf"
 force = False
+# Cache paths extracted again when forcing the cache, so that each file is
+# extracted once by a command
+forced = None
 format_type = None
+jobs = 1
 ora_binary = None
 ora_version = None
+# Cache paths checked against the Oracle binary when refreshing the cache
+refresh = None
+
+# Settings used instead of the module values by the current thread
+_local = threading.local()
+
+
+class _Settings(types.ModuleType):
+    def __getattribute__(self, name):
+        values = getattr(_local, "values", None)
+        if values and name in values:
+            return values[name]
+        return super().__getattribute__(name)
+
+
+@contextmanager
+def local(**values):
+    """Use values for settings in the current thread within the context."""
+    saved = getattr(_local, "values", None)
+    _local.values = dict(saved or {}, **values)
+    try:
+        yield
+    finally:
+        _local.values = saved
+
+
+def bind(func):
+    """Return func running with the settings of the current thread, to be
+    called by worker threads."""
+    values = getattr(_local, "values", None)
+    if not values:
+        return func
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with local(**values):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+sys.modules[__name__].__class__ = _Settings
@@ -0,0 +1,210 @@
+"""SQLite catalog of X$ tables and columns."""
+
+import logging
+import os
+import pathlib
+import sqlite3
+import tempfile
+from collections import OrderedDict
+
+import xinfo.cache as cache
+import xinfo.config.settings as settings
+import xinfo.x.columns as xcolumns
+import xinfo.x.kqf as kqf
+import xinfo.x.kqfcop as kqfcop
+import xinfo.x.kqftab as kqftab
+import xinfo.x.kqftap as kqftap
+
+LOGGER = logging.getLogger(__name__)
+
+DB_NAME = "catalog.db"
+
+SCHEMA = """
+CREATE TABLE kqftab (
+  indx INTEGER PRIMARY KEY,
+  obj INTEGER,
+  ver INTEGER,
+  nam_ptr INTEGER,
+  nam TEXT,
+  xstruct_nam_ptr INTEGER,
+  xstruct TEXT,
+  typ INTEGER,
+  flg INTEGER,
+  rsz INTEGER,
+  coc INTEGER
+);
+CREATE TABLE kqftap (
+  indx INTEGER PRIMARY KEY,
+  xstruct_ptr INTEGER,
+  cb1_ptr INTEGER,
+  cb2_ptr INTEGER,
+  xstruct TEXT,
+  cb1 TEXT,
+  cb2 TEXT
+);
+CREATE TABLE kqfcop (
+  indx INTEGER PRIMARY KEY,
+  func_ptr INTEGER,
+  func TEXT
+);
+CREATE TABLE columns (
+  xstruct TEXT,
+  cno INTEGER,
+  nam_ptr INTEGER,
+  nam TEXT,
+  siz INTEGER,
+  dty INTEGER,
+  typ INTEGER,
+  max INTEGER,
+  lsz INTEGER,
+  lof INTEGER,
+  off INTEGER,
+  idx INTEGER,
+  ipo INTEGER,
+  kqfcop_indx INTEGER,
+  func TEXT,
+  PRIMARY KEY (xstruct, cno)
+);
+CREATE INDEX kqftab_nam ON kqftab (nam COLLATE NOCASE);
+CREATE INDEX kqftab_obj ON kqftab (obj);
+CREATE INDEX kqftap_xstruct ON kqftap (xstruct);
+CREATE INDEX kqftap_cb1 ON kqftap (cb1);
+CREATE INDEX kqftap_cb2 ON kqftap (cb2);
+CREATE INDEX kqfcop_func ON kqfcop (func);
+CREATE INDEX columns_nam ON columns (nam COLLATE NOCASE);
+CREATE INDEX columns_func ON columns (func);
+CREATE VIEW xcolumns AS
+SELECT t.indx, t.nam AS table_name, c.*
+  FROM kqftab t
+  JOIN kqftap p ON p.indx = t.indx
+  JOIN columns c ON c.xstruct = p.xstruct;
+"""
+
+
+def _insert(conn, table, rows, fields):
+    """Insert dictionaries into a table. Missing keys are stored as NULL."""
+    sql = "INSERT INTO %s (%s) VALUES (%s)" % (
+        table,
+        ", ".join(fields),
+        ", ".join("?" * len(fields)),
+    )
+    conn.executemany(sql, ([row.get(f) for f in fields] for row in rows))
+
+
+def _populate(conn):
+    """Load all structures from the cache or the Oracle binary."""
+    conn.executescript(SCHEMA)
+
+    kqf.prefetch(*kqf.STRUCTURES)
+    kqftab_map = kqftab.get_kqftab()
+    _insert(
+        conn,
+        "kqftab",
+        (OrderedDict(indx=k, **v) for k, v in kqftab_map.items()),
+        [
+            "indx",
+            "obj",
+            "ver",
+            "nam_ptr",
+            "nam",
+            "xstruct_nam_ptr",
+            "xstruct",
+            "typ",
+            "flg",
+            "rsz",
+            "coc",
+        ],
+    )
+
+    kqftap_map = kqftap.get_kqftap()
+    _insert(
+        conn,
+        "kqftap",
+        (OrderedDict(indx=k, **v) for k, v in kqftap_map.items()),
+        ["indx", "xstruct_ptr", "cb1_ptr", "cb2_ptr", "xstruct", "cb1", "cb2"],
+    )
+
+    kqfcop_map = kqfcop.get_kqfcop()
+    _insert(
+        conn,
+        "kqfcop",
+        (OrderedDict(indx=k, **v) for k, v in kqfcop_map.items()),
+        ["indx", "func_ptr", "func"],
+    )
+
+    for xstruct in OrderedDict.fromkeys(v["xstruct"] for v in kqftap_map.values()):
+        x_col_map = xcolumns.get_xstruct(xstruct)
+        _insert(
+            conn,
+            "columns",
+            (OrderedDict(xstruct=xstruct, **v) for v in x_col_map.values()),
+            [
+                "xstruct",
+                "cno",
+                "nam_ptr",
+                "nam",
+                "siz",
+                "dty",
+                "typ",
+                "max",
+                "lsz",
+                "lof",
+                "off",
+                "idx",
+                "ipo",
+                "kqfcop_indx",
+                "func",
+            ],
+        )
+
+
+def _build(path):
+    """Create the catalog database in a temporary file and move it to path."""
+    LOGGER.debug("Building %s", path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        conn = sqlite3.connect(tmp_path)
+        try:
+            with conn:
+                _populate(conn)
+        finally:
+            conn.close()
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def connect():
+    """Return a read-only connection to the catalog of the current Oracle binary.
+
+    The catalog is built on first use, or when the force or refresh flag
+    is set.
+    """
+    path = cache.get_path(DB_NAME)
+    rebuild = settings.force or settings.refresh is not None
+    if rebuild or not os.path.isfile(path):
+        with cache.locked(path):
+            # Another process may have built the catalog while waiting
+            if rebuild or not os.path.isfile(path):
+                _build(path)
+    return sqlite3.connect(pathlib.Path(path).as_uri() + "?mode=ro", uri=True)
+
+
+def iter_query(sql, params=()):
+    """Execute a query against the catalog. Yield OrderedDict rows as fetched."""
+    conn = connect()
+    try:
+        cursor = conn.execute(sql, params)
+        names = [d[0] for d in cursor.description or ()]
+        for row in cursor:
+            yield OrderedDict(zip(names, row))
+    finally:
+        conn.close()
+
+
+def query(sql, params=()):
+    """Execute a query against the catalog. Return a list of OrderedDict rows."""
+    return list(iter_query(sql, params))
@@ -0,0 +1,147 @@
+"""Differences between X$ tables of two Oracle binaries."""
+
+import hashlib
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import xinfo.cache as cache
+import xinfo.config.settings as settings
+import xinfo.x.columns as xcolumns
+import xinfo.x.kqf as kqf
+import xinfo.x.kqfcop as kqfcop
+import xinfo.x.kqftab as kqftab
+import xinfo.x.kqftap as kqftap
+
+LOGGER = logging.getLogger(__name__)
+
+# Compared fields. Pointers and kqfcop indexes are left out, since they
+# change between binaries even when the tables are the same.
+TABLE_FIELDS = ("obj", "ver", "xstruct", "typ", "flg", "rsz", "coc")
+KQFTAP_FIELDS = ("cb1", "cb2")
+COLUMN_FIELDS = ("siz", "dty", "typ", "max", "lsz", "lof", "off", "idx", "ipo", "func")
+
+# Fields of the changes
+FIELDS = ("table", "column", "change", "field", "old", "new")
+
+
+def _get_columns(x_col_map):
+    """Return column name to compared fields. Duplicate names get a suffix."""
+    columns = OrderedDict()
+    for col in x_col_map.values():
+        key = col["nam"]
+        n = 1
+        while key in columns:
+            n += 1
+            key = "%s#%d" % (col["nam"], n)
+        columns[key] = OrderedDict((f, col.get(f)) for f in COLUMN_FIELDS)
+    return columns
+
+
+def get_tables(names=None):
+    """Return table name to (fields, columns) of the current Oracle binary.
+
+    Only the tables in names are loaded if specified.
+    """
+    kqf.prefetch(*kqf.STRUCTURES)
+    kqftab_map = kqftab.get_kqftab()
+    kqftap_map = kqftap.get_kqftap()
+    selected = [
+        (k, v) for k, v in kqftab_map.items() if names is None or v["nam"] in names
+    ]
+
+    # Load kqfcop once before the workers use it
+    kqfcop.get_kqfcop()
+
+    xstructs = list(
+        OrderedDict.fromkeys(
+            kqftap_map[k]["xstruct"] for k, _ in selected if k in kqftap_map
+        )
+    )
+    with ThreadPoolExecutor(max_workers=settings.jobs) as executor:
+        xdescs = dict(
+            zip(xstructs, executor.map(settings.bind(xcolumns.get_xstruct), xstructs))
+        )
+
+    tables = OrderedDict()
+    for k, v in selected:
+        fields = OrderedDict((f, v[f]) for f in TABLE_FIELDS)
+        columns = OrderedDict()
+        if k in kqftap_map:
+            fields.update((f, kqftap_map[k].get(f)) for f in KQFTAP_FIELDS)
+            columns = _get_columns(xdescs[kqftap_map[k]["xstruct"]])
+        tables[v["nam"]] = (fields, columns)
+    return tables
+
+
+def _get_table_hashes_from_binary():
+    return OrderedDict(
+        (nam, hashlib.sha1(repr(table).encode()).hexdigest())
+        for nam, table in get_tables().items()
+    )
+
+
+def get_table_hashes():
+    """Return table name to content hash of the current Oracle binary."""
+    return cache.lazy_load(
+        "table_hashes.data", settings.force, _get_table_hashes_from_binary
+    )
+
+
+def _change(table, column, change, field="", old="", new=""):
+    return OrderedDict(zip(FIELDS, (table, column, change, field, old, new)))
+
+
+def _diff_fields(table, column, old, new):
+    for f in old:
+        if old[f] != new[f]:
+            yield _change(table, column, "changed", f, old[f], new[f])
+
+
+def _diff_table(table, old, new):
+    old_fields, old_columns = old
+    new_fields, new_columns = new
+    yield from _diff_fields(table, "", old_fields, new_fields)
+    for column, fields in old_columns.items():
+        if column not in new_columns:
+            yield _change(table, column, "removed")
+        else:
+            yield from _diff_fields(table, column, fields, new_columns[column])
+    for column in new_columns:
+        if column not in old_columns:
+            yield _change(table, column, "added")
+
+
+def diff(old_binary, new_binary):
+    """Yield changes of X$ tables and columns between two Oracle binaries.
+
+    Per-table content hashes are compared first, so columns are loaded
+    only for the tables which differ.
+    """
+    with settings.local(ora_binary=old_binary):
+        old_hashes = get_table_hashes()
+    with settings.local(ora_binary=new_binary):
+        new_hashes = get_table_hashes()
+
+    changed = {
+        nam
+        for nam, h in old_hashes.items()
+        if nam in new_hashes and new_hashes[nam] != h
+    }
+    LOGGER.debug("Changed tables: %s", sorted(changed))
+
+    old_tables, new_tables = {}, {}
+    if changed:
+        with settings.local(ora_binary=old_binary):
+            old_tables = get_tables(changed)
+        with settings.local(ora_binary=new_binary):
+            new_tables = get_tables(changed)
+
+    for nam in old_hashes:
+        if nam not in new_hashes:
+            yield _change(nam, "", "removed")
+        elif nam in changed:
+            yield from _diff_table(nam, old_tables[nam], new_tables[nam])
+    for nam in new_hashes:
+        if nam not in old_hashes:
+            yield _change(nam, "", "added")
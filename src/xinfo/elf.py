@@ -0,0 +1,351 @@
+"""Minimal ELF64 reader used instead of spawning nm and objdump."""
+
+import bisect
+import logging
+import mmap
+import os
+import struct
+from array import array
+from functools import lru_cache
+
+import xinfo.profiler as profiler
+
+LOGGER = logging.getLogger(__name__)
+
+ELF_MAGIC = b"\x7fELF"
+ELFCLASS64 = 2
+ELFDATA2LSB = 1
+ELFDATA2MSB = 2
+
+PT_LOAD = 1
+
+SHT_SYMTAB = 2
+SHT_NOTE = 7
+SHT_NOBITS = 8
+SHT_DYNSYM = 11
+
+SHF_ALLOC = 0x2
+
+SHN_UNDEF = 0
+
+STB_LOCAL = 0
+
+STT_SECTION = 3
+STT_FILE = 4
+
+NT_GNU_BUILD_ID = 3
+
+# e_phoff, e_shoff, e_phentsize, e_phnum, e_shentsize, e_shnum, e_shstrndx
+EHDR_FORMAT = "32xQQ6xHHHHH"
+# p_type, p_flags, p_offset, p_vaddr, p_paddr, p_filesz, p_memsz, p_align
+PHDR_FORMAT = "IIQQQQQQ"
+# sh_name, sh_type, sh_flags, sh_addr, sh_offset, sh_size, sh_link, sh_info,
+# sh_addralign, sh_entsize
+SHDR_FORMAT = "IIQQQQIIQQ"
+# st_name, st_info, st_other, st_shndx, st_value, st_size
+SYM_FORMAT = "IBBHQQ"
+
+
+class Section(object):
+    """ELF section header."""
+
+    __slots__ = ("name", "type", "flags", "addr", "offset", "size", "link")
+
+    def __init__(self, name, type_, flags, addr, offset, size, link):
+        self.name = name
+        self.type = type_
+        self.flags = flags
+        self.addr = addr
+        self.offset = offset
+        self.size = size
+        self.link = link
+
+
+class ElfFile(object):
+    """A memory-mapped ELF64 file with its section headers and symbol table."""
+
+    def __init__(self, path):
+        self.path = path
+        self._symbols = None
+        self._addr_index = None
+        with open(path, "rb") as fp:
+            if os.fstat(fp.fileno()).st_size < 64:
+                raise ValueError("%s is not an ELF file" % self.path)
+            self._mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mm)
+        self._parse_ident()
+        self._parse_sections()
+        self._parse_segments()
+
+    def _parse_ident(self):
+        ident = self._mm[:16]
+        if ident[:4] != ELF_MAGIC:
+            raise ValueError("%s is not an ELF file" % self.path)
+        if ident[4] != ELFCLASS64:
+            raise ValueError("%s is not a 64-bit ELF file" % self.path)
+        if ident[5] not in (ELFDATA2LSB, ELFDATA2MSB):
+            raise ValueError("%s has an unknown data encoding" % self.path)
+        self.byteorder = "<" if ident[5] == ELFDATA2LSB else ">"
+        (
+            self._phoff,
+            self._shoff,
+            self._phentsize,
+            self._phnum,
+            self._shentsize,
+            self._shnum,
+            self._shstrndx,
+        ) = struct.unpack_from(self.byteorder + EHDR_FORMAT, self._mm)
+
+    def _slice(self, offset, size):
+        """Return a zero-copy view of the file contents."""
+        if offset + size > len(self._mm):
+            raise ValueError(
+                "%s is truncated: cannot read %d bytes at offset %d"
+                % (self.path, size, offset)
+            )
+        return self._view[offset : offset + size]
+
+    def _parse_headers(self, fmt, offset, entsize, num, kind):
+        header = struct.Struct(self.byteorder + fmt)
+        if num and entsize != header.size:
+            raise ValueError(
+                "%s has unexpected %s header size = %d" % (self.path, kind, entsize)
+            )
+        data = self._slice(offset, entsize * num)
+        return list(header.iter_unpack(data))
+
+    def _parse_sections(self):
+        if not self._shnum:
+            raise ValueError("%s has no section headers" % self.path)
+        headers = self._parse_headers(
+            SHDR_FORMAT, self._shoff, self._shentsize, self._shnum, "section"
+        )
+
+        self.sections = [
+            Section(name, type_, flags, addr, offset, size, link)
+            for name, type_, flags, addr, offset, size, link, *_ in headers
+        ]
+
+        shstrtab = self.sections[self._shstrndx]
+        # Make sure the section names are within the file
+        self._slice(shstrtab.offset, shstrtab.size)
+        for section in self.sections:
+            section.name = self._cstr(shstrtab.offset + section.name)
+
+    def _parse_segments(self):
+        """Build a sorted list of (vaddr, filesz, offset) file-backed ranges."""
+        headers = self._parse_headers(
+            PHDR_FORMAT, self._phoff, self._phentsize, self._phnum, "program"
+        )
+        ranges = [
+            (vaddr, filesz, offset)
+            for type_, _, offset, vaddr, _, filesz, *_ in headers
+            if type_ == PT_LOAD and filesz
+        ]
+        if not ranges:
+            # Relocatable objects have no program headers, use sections
+            ranges = [
+                (s.addr, s.size, s.offset)
+                for s in self.sections
+                if s.flags & SHF_ALLOC and s.type != SHT_NOBITS and s.size
+            ]
+        ranges.sort()
+        self._ranges = ranges
+        self._range_starts = [r[0] for r in ranges]
+
+    def _addr_to_offset(self, addr, size):
+        """Map a virtual address range to a file offset."""
+        i = bisect.bisect_right(self._range_starts, addr) - 1
+        if i >= 0:
+            vaddr, filesz, offset = self._ranges[i]
+            if addr + size <= vaddr + filesz:
+                return offset + addr - vaddr
+        raise ValueError(
+            "Address range 0x%x-0x%x is not mapped to %s"
+            % (addr, addr + size, self.path)
+        )
+
+    def read(self, addr, size):
+        """Return a zero-copy view of size bytes at the virtual address."""
+        offset = self._addr_to_offset(addr, size)
+        profiler.add_bytes_read(size)
+        return self._slice(offset, size)
+
+    def read_str(self, addr, max_string_len):
+        """Return a NULL terminated string at the virtual address."""
+        offset = self._addr_to_offset(addr, max_string_len)
+        end = self._mm.find(b"\x00", offset, offset + max_string_len)
+        if end < 0:
+            raise ValueError(
+                (
+                    "The NULL character is not found in the dump. "
+                    "Try to use a larger max_string_length value. "
+                    "The current string in the dump is %r"
+                )
+                % (
+                    self._mm[offset : offset + max_string_len].decode(
+                        "utf-8", "replace"
+                    )
+                )
+            )
+        profiler.add_bytes_read(end - offset + 1)
+        return self._mm[offset:end].decode("utf-8")
+
+    def _cstr(self, offset):
+        """Decode a NULL terminated string starting at the file offset."""
+        end = self._mm.find(b"\x00", offset)
+        if end < 0:
+            raise ValueError(
+                "%s is truncated: no string terminator after offset %d"
+                % (self.path, offset)
+            )
+        return self._mm[offset:end].decode("utf-8", errors="replace")
+
+    @property
+    def build_id(self):
+        """The GNU build ID as a hex string, or None if there is no such note."""
+        for section in self.sections:
+            if section.type != SHT_NOTE:
+                continue
+            notes = self._slice(section.offset, section.size)
+            offset = 0
+            while offset + 12 <= len(notes):
+                namesz, descsz, type_ = struct.unpack_from(
+                    self.byteorder + "III", notes, offset
+                )
+                name_offset = offset + 12
+                desc_offset = name_offset + _align4(namesz)
+                name = notes[name_offset : name_offset + namesz]
+                if type_ == NT_GNU_BUILD_ID and name == b"GNU\x00":
+                    return notes[desc_offset : desc_offset + descsz].hex()
+                offset = desc_offset + _align4(descsz)
+        return None
+
+    def _load_symbols(self):
+        """Parse .symtab (or .dynsym for stripped binaries).
+
+        Build a name to (address, size) dictionary, and an address index:
+        sorted addresses with parallel sizes and names.
+        """
+        symtab = next(
+            (s for s in self.sections if s.type == SHT_SYMTAB),
+            next((s for s in self.sections if s.type == SHT_DYNSYM), None),
+        )
+        if symtab is None:
+            raise ValueError("%s has no symbol table" % self.path)
+        LOGGER.debug("Loading symbols from %s:%s", self.path, symtab.name)
+
+        data = self._slice(symtab.offset, symtab.size)
+        strtab_offset = self.sections[symtab.link].offset
+
+        symbols = {}
+        globals_ = set()
+        entries = []
+        for st_name, st_info, _, st_shndx, st_value, st_size in struct.iter_unpack(
+            self.byteorder + SYM_FORMAT, data
+        ):
+            st_type = st_info & 0xF
+            if (
+                not st_name
+                or st_shndx == SHN_UNDEF
+                or st_type in (STT_SECTION, STT_FILE)
+            ):
+                continue
+            name = self._cstr(strtab_offset + st_name)
+            is_global = st_info >> 4 != STB_LOCAL
+            entries.append((st_value, st_size, name, is_global))
+            # The first definition wins, but a global symbol overrides
+            # any local (static) symbols with the same name.
+            if name not in symbols or (is_global and name not in globals_):
+                symbols[name] = (st_value, st_size)
+                if is_global:
+                    globals_.add(name)
+
+        LOGGER.debug("Loaded %d symbols", len(symbols))
+        self._symbols = symbols
+        self._addr_index = build_addr_index(entries)
+
+    @property
+    def symbols(self):
+        """Symbol name to (address, size) dictionary."""
+        if self._symbols is None:
+            self._load_symbols()
+        return self._symbols
+
+    @property
+    def addr_index(self):
+        """Sorted symbol addresses with parallel sizes and names."""
+        if self._symbols is None:
+            self._load_symbols()
+        return self._addr_index
+
+    def get_symbol(self, addr):
+        """Return the symbol name starting exactly at the address, or None."""
+        addrs, _, names = self.addr_index
+        i = bisect.bisect_left(addrs, addr)
+        if i < len(addrs) and addrs[i] == addr:
+            return names[i]
+        return None
+
+    def resolve(self, addr):
+        """Return (symbol, offset) for the symbol containing the address, or None."""
+        return resolve(self.addr_index, addr)
+
+
+def build_addr_index(entries):
+    """Return sorted addresses with parallel sizes and names of (address,
+    size, name, is_global) symbol entries in symbol table order.
+
+    Aliases share an address: the first global symbol name is kept.
+    """
+    ordered = sorted(
+        (addr, not is_global, i, size, name)
+        for i, (addr, size, name, is_global) in enumerate(entries)
+    )
+    addrs, sizes, names = array("Q"), array("Q"), []
+    for addr, _, _, size, name in ordered:
+        if not addrs or addrs[-1] != addr:
+            addrs.append(addr)
+            sizes.append(size)
+            names.append(name)
+    return addrs, sizes, names
+
+
+def resolve(addr_index, addr):
+    """Return (symbol, offset) for the symbol of an address index containing
+    the address, or None."""
+    addrs, sizes, names = addr_index
+    i = bisect.bisect_right(addrs, addr) - 1
+    if i >= 0 and addr - addrs[i] < max(sizes[i], 1):
+        return names[i], addr - addrs[i]
+    return None
+
+
+def get_symbols(addr_index, addr_list):
+    """Return address to symbol of an address index for the given addresses.
+
+    An address inside a symbol is resolved as symbol+offset. Addresses
+    outside all symbols are left out.
+    """
+    symbols = dict()
+    for addr in set(addr_list):
+        resolved = resolve(addr_index, addr)
+        if resolved is not None:
+            name, offset = resolved
+            symbols[addr] = "%s+0x%x" % resolved if offset else name
+    return symbols
+
+
+def _align4(size):
+    return (size + 3) & ~3
+
+
+@lru_cache(maxsize=8)
+def _get_elf(path, dev, ino, size, mtime_ns):
+    return ElfFile(path)
+
+
+def get_elf(path):
+    """Return a parsed ELF file. The result is reused until the file changes."""
+    st = os.stat(path)
+    return _get_elf(path, st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
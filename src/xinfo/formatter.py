@@ -1,10 +1,14 @@
 """Output formatter."""
 
+import csv
+import io
 import json
+import sys
 from collections import OrderedDict
+from collections.abc import Mapping
 from functools import singledispatch
 
-from prettytable import PrettyTable
+import xinfo.profiler as profiler
 
 
 @singledispatch
@@ -25,6 +29,20 @@ def _(value, key):
     return {k: fmt(v, k) for k, v in value.items()}
 
 
+def _items(response):
+    """Iterate over (key, row) pairs of a dictionary or an iterable of pairs."""
+    if isinstance(response, Mapping):
+        return iter(response.items())
+    return iter(response)
+
+
+def _json_default(obj):
+    """Serialize mappings which are not dictionaries, such as cache files."""
+    if isinstance(obj, Mapping):
+        return OrderedDict(obj.items())
+    raise TypeError("Object of type %s is not JSON serializable" % type(obj).__name__)
+
+
 class Formatter(object):
     """Base formatter class."""
 
@@ -34,12 +52,93 @@ class Formatter(object):
     def __call__(self, command_name, response):
         return self._format_response(command_name, response)
 
+    def write(self, command_name, response, file=None, fields=None):
+        """Write the response formatted to a file (stdout by default).
+
+        The response is a dictionary or an iterable of (key, row) pairs.
+        Formatters which need all rows collect them before writing. fields
+        are all the fields rows can have, for formats with a header.
+        """
+        with profiler.phase("formatter", formatter=type(self).__name__):
+            self._write(command_name, response, file, fields)
+
+    def _write(self, command_name, response, file, fields):
+        if not isinstance(response, dict):
+            response = OrderedDict(response)
+        print(self(command_name, response), file=file or sys.stdout)
+
 
 class JSONFormatter(Formatter):
     """JSON formatter."""
 
     def _format_response(self, command_name, response):
-        return json.dumps(response, indent=2)
+        return json.dumps(response, indent=2, default=_json_default)
+
+    def _write(self, command_name, response, file, fields):
+        """Write entries as soon as they are produced.
+
+        The output is the same as the one of json.dumps(response, indent=2).
+        """
+        file = file or sys.stdout
+        sep = "{"
+        for k, v in _items(response):
+            # Strip the braces of a single entry object, keeping its indentation
+            file.write(sep + json.dumps({k: v}, indent=2, default=_json_default)[1:-2])
+            file.flush()
+            sep = ","
+        file.write("{}\n" if sep == "{" else "\n}\n")
+
+
+class NDJSONFormatter(Formatter):
+    """Newline delimited JSON formatter: one row per line."""
+
+    def _format_response(self, command_name, response):
+        return "\n".join(
+            json.dumps(v, default=_json_default) for v in response.values()
+        )
+
+    def _write(self, command_name, response, file, fields):
+        """Write rows as soon as they are produced."""
+        file = file or sys.stdout
+        for _, v in _items(response):
+            file.write(json.dumps(v, default=_json_default) + "\n")
+            file.flush()
+
+
+class CSVFormatter(Formatter):
+    """CSV formatter.
+
+    The header is made of the fields of the command, or of the fields of the
+    first row if the command has none. A row with another field is an error,
+    since it cannot be written under the header.
+    """
+
+    def _format_response(self, command_name, response):
+        output = io.StringIO()
+        self._write_rows(response.items(), output, None)
+        return output.getvalue().rstrip("\n")
+
+    def _write(self, command_name, response, file, fields):
+        """Write rows as soon as they are produced."""
+        self._write_rows(_items(response), file or sys.stdout, fields)
+
+    def _write_rows(self, items, file, fields):
+        writer = None
+        for _, v in items:
+            if writer is None:
+                writer = csv.DictWriter(
+                    file,
+                    fieldnames=list(fields or v.keys()),
+                    restval="",
+                    extrasaction="raise",
+                    lineterminator="\n",
+                )
+                writer.writeheader()
+            row = fmt(v, "")
+            writer.writerow(
+                {k: json.dumps(x) if isinstance(x, dict) else x for k, x in row.items()}
+            )
+            file.flush()
 
 
 class TableFormatter(Formatter):
@@ -52,6 +151,9 @@ class TableFormatter(Formatter):
             raise ValueError("Invalid object type: %s" % type(response))
 
     def _build_table_from_dict(self, command_name, response):
+        # Imported on first use, since it is slow to import
+        from prettytable import PrettyTable
+
         t = PrettyTable()
         t.field_names = OrderedDict.fromkeys(
             (k for v in response.values() for k in v.keys())
@@ -89,4 +191,8 @@ def get_formatter(format_type, *args):
         return JSONFormatter(args)
     elif format_type == "html":
         return HTMLFormatter(args)
+    elif format_type == "ndjson":
+        return NDJSONFormatter(args)
+    elif format_type == "csv":
+        return CSVFormatter(args)
     raise ValueError("Unknown output type: %s" % format_type)
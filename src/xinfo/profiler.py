@@ -0,0 +1,206 @@
+"""Phase profiling and Chrome trace export.
+
+Phases are named sections of code. When profiling is enabled, the wall
+time, started processes, bytes read and peak traced memory of each phase
+are collected, along with one trace event per phase execution. Phases
+are inclusive: the time of a phase includes the time of nested phases.
+"""
+
+import functools
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Audit events of new processes
+PROCESS_EVENTS = ("subprocess.Popen", "os.system")
+
+_enabled = False
+_memory = False
+_hook_installed = False
+_lock = threading.Lock()
+_local = threading.local()
+_start = 0.0
+# Phase name to [calls, wall time, subprocesses, bytes read, peak memory]
+_stats = OrderedDict()
+_events = []
+
+
+def _thread_state():
+    state = getattr(_local, "state", None)
+    if state is None:
+        state = _local.state = dict(subprocesses=0, bytes_read=0, stack=[])
+    return state
+
+
+def _audit(event, args):  # pragma: no cover (audit hooks are not traced)
+    if _enabled and event in PROCESS_EVENTS:
+        _thread_state()["subprocesses"] += 1
+
+
+def enable(memory=False):
+    """Start collecting phase statistics. Trace memory if memory is set."""
+    global _enabled, _memory, _hook_installed, _start
+    import tracemalloc
+
+    if not _hook_installed:
+        # Audit hooks cannot be removed, so one hook is reused
+        sys.addaudithook(_audit)
+        _hook_installed = True
+    _stats.clear()
+    del _events[:]
+    _memory = memory and not tracemalloc.is_tracing()
+    if _memory:
+        tracemalloc.start()
+    _start = time.perf_counter()
+    _enabled = True
+
+
+def disable():
+    """Stop collecting phase statistics."""
+    global _enabled
+    _enabled = False
+    if _memory:
+        import tracemalloc
+
+        tracemalloc.stop()
+
+
+def is_enabled():
+    return _enabled
+
+
+def add_bytes_read(size):
+    """Account bytes read from files or command output to the current phases."""
+    if _enabled:
+        _thread_state()["bytes_read"] += size
+
+
+def _get_peak(frame):
+    """Return the traced memory peak of a phase, and reset it for nested phases.
+
+    Peaks cannot be reset before Python 3.9, so they include earlier phases.
+    """
+    if not _memory:
+        return 0
+    import tracemalloc
+
+    peak = max(tracemalloc.get_traced_memory()[1], frame["child_peak"])
+    if hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+    return peak
+
+
+@contextmanager
+def phase(name, **args):
+    """Measure a phase. The keyword arguments are added to its trace event."""
+    if not _enabled:
+        yield
+        return
+
+    state = _thread_state()
+    frame = dict(child_peak=0)
+    frame["peak_before"] = _get_peak(frame)
+    state["stack"].append(frame)
+    subprocesses, bytes_read = state["subprocesses"], state["bytes_read"]
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - start
+        peak = _get_peak(frame)
+        state["stack"].pop()
+        if state["stack"]:
+            parent = state["stack"][-1]
+            parent["child_peak"] = max(parent["child_peak"], frame["peak_before"], peak)
+        subprocesses = state["subprocesses"] - subprocesses
+        bytes_read = state["bytes_read"] - bytes_read
+        with _lock:
+            stats = _stats.setdefault(name, [0, 0.0, 0, 0, 0])
+            stats[0] += 1
+            stats[1] += wall
+            stats[2] += subprocesses
+            stats[3] += bytes_read
+            stats[4] = max(stats[4], peak)
+            _events.append(
+                dict(
+                    name=name,
+                    cat="xinfo",
+                    ph="X",
+                    ts=(start - _start) * 1e6,
+                    dur=wall * 1e6,
+                    pid=os.getpid(),
+                    tid=threading.get_ident(),
+                    args=dict(args, subprocesses=subprocesses, bytes_read=bytes_read),
+                )
+            )
+
+
+def profiled(name):
+    """Decorator measuring each call of a function as a phase."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def get_stats():
+    """Return phase name to a dictionary of its statistics."""
+    with _lock:
+        return OrderedDict(
+            (
+                name,
+                OrderedDict(
+                    calls=calls,
+                    wall=wall,
+                    subprocesses=subprocesses,
+                    bytes_read=bytes_read,
+                    peak_memory=peak,
+                ),
+            )
+            for name, (calls, wall, subprocesses, bytes_read, peak) in _stats.items()
+        )
+
+
+def print_summary(file=None):
+    """Print phase statistics."""
+    file = file or sys.stderr
+    header = ("phase", "calls", "wall, s", "subprocesses", "bytes read", "peak, MiB")
+    rows = [
+        (
+            name,
+            "%d" % v["calls"],
+            "%.3f" % v["wall"],
+            "%d" % v["subprocesses"],
+            "%d" % v["bytes_read"],
+            "%.1f" % (v["peak_memory"] / 1048576) if _memory else "-",
+        )
+        for name, v in get_stats().items()
+    ]
+    widths = [max(len(r[i]) for r in [header] + rows) for i in range(len(header))]
+    for row in [header] + rows:
+        print(
+            "  ".join(
+                c.ljust(w) if i == 0 else c.rjust(w)
+                for i, (c, w) in enumerate(zip(row, widths))
+            ),
+            file=file,
+        )
+
+
+def write_trace(path):
+    """Write phase executions as Chrome trace events."""
+    import json
+
+    with _lock:
+        trace = dict(traceEvents=list(_events), displayTimeUnit="ms")
+    with open(path, "w") as fp:
+        json.dump(trace, fp)
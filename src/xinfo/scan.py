@@ -0,0 +1,226 @@
+"""Extraction of the catalogs of the Oracle binaries under several directories.
+
+Binaries are found as bin/oracle files. Identical binaries, such as
+hardlinks, cloned homes or homes with the same release update, are
+extracted once, by a pool of processes. Binaries with an ELF build ID are
+identical if their build IDs are, and other binaries if their contents are.
+
+Cache files are namespaced by fingerprint, so later commands on the homes
+of binaries with a build ID read the extracted catalog. Copies without a
+build ID have fingerprints of their own, made of their inode and
+modification time, and later commands on them extract their catalog again.
+"""
+
+import hashlib
+import logging
+import os
+import subprocess
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import xinfo.cache as cache
+import xinfo.config.settings as settings
+import xinfo.profiler as profiler
+import xinfo.x.kqf as kqf
+from xinfo.catalog import Catalog
+
+LOGGER = logging.getLogger(__name__)
+
+# Block size to hash the contents of binaries without a build ID
+CONTENT_BLOCK_SIZE = 1024 * 1024
+
+# Fields of the summary rows
+FIELDS = (
+    "binary",
+    "fingerprint",
+    "version",
+    "status",
+    "source",
+    "tables",
+    "columns",
+    "seconds",
+    "error",
+)
+
+
+def find_binaries(roots):
+    """Yield the paths of bin/oracle files under the roots, once each.
+
+    A root can also be an Oracle binary. The homes found are not searched
+    for other homes.
+    """
+    seen = set()
+    for root in roots:
+        if os.path.isfile(root):
+            paths = [root]
+        else:
+            paths = _walk(root)
+        for path in paths:
+            path = os.path.abspath(path)
+            if path not in seen:
+                seen.add(path)
+                yield path
+
+
+def _walk(root):
+    for dirpath, dirnames, _ in os.walk(root):
+        dirnames.sort()
+        binary = os.path.join(dirpath, "bin", "oracle")
+        if "bin" in dirnames and os.path.isfile(binary):
+            yield binary
+            dirnames[:] = []
+
+
+def _get_version(binary, default):
+    """Major version from the oraversion program next to the binary, or the
+    default version."""
+    oraversion = os.path.join(os.path.dirname(binary), "oraversion")
+    if not os.path.exists(oraversion):
+        if default is None:
+            raise ValueError(
+                "%s does not exist. Specify the version with --ora-version" % oraversion
+            )
+        return default
+    cmd = [oraversion, "-majorVersion"]
+    LOGGER.debug(cmd)
+    result = subprocess.run(
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True
+    )
+    output = result.stdout.strip()
+    LOGGER.debug("exitcode=%r output=%r", result.returncode, output)
+    if result.returncode != 0:
+        raise RuntimeError(
+            "Unexpected exitcode = %r output = %r command = %r"
+            % (result.returncode, output, cmd)
+        )
+    try:
+        return int(output)
+    except ValueError:
+        raise RuntimeError("Cannot convert Oracle version to number: %r" % output)
+
+
+def _init_worker(backend, force, refresh, cache_dir):
+    """Set the settings of a pool process, which may not inherit them."""
+    cache.CACHE_DIR = cache_dir
+    settings.backend = backend
+    settings.force = force
+    settings.forced = set() if force else None
+    settings.refresh = set() if refresh else None
+    # Processes extract one binary each
+    settings.jobs = 1
+
+
+def _extract(binary, version):
+    """Load the tables and the columns of all tables of a binary. Return the
+    numbers of tables and columns, and the elapsed time."""
+    start = time.perf_counter()
+    catalog = Catalog(binary, version)
+    catalog.prefetch(*kqf.STRUCTURES)
+    tables = catalog.tables
+    xstructs = [(v["nam"], v["columns"]) for v in tables.values() if "columns" in v]
+    columns = sum(len(c) for _, c in catalog.iter_columns(xstructs))
+    return len(tables), columns, time.perf_counter() - start
+
+
+def _row(binary, fingerprint="", version="", status="", source="", error=""):
+    row = OrderedDict.fromkeys(FIELDS, "")
+    row.update(
+        binary=binary,
+        fingerprint=fingerprint,
+        version=version,
+        status=status,
+        source=source,
+        error=error,
+    )
+    return row
+
+
+def _get_content_id(binary):
+    """Return the ELF build ID of a binary, or a hash of its contents.
+
+    Unlike the fingerprint of binaries without a build ID, the hash does not
+    depend on the inode and the modification time, so copies have the same
+    one.
+    """
+    build_id = cache.get_build_id(binary)
+    if build_id:
+        return build_id
+    h = hashlib.sha1()
+    with open(binary, "rb") as fp:
+        for block in iter(lambda: fp.read(CONTENT_BLOCK_SIZE), b""):
+            h.update(block)
+    return "sha1:" + h.hexdigest()
+
+
+def _group(binaries, default_version):
+    """Return summary rows of the binaries, and content ID to the row of the
+    first binary with that content."""
+    rows, unique = [], OrderedDict()
+    for binary in binaries:
+        try:
+            fingerprint = cache.get_fingerprint(binary)
+            content_id = _get_content_id(binary)
+            version = _get_version(binary, default_version)
+        except (OSError, ValueError, RuntimeError) as e:
+            rows.append(_row(binary, status="failed", error=str(e)))
+            continue
+        if content_id in unique:
+            first = unique[content_id]
+            row = _row(
+                binary, fingerprint, first["version"], "duplicate", first["binary"]
+            )
+        else:
+            row = _row(binary, fingerprint, version, "extracted")
+            unique[content_id] = row
+        rows.append(row)
+    return rows, unique
+
+
+def scan(roots, default_version=None):
+    """Return one summary row per Oracle binary found under the roots.
+
+    Each unique binary is extracted by one of settings.jobs processes.
+    Duplicates refer to the binary extracted for them in source, and
+    binaries which cannot be read are reported as failed.
+    """
+    with profiler.phase("scan.find"):
+        binaries = list(find_binaries(roots))
+        rows, unique = _group(binaries, default_version)
+    LOGGER.debug("%d binaries, %d unique", len(binaries), len(unique))
+
+    jobs = [(row["binary"], row["version"]) for row in unique.values()]
+    with profiler.phase("scan.extract", binaries=len(jobs)):
+        if settings.jobs > 1 and len(jobs) > 1:
+            initargs = (
+                settings.backend,
+                settings.force,
+                settings.refresh is not None,
+                cache.CACHE_DIR,
+            )
+            with ProcessPoolExecutor(
+                max_workers=min(settings.jobs, len(jobs)),
+                initializer=_init_worker,
+                initargs=initargs,
+            ) as executor:
+                futures = [executor.submit(_extract, *args) for args in jobs]
+                results = [_result(future.result) for future in futures]
+        else:
+            results = [_result(_extract, *args) for args in jobs]
+
+    for row, (result, error) in zip(unique.values(), results):
+        if error:
+            row.update(status="failed", error=error)
+        else:
+            row["tables"], row["columns"], seconds = result
+            row["seconds"] = round(seconds, 3)
+    return rows
+
+
+def _result(func, *args):
+    """Return (result, "") of a call, or (None, error message) if it fails."""
+    try:
+        return func(*args), ""
+    except Exception as e:
+        LOGGER.debug("Extraction failed", exc_info=True)
+        return None, "%s: %s" % (type(e).__name__, e)
@@ -0,0 +1,158 @@
+"""Long-running xinfo server answering commands over a Unix domain socket."""
+
+import io
+import json
+import logging
+import os
+import socket
+import socketserver
+import sys
+import traceback
+from contextlib import contextmanager, redirect_stderr, redirect_stdout
+
+import xinfo.cache as cache
+import xinfo.config.settings as settings
+from xinfo.client import (
+    FORWARDED_ENV,
+    SOCKET_ENV,
+    get_socket_dir,
+    get_socket_path,
+    recv_all,
+)
+
+LOGGER = logging.getLogger(__name__)
+
+
+@contextmanager
+def _request_context(message):
+    """Run a request with its environment, directory and default settings."""
+    saved_settings = {k: v for k, v in vars(settings).items() if not k.startswith("_")}
+    saved_levels = {
+        name: logger.level
+        for name, logger in logging.root.manager.loggerDict.items()
+        if isinstance(logger, logging.Logger)
+    }
+    saved_env = {k: os.environ.get(k) for k in FORWARDED_ENV}
+    saved_cwd = os.getcwd()
+    try:
+        for k in FORWARDED_ENV:
+            os.environ.pop(k, None)
+        os.environ.update(message["env"])
+        os.chdir(message["cwd"])
+        yield
+    finally:
+        os.chdir(saved_cwd)
+        for k, v in saved_env.items():
+            os.environ.pop(k, None)
+            if v is not None:
+                os.environ[k] = v
+        for name, level in saved_levels.items():
+            logging.getLogger(name).setLevel(level)
+        vars(settings).update(saved_settings)
+
+
+@contextmanager
+def _request_logging():
+    """Write the log records of a request to its output, with the logging
+    configuration of the client. The server configuration is restored
+    afterwards, including the levels set by -v and -q."""
+    import xinfo.cli as cli
+
+    loggers = [logging.getLogger()] + [
+        logger
+        for logger in logging.root.manager.loggerDict.values()
+        if isinstance(logger, logging.Logger)
+    ]
+    saved = [
+        (logger, list(logger.handlers), logger.level, logger.disabled)
+        for logger in loggers
+    ]
+    try:
+        for logger in loggers:
+            logger.handlers = []
+        cli.configure_logging()
+        yield
+    finally:
+        for logger, handlers, level, disabled in saved:
+            logger.handlers = handlers
+            logger.setLevel(level)
+            logger.disabled = disabled
+        # Loggers created by the request inherit the server configuration
+        for logger in logging.root.manager.loggerDict.values():
+            if isinstance(logger, logging.Logger) and logger not in loggers:
+                logger.handlers = []
+                logger.setLevel(logging.NOTSET)
+
+
+def _run(message):
+    """Run a command in-process. Return the response message."""
+    import xinfo.cli as cli
+
+    stdout, stderr = io.StringIO(), io.StringIO()
+    with _request_context(message), redirect_stdout(stdout), redirect_stderr(
+        stderr
+    ), _request_logging():
+        try:
+            exit_code = cli.run(message["argv"])
+        except SystemExit as e:
+            exit_code = e.code if isinstance(e.code, int) else int(e.code is not None)
+        except Exception:
+            sys.stderr.write(traceback.format_exc())
+            exit_code = 255
+    return dict(exit_code=exit_code, stdout=stdout.getvalue(), stderr=stderr.getvalue())
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        data = recv_all(self.request)
+        if not data:
+            # A connection checking whether the server is running
+            return
+        message = json.loads(data)
+        LOGGER.debug(message)
+        response = _run(message)
+        self.request.sendall(json.dumps(response).encode())
+
+
+class Server(socketserver.UnixStreamServer):
+    """Server running one command at a time, since settings are global."""
+
+    def __init__(self, path):
+        # Only the current user can connect
+        umask = os.umask(0o177)
+        try:
+            super().__init__(path, _Handler)
+        finally:
+            os.umask(umask)
+
+    def server_close(self):
+        super().server_close()
+        os.remove(self.server_address)
+
+
+def serve(path=None):
+    """Serve requests until interrupted.
+
+    The default socket is created in a directory only the current user can
+    use.
+    """
+    if path is None:
+        path = get_socket_path()
+        if not os.environ.get(SOCKET_ENV):
+            cache.make_private_dir(get_socket_dir())
+    if os.path.exists(path):
+        # Remove the socket of a server that is not running anymore
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(path)
+        except ConnectionError:
+            os.remove(path)
+        else:
+            raise RuntimeError("The server is already running: %s" % path)
+
+    with Server(path) as server:
+        LOGGER.info("Listening on %s", path)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            LOGGER.info("Stopped")
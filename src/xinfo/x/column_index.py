@@ -0,0 +1,102 @@
+"""Inverted index of the columns of all X$ tables."""
+
+import fnmatch
+import logging
+from collections import OrderedDict
+
+import xinfo.cache as cache
+import xinfo.config.settings as settings
+import xinfo.x.columns as xcolumns
+import xinfo.x.tables as xtables
+from xinfo.cachefile import NOCASE
+
+LOGGER = logging.getLogger(__name__)
+
+FNAME = "column_index.data"
+INDEXES = (("nam", NOCASE), "func")
+FIELDS = ("table", "xstruct", "cno", "nam", "dty", "siz", "func")
+
+
+def _row(table, xstruct, col):
+    row = OrderedDict(
+        table=table,
+        xstruct=xstruct,
+        cno=col["cno"],
+        nam=col["nam"],
+        dty=col["dty"],
+        siz=col["siz"],
+    )
+    if "func" in col:
+        row["func"] = col["func"]
+    return row
+
+
+def _build():
+    """Yield one row per column of each table, and cache the index once all
+    columns are read.
+
+    Columns of each table are cached as they are extracted, so a search
+    interrupted on a cold cache resumes from the tables already read.
+    """
+    tables = (
+        (v["nam"], v["columns"])
+        for v in xtables.get_tables().values()
+        if "columns" in v
+    )
+    xstructs = dict(tables)
+    rows = OrderedDict()
+    for table, x_col_map in xcolumns.iter_xstructs(xstructs.items()):
+        for col in x_col_map.values():
+            row = _row(table, xstructs[table], col)
+            rows[len(rows) + 1] = row
+            yield row
+    LOGGER.debug("Caching %d columns", len(rows))
+    cache.save(FNAME, rows, INDEXES)
+
+
+def _candidates(index, expr, func):
+    """Return rows which may match, using the index of the longest literal
+    prefix of the name and function expressions."""
+    prefix = xtables.literal_prefix(expr)
+    func_prefix = xtables.literal_prefix(func or "")
+    if prefix or func_prefix:
+        if len(prefix) >= len(func_prefix):
+            keys = index.lookup_prefix("nam", prefix)
+        else:
+            keys = index.lookup_prefix("func", func_prefix)
+    else:
+        # Decode the names only
+        expr = expr.upper()
+        keys = index.scan("nam", lambda v: fnmatch.fnmatchcase(v.upper(), expr))
+    return (index[k] for k in keys)
+
+
+def search(expr, dty=None, siz=None, func=None):
+    """Yield columns of all X$ tables with names matching an expression in any
+    case. % is a wildcard like *.
+
+    Columns can be filtered by data type, size, and an expression of the
+    kqfcop function. The index is built on the first search, and again
+    when the cache is refreshed.
+    """
+    expr = expr.replace("%", "*")
+    rebuild = settings.force or settings.refresh is not None
+    index = None if rebuild else cache.get_cached(FNAME)
+    if index is None:
+        rows = _build()
+    else:
+        rows = _candidates(index, expr, func)
+
+    expr = expr.upper()
+    for row in rows:
+        if not fnmatch.fnmatchcase(row["nam"].upper(), expr):
+            continue
+        if dty is not None and row["dty"] != dty:
+            continue
+        if siz is not None and row["siz"] != siz:
+            continue
+        if func is not None and not (
+            "func" in row and fnmatch.fnmatchcase(row["func"], func)
+        ):
+            continue
+        yield row
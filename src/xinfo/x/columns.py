@@ -3,17 +3,46 @@
 import logging
 import struct
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 import xinfo.binutils as binutils
+import xinfo.cache as cache
+import xinfo.config.settings as settings
+import xinfo.profiler as profiler
 import xinfo.x.kqfcop as kqfcop
 
 LOGGER = logging.getLogger(__name__)
 
+# Fields of columns. func is only set for columns with a kqfcop function.
+FIELDS = (
+    "cno",
+    "nam_ptr",
+    "nam",
+    "siz",
+    "dty",
+    "typ",
+    "max",
+    "lsz",
+    "lof",
+    "off",
+    "idx",
+    "ipo",
+    "kqfcop_indx",
+    "func",
+)
+
 
 def _parse_xdesc(xdesc):
     """Return a parsed X$ structure for the given binary struct."""
     x_col_map = OrderedDict()
 
+    strs = binutils.get_strs_from_addrs(
+        [
+            (nam_ptr, nam_len + 1)
+            for nam_len, nam_ptr, *_ in struct.iter_unpack("ql12B2qH2Bl", xdesc)
+        ]
+    )
+
     for i, (
         nam_len,
         nam_ptr,
@@ -36,7 +65,7 @@ def _parse_xdesc(xdesc):
         _,
         kqfcop_indx,
     ) in enumerate(struct.iter_unpack("ql12B2qH2Bl", xdesc), 1):
-        nam = binutils.get_str_from_addr(nam_ptr, nam_len + 1)
+        nam = strs[nam_ptr]
         x_col_map[i] = OrderedDict(
             {
                 "cno": i,
@@ -76,10 +105,7 @@ def _parse_xdesc(xdesc):
     return x_col_map
 
 
-def get_xstruct(xstruct):
-    """Get a parsed X$ structure from the Oracle binary."""
-    LOGGER.debug("Loading xstruct=%s", xstruct)
-
+def _read_xdesc(xstruct):
     addr, len_ = binutils.get_addr_len(xstruct)
     LOGGER.debug("addr=0x%x len=%s", addr, len_)
 
@@ -89,8 +115,73 @@ def get_xstruct(xstruct):
     if len_ % 64 != 0:
         raise ValueError("Unexpected length = %d. Should be multiple of 64." % len_)
 
-    xdesc = binutils.objdump(addr, len_ - 64)
+    return binutils.objdump(addr, len_ - 64)
 
+
+@profiler.profiled("columns.parse")
+def _get_xstruct_from_binary(xdesc, xstruct):
     x_col_map = _parse_xdesc(xdesc)
 
     return x_col_map
+
+
+def get_xstruct(xstruct):
+    """Get a parsed X$ structure from the Oracle binary."""
+    LOGGER.debug("Loading xstruct=%s", xstruct)
+
+    # Column functions are read from kqfcop
+    x_col_map = cache.lazy_load(
+        "columns/%s.data" % xstruct,
+        settings.force,
+        _get_xstruct_from_binary,
+        xstruct,
+        source=_read_xdesc,
+        depends=(kqfcop.FNAME,),
+    )
+
+    return x_col_map
+
+
+def iter_xstructs(tables):
+    """Yield (table, columns) for (table, xstruct) pairs.
+
+    Columns are extracted by a pool of workers, and each table is yielded
+    as soon as its columns are ready.
+    """
+    tables = list(tables)
+
+    # Load kqfcop before the workers use it. A forced load extracts it once
+    # per command, since the cache records the files already extracted.
+    kqfcop.get_kqfcop()
+
+    yield from iter_loaded(tables, settings.bind(get_xstruct), settings.jobs)
+
+
+def iter_loaded(tables, load, jobs):
+    """Yield (table, load(xstruct)) for (table, xstruct) pairs, with load
+    called once per xstruct by jobs threads, in order.
+
+    Up to 2 * jobs tables are loaded ahead of the caller, and each result is
+    released after its last table, so that a few cache files are held at a
+    time.
+    """
+    tables = list(tables)
+    last = {xstruct: i for i, (_, xstruct) in enumerate(tables)}
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {}
+        submitted = 0
+        try:
+            for i, (table, xstruct) in enumerate(tables):
+                while submitted < min(i + 2 * jobs, len(tables)):
+                    ahead = tables[submitted][1]
+                    if ahead not in futures:
+                        futures[ahead] = executor.submit(load, ahead)
+                    submitted += 1
+                result = futures[xstruct].result()
+                if last[xstruct] == i:
+                    del futures[xstruct]
+                yield table, result
+        finally:
+            # Do not wait for pending tables if the output is closed early
+            for future in futures.values():
+                future.cancel()
@@ -0,0 +1,98 @@
+"""Concurrent extraction of the kqftab, kqftap and kqfcop structures.
+
+With the binutils backend, each structure is read with objdump and its
+strings or symbols are resolved with objdump or nm. The structures do not
+depend on each other, so the ones missing in the cache are extracted at
+the same time, and a cold start takes as long as the slowest one.
+"""
+
+import logging
+
+import xinfo.cache as cache
+import xinfo.config.settings as settings
+import xinfo.profiler as profiler
+import xinfo.x.kqfcop as kqfcop
+import xinfo.x.kqftab as kqftab
+import xinfo.x.kqftap as kqftap
+
+LOGGER = logging.getLogger(__name__)
+
+STRUCTURES = ("kqftab", "kqftap", "kqfcop")
+
+
+async def _extract_kqftab(reader):
+    data = await reader.objdump_symbol("kqftab")
+    rows = list(kqftab._parse_kqftab(data))
+    strs = await reader.get_strs_from_addrs(kqftab._get_addr_list(rows))
+    return data, kqftab._get_kqftab_map(rows, strs)
+
+
+async def _extract_kqftap(reader):
+    data = await reader.objdump_symbol("kqftap")
+    kqftap_map = kqftap._get_kqftap_ptrs(data)
+    symbols = await reader.get_symbols(kqftap._get_ptr_list(kqftap_map))
+    kqftap._add_symbols(kqftap_map, symbols)
+    return data, kqftap_map
+
+
+async def _extract_kqfcop(reader):
+    data = await reader.objdump_symbol("kqfcop")
+    kqfcop_map = kqfcop._get_kqfcop_ptrs(data)
+    symbols = await reader.get_symbols(kqfcop._get_ptr_list(kqfcop_map))
+    kqfcop._add_symbols(kqfcop_map, symbols)
+    return data, kqfcop_map
+
+
+# Structure name to (cache file, indexes, coroutine function extracting it)
+_EXTRACTORS = {
+    "kqftab": (kqftab.FNAME, kqftab.INDEXES, _extract_kqftab),
+    "kqftap": (kqftap.FNAME, (), _extract_kqftap),
+    "kqfcop": (kqfcop.FNAME, (), _extract_kqfcop),
+}
+
+
+def _save(name, data, obj):
+    """Cache an extracted structure with the hash of its bytes. A file
+    published by another process meanwhile is kept."""
+    fname, indexes, _ = _EXTRACTORS[name]
+    variant = kqftap.get_variant() if name == "kqftap" else ""
+    cache.lazy_load(
+        fname,
+        False,
+        lambda _: obj,
+        indexes=indexes,
+        source=lambda: data,
+        variant=variant,
+    )
+
+
+def prefetch(*names):
+    """Extract the structures in names missing in the cache at the same time.
+
+    At most settings.jobs commands run at a time, and at least one per
+    missing structure. With the ELF backend, structures are read in-process
+    when they are loaded. Forced and refreshed loads, and loads within a
+    running event loop, read them one at a time as usual.
+    """
+    if settings.backend != "binutils":
+        return
+    if settings.force or settings.refresh is not None:
+        return
+    missing = [name for name in names if cache.get_cached(_EXTRACTORS[name][0]) is None]
+    if len(missing) < 2:
+        return
+
+    # asyncio is imported only when structures are extracted
+    import xinfo.abinutils as abinutils
+
+    if abinutils.is_loop_running():
+        LOGGER.debug("Event loop running, %s are read when loaded", ", ".join(missing))
+        return
+    LOGGER.debug("Extracting %s", ", ".join(missing))
+    with profiler.phase("kqf.extract", structures=",".join(missing)):
+        results = abinutils.run(
+            [_EXTRACTORS[name][2] for name in missing],
+            max(settings.jobs, len(missing)),
+        )
+        for name, (data, obj) in zip(missing, results):
+            _save(name, data, obj)
@@ -8,9 +8,12 @@ from pprint import pformat
 import xinfo.binutils as binutils
 import xinfo.cache as cache
 import xinfo.config.settings as settings
+import xinfo.profiler as profiler
 
 LOGGER = logging.getLogger(__name__)
 
+FNAME = "kqfcop.data"
+
 KQFCOP_TYP_OFFSET_MAP = {
     7: 1,
     8: 2,
@@ -23,29 +26,47 @@ KQFCOP_TYP_OFFSET_MAP = {
 }
 
 
-def _get_kqfcop_from_binary():
-    kqfcop = binutils.objdump_symbol("kqfcop")
+def _read_kqfcop():
+    return binutils.objdump_symbol("kqfcop")
+
+
+@profiler.profiled("kqfcop.parse")
+def _get_kqfcop_from_binary(kqfcop):
+    kqfcop_map = _get_kqfcop_ptrs(kqfcop)
+    symbols = binutils.get_symbols(_get_ptr_list(kqfcop_map))
+    _add_symbols(kqfcop_map, symbols)
+    return kqfcop_map
+
 
+def _get_kqfcop_ptrs(kqfcop):
+    """Return kqfcop entries with the function pointers to resolve."""
     kqfcop_map = OrderedDict()
 
     for i, (func_ptr,) in enumerate(struct.iter_unpack("l", kqfcop), 1):
         kqfcop_map[i] = {"func_ptr": func_ptr}
+    return kqfcop_map
+
+
+def _get_ptr_list(kqfcop_map):
+    return [v2 for v1 in kqfcop_map.values() for v2 in v1.values() if v2 > 0]
 
-    ptr_list = [v2 for v1 in kqfcop_map.values() for v2 in v1.values() if v2 > 0]
-    symbols = binutils.get_symbols(ptr_list)
 
+def _add_symbols(kqfcop_map, symbols):
     for v in kqfcop_map.values():
         func_ptr = v["func_ptr"]
         if func_ptr > 0:
             v["func"] = symbols[func_ptr]
-    LOGGER.debug(pformat(kqfcop_map))
-
-    return kqfcop_map
+    if LOGGER.isEnabledFor(logging.DEBUG):
+        LOGGER.debug(pformat(kqfcop_map))
 
 
-def _get_kqfcop():
-    kqfcop_map = cache.lazy_load("kqfcop.data", settings.force, _get_kqfcop_from_binary)
-    LOGGER.debug(pformat(kqfcop_map))
+def get_kqfcop():
+    """Return kqfcop structure."""
+    kqfcop_map = cache.lazy_load(
+        FNAME, settings.force, _get_kqfcop_from_binary, source=_read_kqfcop
+    )
+    if LOGGER.isEnabledFor(logging.DEBUG):
+        LOGGER.debug(pformat(kqfcop_map))
     return kqfcop_map
 
 
@@ -55,7 +76,7 @@ def get_func(indx, typ):
         raise ValueError("Unhandled kqfcop typ = %d" % typ)
 
     offset = KQFCOP_TYP_OFFSET_MAP[typ]
-    kqfcop_map = _get_kqfcop()
+    kqfcop_map = get_kqfcop()
     func = kqfcop_map[offset + indx * 3]["func"]
 
     return func
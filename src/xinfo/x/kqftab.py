@@ -8,19 +8,33 @@ from pprint import pformat
 import xinfo.binutils as binutils
 import xinfo.cache as cache
 import xinfo.config.settings as settings
+import xinfo.profiler as profiler
 
 LOGGER = logging.getLogger(__name__)
 
+FNAME = "kqftab.data"
+INDEXES = ("nam",)
 
-def _get_kqftab_from_binary():
-    kqftab = binutils.objdump_symbol("kqftab")
+# Fields of kqftab entries
+FIELDS = (
+    "obj",
+    "ver",
+    "nam_ptr",
+    "nam",
+    "xstruct_nam_ptr",
+    "xstruct",
+    "typ",
+    "flg",
+    "rsz",
+    "coc",
+)
 
-    kqftab_map = OrderedDict()
 
+def _parse_kqftab(kqftab):
     fmt = "4L2H1I2L3I2H1L"
     offset = struct.calcsize(fmt)
 
-    for i, (
+    for (
         nam_len,
         nam_ptr,
         xstruct_nam_len,
@@ -35,18 +49,65 @@ def _get_kqftab_from_binary():
         obj,
         ver,
         *_,
-    ) in enumerate(struct.iter_unpack(fmt, kqftab[:-offset]), 1):
+    ) in struct.iter_unpack(fmt, kqftab[:-offset]):
         LOGGER.debug("%x " * 8, nam_ptr, xstruct_nam_ptr, typ, flg, rsz, coc, obj, ver)
+        yield (
+            nam_len,
+            nam_ptr,
+            xstruct_nam_len,
+            xstruct_nam_ptr,
+            typ,
+            flg,
+            rsz,
+            coc,
+            obj,
+            ver,
+        )
+
+
+def _read_kqftab():
+    return binutils.objdump_symbol("kqftab")
+
+
+def _get_addr_list(rows):
+    """(address, length) pairs of the table and xstruct names of kqftab rows."""
+    addr_list = []
+    for nam_len, nam_ptr, xstruct_nam_len, xstruct_nam_ptr, *_ in rows:
+        addr_list.append((nam_ptr, nam_len + 1))
+        addr_list.append((xstruct_nam_ptr, xstruct_nam_len + 1))
+    return addr_list
+
+
+@profiler.profiled("kqftab.parse")
+def _get_kqftab_from_binary(kqftab):
+    rows = list(_parse_kqftab(kqftab))
+    strs = binutils.get_strs_from_addrs(_get_addr_list(rows))
+    return _get_kqftab_map(rows, strs)
+
+
+def _get_kqftab_map(rows, strs):
+    kqftab_map = OrderedDict()
+
+    for i, (
+        _,
+        nam_ptr,
+        _,
+        xstruct_nam_ptr,
+        typ,
+        flg,
+        rsz,
+        coc,
+        obj,
+        ver,
+    ) in enumerate(rows, 1):
         kqftab_map[i] = OrderedDict(
             {
                 "obj": obj,
                 "ver": ver,
                 "nam_ptr": nam_ptr,
-                "nam": binutils.get_str_from_addr(nam_ptr, nam_len + 1),
+                "nam": strs[nam_ptr],
                 "xstruct_nam_ptr": xstruct_nam_ptr,
-                "xstruct": binutils.get_str_from_addr(
-                    xstruct_nam_ptr, xstruct_nam_len + 1
-                ),
+                "xstruct": strs[xstruct_nam_ptr],
                 "typ": typ,
                 "flg": flg,
                 "rsz": rsz,
@@ -58,15 +119,21 @@ def _get_kqftab_from_binary():
 
 def get_kqftab():
     """Return kqftab structure."""
-    kqftab_map = cache.lazy_load("kqftab.data", settings.force, _get_kqftab_from_binary)
-    LOGGER.debug(pformat(kqftab_map))
+    kqftab_map = cache.lazy_load(
+        FNAME,
+        settings.force,
+        _get_kqftab_from_binary,
+        indexes=INDEXES,
+        source=_read_kqftab,
+    )
+    if LOGGER.isEnabledFor(logging.DEBUG):
+        LOGGER.debug(pformat(kqftab_map))
     return kqftab_map
 
 
 def get_index(table):
     """Get an X$ table index for a given table name."""
-    kqftab_map = get_kqftab()
-    for k, v in kqftab_map.items():
-        if v["nam"] == table:
-            return k
-    raise ValueError("Table %s not found" % table)
+    indexes = get_kqftab().lookup("nam", table)
+    if not indexes:
+        raise ValueError("Table %s not found" % table)
+    return indexes[0]
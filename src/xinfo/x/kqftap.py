@@ -8,9 +8,12 @@ from pprint import pformat
 import xinfo.binutils as binutils
 import xinfo.cache as cache
 import xinfo.config.settings as settings
+import xinfo.profiler as profiler
 
 LOGGER = logging.getLogger(__name__)
 
+FNAME = "kqftap.data"
+
 
 def _parse_kqftap(kqftap):
     formats = {19: "4L", 23: "5L"}
@@ -23,9 +26,26 @@ def _parse_kqftap(kqftap):
         yield *ptr[:3],
 
 
-def _get_kqftap_from_binary():
-    kqftap = binutils.objdump_symbol("kqftap")
+def _read_kqftap():
+    return binutils.objdump_symbol("kqftap")
+
+
+def get_variant():
+    """Return the settings the parsing depends on, included in the hash of
+    the kqftap bytes."""
+    return "ora_version=%s" % settings.ora_version
+
+
+@profiler.profiled("kqftap.parse")
+def _get_kqftap_from_binary(kqftap):
+    kqftap_map = _get_kqftap_ptrs(kqftap)
+    symbols = binutils.get_symbols(_get_ptr_list(kqftap_map))
+    _add_symbols(kqftap_map, symbols)
+    return kqftap_map
+
 
+def _get_kqftap_ptrs(kqftap):
+    """Return kqftap entries with the pointers to resolve."""
     kqftap_map = OrderedDict()
 
     for i, (xstruct_ptr, cb1_ptr, cb2_ptr) in enumerate(_parse_kqftap(kqftap), 1):
@@ -35,21 +55,30 @@ def _get_kqftap_from_binary():
         if cb2_ptr:
             v["cb2_ptr"] = cb2_ptr
         kqftap_map[i] = v
+    return kqftap_map
+
 
-    ptr_list = [v2 for v1 in kqftap_map.values() for v2 in v1.values() if v2 > 0]
-    symbols = binutils.get_symbols(ptr_list)
+def _get_ptr_list(kqftap_map):
+    return [v2 for v1 in kqftap_map.values() for v2 in v1.values() if v2 > 0]
 
+
+def _add_symbols(kqftap_map, symbols):
     for v in kqftap_map.values():
         for ptr in v.copy():
             if ptr.endswith("_ptr"):
                 deref = ptr[: -len("_ptr")]
                 v[deref] = symbols[v[ptr]]
 
-    return kqftap_map
-
 
 def get_kqftap():
     """Return kqftap structure."""
-    kqftap_map = cache.lazy_load("kqftap.data", settings.force, _get_kqftap_from_binary)
-    LOGGER.debug(pformat(kqftap_map))
+    kqftap_map = cache.lazy_load(
+        FNAME,
+        settings.force,
+        _get_kqftap_from_binary,
+        source=_read_kqftap,
+        variant=get_variant(),
+    )
+    if LOGGER.isEnabledFor(logging.DEBUG):
+        LOGGER.debug(pformat(kqftap_map))
     return kqftap_map
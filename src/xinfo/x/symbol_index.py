@@ -0,0 +1,65 @@
+"""Index of the functions used by X$ tables and columns."""
+
+import fnmatch
+import logging
+from collections import OrderedDict
+
+import xinfo.cache as cache
+import xinfo.config.settings as settings
+import xinfo.profiler as profiler
+import xinfo.x.column_index as column_index
+import xinfo.x.kqftap as kqftap
+import xinfo.x.tables as xtables
+
+LOGGER = logging.getLogger(__name__)
+
+FNAME = "symbol_index.data"
+INDEXES = ("symbol",)
+FIELDS = ("symbol", "table", "usage", "column")
+
+# kqftap callbacks of a table
+CALLBACKS = ("cb1", "cb2")
+
+
+@profiler.profiled("symbol_index.build")
+def _get_symbol_index():
+    """Return one row per function used by a kqftap callback or a kqfcop column
+    function, in kqftab order."""
+    columns = OrderedDict()
+    for col in column_index.search("*", func="*"):
+        columns.setdefault(col["table"], []).append(col)
+
+    kqftap_map = kqftap.get_kqftap()
+    rows = OrderedDict()
+    for k, v in xtables.get_tables().items():
+        for slot in CALLBACKS:
+            if k in kqftap_map and slot in kqftap_map[k]:
+                rows[len(rows) + 1] = OrderedDict(
+                    symbol=kqftap_map[k][slot], table=v["nam"], usage=slot
+                )
+        for col in columns.get(v["nam"], ()):
+            rows[len(rows) + 1] = OrderedDict(
+                symbol=col["func"], table=v["nam"], usage="column", column=col["nam"]
+            )
+    return rows
+
+
+def get_symbol_index():
+    """Return the function usages of the current Oracle binary."""
+    return cache.lazy_load(FNAME, settings.force, _get_symbol_index, indexes=INDEXES)
+
+
+def where_used(expr):
+    """Return the usages of functions with names matching a glob expression.
+
+    Only the symbols starting with the literal prefix of the expression are
+    matched, which are found with a range scan of the symbol index.
+    """
+    index = get_symbol_index()
+    prefix = xtables.literal_prefix(expr)
+    if prefix:
+        keys = index.lookup_prefix("symbol", prefix)
+    else:
+        keys = index.scan("symbol", lambda v: fnmatch.fnmatchcase(v, expr))
+    rows = (index[k] for k in keys)
+    return [row for row in rows if fnmatch.fnmatchcase(row["symbol"], expr)]
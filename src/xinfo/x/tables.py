@@ -0,0 +1,98 @@
+"""X$ tables joined with their kqftap entries, with name, obj and xstruct indexes."""
+
+import fnmatch
+import logging
+from collections import OrderedDict
+
+import xinfo.cache as cache
+import xinfo.config.settings as settings
+import xinfo.profiler as profiler
+import xinfo.x.kqf as kqf
+import xinfo.x.kqftab as kqftab
+import xinfo.x.kqftap as kqftap
+from xinfo.cachefile import NOCASE
+
+LOGGER = logging.getLogger(__name__)
+
+INDEXES = (("nam", NOCASE), "obj", "xstruct")
+
+
+@profiler.profiled("tables.build")
+def _get_tables_from_kqf():
+    # kqfcop is extracted along, as most commands describe columns next
+    kqf.prefetch(*kqf.STRUCTURES)
+    kqftab_map = kqftab.get_kqftab()
+    kqftap_map = kqftap.get_kqftap()
+    tables = OrderedDict()
+    for k, v in kqftab_map.items():
+        tables[k] = OrderedDict(nam=v["nam"], obj=v["obj"], xstruct=v["xstruct"])
+        if k in kqftap_map:
+            # The column array of the table
+            tables[k]["columns"] = kqftap_map[k]["xstruct"]
+    return tables
+
+
+def get_tables():
+    """Return kqftab index to the name, obj, xstruct and column array of tables."""
+    return cache.lazy_load(
+        "tables.data", settings.force, _get_tables_from_kqf, indexes=INDEXES
+    )
+
+
+def _rows(tables, keys):
+    return [(k, tables[k]) for k in keys]
+
+
+def get_table(name):
+    """Return (index, table) of an X$ table name in any case."""
+    return lookup_table(get_tables(), name)
+
+
+def lookup_table(tables, name):
+    """Return (index, table) of an X$ table name in any case in tables."""
+    keys = tables.lookup("nam", name)
+    if not keys:
+        raise ValueError("Table %s not found" % name)
+    return keys[0], tables[keys[0]]
+
+
+def find_by_obj(obj):
+    """Return (index, table) pairs of tables with an object number."""
+    tables = get_tables()
+    return _rows(tables, tables.lookup("obj", obj))
+
+
+def find_by_xstruct(xstruct):
+    """Return (index, table) pairs of tables with an xstruct name."""
+    tables = get_tables()
+    return _rows(tables, tables.lookup("xstruct", xstruct))
+
+
+def literal_prefix(expr):
+    """The part of a glob expression before the first wildcard."""
+    for i, c in enumerate(expr):
+        if c in "*?[":
+            return expr[:i]
+    return expr
+
+
+def match(expr):
+    """Return (index, table) pairs of tables with names matching a glob
+    expression in any case, in kqftab order.
+
+    Only the names starting with the literal prefix of the expression are
+    matched, which are found with a range scan of the name index.
+    """
+    return match_tables(get_tables(), expr)
+
+
+def match_tables(tables, expr):
+    """Return (index, table) pairs of tables matching a glob expression, like
+    match."""
+    prefix = literal_prefix(expr)
+    if prefix:
+        rows = _rows(tables, tables.lookup_prefix("nam", prefix))
+    else:
+        rows = tables.items()
+    expr = expr.upper()
+    return [(k, v) for k, v in rows if fnmatch.fnmatchcase(v["nam"].upper(), expr)]
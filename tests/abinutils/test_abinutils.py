@@ -0,0 +1,63 @@
+import asyncio
+import sys
+from unittest.mock import patch
+
+import pytest
+import xinfo.abinutils as abinutils
+import xinfo.config.settings as settings
+import xinfo.elf as elf
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="Does not work on Windows"
+)
+
+
+@pytest.fixture
+def commands():
+    """Track commands started by readers."""
+    with patch.object(
+        asyncio, "create_subprocess_exec", wraps=asyncio.create_subprocess_exec
+    ) as mock:
+        yield mock
+
+
+def test_objdump_symbol(test_executable):
+    """Symbols should be read like with the ELF backend."""
+    elf_ = elf.get_elf(settings.ora_binary)
+    expected = elf_.read(*elf_.symbols["kqftab"])
+    assert abinutils.run([lambda r: r.objdump_symbol("kqftab")], 1) == [expected]
+
+
+def test_get_strs_from_addrs(test_executable, commands):
+    """Nearby strings should be read with a single objdump call."""
+    kqftab = elf.get_elf(settings.ora_binary).symbols["kqftab"]
+    elf_ = elf.get_elf(settings.ora_binary)
+    data = elf_.read(*kqftab).cast("Q")
+    addr_list = [(data[i * 10 + 1], data[i * 10] + 1) for i in range(3)]
+    (strs,) = abinutils.run([lambda r: r.get_strs_from_addrs(addr_list)], 2)
+    assert [strs[addr] for addr, _ in addr_list] == [
+        "X$TABLEA1",
+        "X$TABLEB1",
+        "X$TABLEA2",
+    ]
+    assert commands.call_count == 1
+
+
+def test_get_symbols(test_executable, commands):
+    """nm should run once for all lookups of a reader."""
+    symbols = elf.get_elf(settings.ora_binary).symbols
+    f1, f2 = symbols["f1"][0], symbols["f2"][0]
+    results = abinutils.run(
+        [lambda r: r.get_symbols([f1]), lambda r: r.get_symbols([f2, f1])], 2
+    )
+    assert results == [{f1: "f1"}, {f1: "f1", f2: "f2"}]
+    assert commands.call_count == 1
+    with pytest.raises(ValueError) as exc_info:
+        abinutils.run([lambda r: r.get_symbols([f1, 1 << 40])], 1)
+    assert "Symbols not found for addresses: 0x10000000000" in str(exc_info.value)
+
+
+def test_failed_command():
+    """A command with a non-zero exit code should raise RuntimeError."""
+    with pytest.raises(RuntimeError, match="Unexpected exitcode = 1"):
+        abinutils.run([lambda r: r._run("false")], 1)
@@ -0,0 +1,212 @@
+"""Benchmark xinfo commands with cold and warm caches.
+
+Each run of a scenario starts a new xinfo process, as a user would. Cold
+runs use an empty cache directory, warm runs use a cache directory filled
+by a previous run of the same command. Results are stored as JSON, and can
+be compared with the results of a previous run to flag regressions.
+
+Usage:
+    python tests/benchmark/bench.py -o after.json --compare before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_EXECUTABLE = os.path.join("tests", "test-executable")
+
+# Name to (command arguments, warm cache)
+SCENARIOS = OrderedDict(
+    [
+        ("list-cold", (["list"], False)),
+        ("list-warm", (["list"], True)),
+        ("list-kqftap-cold", (["list", "--with-kqftap"], False)),
+        ("list-kqftap-warm", (["list", "--with-kqftap"], True)),
+        ("desc-cold", (["desc", "--all"], False)),
+        ("desc-warm", (["desc", "--all"], True)),
+        ("desc-binutils-cold", (["desc", "--all", "--backend", "binutils"], False)),
+        ("sql-warm", (["sql", "SELECT count(*) FROM xcolumns"], True)),
+    ]
+)
+
+# Audit events of new processes
+PROCESS_EVENTS = ("subprocess.Popen", "os.system")
+
+
+def build_executable(path):
+    """Build the test executable from its C source with the Makefile rule."""
+    subprocess.run(["make", "-s", path], cwd=ROOT_DIR, check=True)
+    return os.path.join(ROOT_DIR, path)
+
+
+def _child(argv, stats_path):  # pragma: no cover
+    """Run a command in the benchmark process, counting started processes."""
+    import xinfo.cli as cli
+
+    counts = dict.fromkeys(PROCESS_EVENTS, 0)
+
+    def audit(event, args):
+        if event in counts:
+            counts[event] += 1
+
+    sys.addaudithook(audit)
+    start = time.perf_counter()
+    exit_code = cli.run(argv)
+    elapsed = time.perf_counter() - start
+    with open(stats_path, "w") as fp:
+        json.dump(dict(run=elapsed, subprocesses=sum(counts.values())), fp)
+    return exit_code
+
+
+def _env(cache_dir):
+    import xinfo
+
+    env = dict(os.environ)
+    env["TMPDIR"] = cache_dir
+    env["XINFO_NO_DAEMON"] = "1"
+    # Benchmark the same xinfo package as the one imported here
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(xinfo.__file__)))
+    env["PYTHONPATH"] = os.pathsep.join(
+        p for p in (package_dir, env.get("PYTHONPATH")) if p
+    )
+    return env
+
+
+def _run_once(argv, cache_dir):
+    """Run a command in a new process. Return the measured times and counts."""
+    stats_path = os.path.join(cache_dir, "stats.json")
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", stats_path, "--"]
+    start = time.perf_counter()
+    subprocess.run(
+        cmd + argv, env=_env(cache_dir), check=True, stdout=subprocess.DEVNULL
+    )
+    wall = time.perf_counter() - start
+    with open(stats_path) as fp:
+        stats = json.load(fp)
+    return dict(wall=wall, **stats)
+
+
+def run_scenario(name, executable, ora_version=19, repeat=5):
+    """Run a scenario several times. Return a summary of the runs."""
+    args, warm = SCENARIOS[name]
+    argv = args + ["-b", executable, "--ora-version", str(ora_version)]
+    runs = []
+    for _ in range(repeat):
+        cache_dir = tempfile.mkdtemp(prefix="xinfo-bench-")
+        try:
+            if warm:
+                _run_once(argv, cache_dir)
+            runs.append(_run_once(argv, cache_dir))
+        finally:
+            shutil.rmtree(cache_dir)
+    walls = [r["wall"] for r in runs]
+    return OrderedDict(
+        median=statistics.median(walls),
+        min=min(walls),
+        run_median=statistics.median(r["run"] for r in runs),
+        subprocesses=runs[0]["subprocesses"],
+        wall=walls,
+    )
+
+
+def compare(old, new, threshold):
+    """Yield (scenario, old median, new median, ratio, regressed) of both results."""
+    for name, result in new["scenarios"].items():
+        if name not in old["scenarios"]:
+            continue
+        old_median = old["scenarios"][name]["median"]
+        ratio = result["median"] / old_median
+        yield name, old_median, result["median"], ratio, ratio > 1 + threshold
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description="Benchmark xinfo commands")
+    parser.add_argument(
+        "-b",
+        "--executable",
+        default=DEFAULT_EXECUTABLE,
+        help="The executable to build relative to the project root, "
+        "or the path to an existing binary",
+    )
+    parser.add_argument("--ora-version", type=int, default=19)
+    parser.add_argument("-n", "--repeat", type=int, default=5)
+    parser.add_argument(
+        "-s",
+        "--scenario",
+        action="append",
+        choices=list(SCENARIOS),
+        help="Scenarios to run. Runs all scenarios if not specified",
+    )
+    parser.add_argument("-o", "--output", help="Save results to a JSON file")
+    parser.add_argument("--compare", help="Compare with results in a JSON file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Flag scenarios slower than the compared results by this ratio",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Run the benchmark. Return 1 if there are regressions."""
+    args = _parse_args(argv)
+    if os.path.isfile(args.executable):
+        executable = os.path.abspath(args.executable)
+    else:
+        executable = build_executable(args.executable)
+
+    results = OrderedDict(
+        python=platform.python_version(),
+        platform=platform.platform(),
+        executable=executable,
+        repeat=args.repeat,
+        scenarios=OrderedDict(),
+    )
+    for name in args.scenario or SCENARIOS:
+        result = run_scenario(name, executable, args.ora_version, args.repeat)
+        results["scenarios"][name] = result
+        print(
+            "%-20s median %8.3fs  min %8.3fs  subprocesses %d"
+            % (name, result["median"], result["min"], result["subprocesses"])
+        )
+
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(results, fp, indent=2)
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare) as fp:
+            old = json.load(fp)
+        for name, old_median, new_median, ratio, regressed in compare(
+            old, results, args.threshold
+        ):
+            print(
+                "%-20s %8.3fs -> %8.3fs  %+6.1f%%%s"
+                % (
+                    name,
+                    old_median,
+                    new_median,
+                    (ratio - 1) * 100,
+                    "  REGRESSION" if regressed else "",
+                )
+            )
+            if regressed:
+                exit_code = 1
+    return exit_code
+
+
+if __name__ == "__main__":  # pragma: no cover
+    if sys.argv[1:2] == ["--child"]:
+        sys.exit(_child(sys.argv[4:], sys.argv[2]))
+    sys.exit(main())
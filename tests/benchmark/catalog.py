@@ -0,0 +1,180 @@
+"""Generate C source of an executable with a production-sized X$ catalog.
+
+The structures have the same layout as in tests/test-executable.c: kqftab
+with one row per table, one column array per table, kqftap19 and kqftap23
+pointing to the column arrays and to callback functions, and kqfcop with
+column functions. Build an executable with the Makefile rule:
+
+    make tests/large-executable CATALOG_ARGS="--tables 1200 --columns 25"
+"""
+
+import argparse
+import sys
+
+HEADER = """\
+typedef struct {
+  long nam_len;
+  char *nam;
+  long xstruct_len;
+  char *xstruct;
+  short typ;
+  short flg;
+  int unused3;
+  long rsz;
+  long unused4;
+  int coc;
+  int unused5;
+  int obj;
+  short ver;
+  short unused6;
+  long unused7;
+} kqftab_struct;
+
+typedef struct {
+  long unused1;
+  void *xstruct;
+  void *cb1;
+  void *cb2;
+} kqftap19_struct;
+
+typedef struct {
+  long unused1;
+  void *xstruct;
+  void *cb1;
+  void *cb2;
+  long unused2;
+} kqftap23_struct;
+
+typedef struct {
+  long len;
+  char *nam;
+  char dty;
+  char typ;
+  char idx;
+  char ipo;
+  char max;
+  char unused1;
+  char unused2;
+  char unused3;
+  char lsz;
+  char unused4;
+  char unused5;
+  char unused6;
+  long lof;
+  long siz;
+  short off;
+  short unused7;
+  long kqfcop_indx;
+} xcolumn_struct;
+"""
+
+# Column data types and sizes
+DTYS = ((1, 64), (2, 22), (12, 7), (23, 16), (180, 11))
+
+# Column typ using the first kqfcop function of a group, see KQFCOP_TYP_OFFSET_MAP
+KQFCOP_TYP = 11
+
+
+def table_name(i):
+    return "X$GEN%05d" % i
+
+
+def xstruct_name(i):
+    return "gen%05d" % i
+
+
+def column_name(i, j):
+    return "COL%05d_%03d" % (i, j)
+
+
+def kqfcop_indx(i, j, kqfcop_groups):
+    """Every 4th column of a table has a kqfcop function group, or 0."""
+    if not kqfcop_groups or j % 4:
+        return 0
+    return (i + j) % kqfcop_groups + 1
+
+
+def generate(tables, columns, kqfcop_groups, kqftap_version=19, file=None):
+    """Write C source with the given numbers of tables, columns per table,
+    and kqfcop function groups of three functions each."""
+    w = (file or sys.stdout).write
+    w(HEADER)
+
+    # kqfcop: functions are looked up by indx * 3 + offset, offsets are 1..3
+    w("\n")
+    for n in range(kqfcop_groups * 3):
+        w("void kqfcop_f%d() {}\n" % n)
+    w("\nvoid *const kqfcop[] = {0, 0, 0")
+    for n in range(kqfcop_groups * 3):
+        w(", kqfcop_f%d" % n)
+    w("};\n")
+
+    for i in range(1, tables + 1):
+        w("\nvoid %s_cb1() {}\nvoid %s_cb2() {}\n" % (xstruct_name(i), xstruct_name(i)))
+        w("xcolumn_struct const %s_c[] = {\n" % xstruct_name(i))
+        off = 0
+        for j in range(1, columns + 1):
+            dty, siz = DTYS[(i + j) % len(DTYS)]
+            indx = kqfcop_indx(i, j, kqfcop_groups)
+            typ = KQFCOP_TYP if indx else 28
+            nam = column_name(i, j)
+            w(
+                '    {%d, "%s", %d, %d, 0, 0, %d, 0, 0, 0, 2, 0, 0, 0, 0, %d, %d, 0, %d},\n'
+                % (len(nam), nam, dty, typ, siz, siz, off, indx)
+            )
+            off = (off + siz) % 32768
+        w("    {0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0}};\n")
+
+    w("\nkqftab_struct const kqftab[] = {\n")
+    for i in range(1, tables + 1):
+        nam, xstruct = table_name(i), xstruct_name(i)
+        w(
+            '    {%d, "%s", %d, "%s", 4, 5, 0, %d, 0, %d, 0, %d, 1, 0, 0},\n'
+            % (len(nam), nam, len(xstruct), xstruct, columns * 8, columns, 4096 + i)
+        )
+    w("    {0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0}};\n")
+
+    for version, extra in ((19, ""), (23, ", 0")):
+        w("\nkqftap%d_struct const kqftap%d[] = {\n" % (version, version))
+        for i in range(1, tables + 1):
+            x = xstruct_name(i)
+            w("    {0, (void *)%s_c, %s_cb1, %s_cb2%s},\n" % (x, x, x, extra))
+        w("    {0, 0, 0, 0%s}};\n" % extra)
+
+    # kqftap is read with the layout of the Oracle version
+    w(
+        "\nextern kqftap%d_struct const kqftap[%d] "
+        '__attribute__((alias("kqftap%d")));\n'
+        % (kqftap_version, tables + 1, kqftap_version)
+    )
+    w("\nint main() {}\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate C source of an executable with an X$ catalog"
+    )
+    parser.add_argument("--tables", type=int, default=1200)
+    parser.add_argument("--columns", type=int, default=20, help="Columns per table")
+    parser.add_argument(
+        "--kqfcop", type=int, default=300, help="kqfcop function groups"
+    )
+    parser.add_argument(
+        "--kqftap-version",
+        type=int,
+        choices=[19, 23],
+        default=19,
+        help="The kqftap layout, which depends on --ora-version",
+    )
+    parser.add_argument("-o", "--output", help="Output file. Default: stdout")
+    args = parser.parse_args(argv)
+
+    if args.output:
+        with open(args.output, "w") as fp:
+            generate(args.tables, args.columns, args.kqfcop, args.kqftap_version, fp)
+    else:
+        generate(args.tables, args.columns, args.kqfcop, args.kqftap_version)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,70 @@
+import json
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+import tests.benchmark.bench as bench
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="Does not work on Windows"
+)
+
+
+@pytest.fixture
+def executable(request):
+    """Absolute path to the test executable."""
+    return os.path.abspath(request.config.getoption("--test-executable"))
+
+
+def _results(**medians):
+    return dict(scenarios={k: dict(median=v) for k, v in medians.items()})
+
+
+def test_compare():
+    """Scenarios slower than the threshold should be flagged."""
+    old = _results(a=1.0, b=1.0, c=1.0)
+    new = _results(a=1.1, b=1.5, d=1.0)
+    assert list(bench.compare(old, new, 0.2)) == [
+        ("a", 1.0, 1.1, 1.1, False),
+        ("b", 1.0, 1.5, 1.5, True),
+    ]
+
+
+@pytest.mark.parametrize(
+    "name, subprocesses",
+    [("list-warm", 0), ("desc-binutils-cold", 1)],
+)
+def test_run_scenario(executable, name, subprocesses):
+    """Scenarios should be timed and started processes counted."""
+    result = bench.run_scenario(name, executable, repeat=1)
+    assert len(result["wall"]) == 1
+    assert 0 < result["run_median"] < result["median"] == result["min"]
+    assert (result["subprocesses"] > 0) == (subprocesses > 0)
+
+
+def test_main(executable, tmp_path, capsys):
+    """Results should be saved, and regressions should set the exit code."""
+    output, old = tmp_path / "new.json", tmp_path / "old.json"
+    old.write_text(json.dumps(_results(**{"list-cold": 1e-6})))
+    argv = ["-b", executable, "-s", "list-cold", "-n", "1", "-o", str(output)]
+    assert bench.main(argv + ["--compare", str(old)]) == 1
+    assert "REGRESSION" in capsys.readouterr().out
+    results = json.loads(output.read_text())
+    assert list(results["scenarios"]) == ["list-cold"]
+    assert results["executable"] == executable
+
+    old.write_text(json.dumps(_results(**{"list-cold": 1e6})))
+    assert bench.main(argv + ["--compare", str(old)]) == 0
+    assert bench.main(argv[:-2]) == 0
+
+
+def test_build_executable(executable):
+    """Executables should be built from C sources with make."""
+    with patch("subprocess.run") as mock_run, patch.object(
+        bench, "run_scenario", return_value=dict(median=1, min=1, subprocesses=0)
+    ):
+        assert bench.main(["-b", "tests/no-such-executable", "-s", "list-cold"]) == 0
+    mock_run.assert_called_once_with(
+        ["make", "-s", "tests/no-such-executable"], cwd=bench.ROOT_DIR, check=True
+    )
@@ -0,0 +1,111 @@
+import io
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+import tests.benchmark.bench as bench
+import tests.benchmark.catalog as catalog
+import xinfo.cache as cache
+import xinfo.cachefile as cachefile
+import xinfo.cli as cli
+import xinfo.x.columns as xcolumns
+import xinfo.x.kqfcop as kqfcop
+import xinfo.x.kqftab as kqftab
+import xinfo.x.kqftap as kqftap
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="Does not work on Windows"
+)
+
+
+@pytest.fixture(params=[19, 23])
+def generated_executable(request, tmp_path):
+    """Build an executable with a generated catalog with the Makefile rule."""
+    path = tmp_path / "generated"
+    catalog.main(
+        [
+            "--tables",
+            "5",
+            "--columns",
+            "9",
+            "--kqfcop",
+            "3",
+            "--kqftap-version",
+            str(request.param),
+            "-o",
+            str(path) + ".c",
+        ]
+    )
+    bench.build_executable(str(path))
+    with patch.object(cache, "CACHE_DIR", str(tmp_path)), patch(
+        "xinfo.config.settings.force", False
+    ), patch("xinfo.config.settings.ora_binary", str(path)), patch(
+        "xinfo.config.settings.ora_version", request.param
+    ):
+        yield
+
+
+def test_generated_catalog(generated_executable):
+    """Generated structures should be parsed like those of an Oracle binary."""
+    kqftab_map = kqftab.get_kqftab()
+    assert [v["nam"] for v in kqftab_map.values()] == [
+        catalog.table_name(i) for i in range(1, 6)
+    ]
+    assert kqftab_map[5]["coc"] == 9
+
+    kqftap_map = kqftap.get_kqftap()
+    assert kqftap_map[5]["xstruct"] == "gen00005_c"
+    assert kqftap_map[5]["cb1"] == "gen00005_cb1"
+
+    assert len(kqfcop.get_kqfcop()) == 12
+
+    x_col_map = xcolumns.get_xstruct("gen00005_c")
+    assert [v["nam"] for v in x_col_map.values()] == [
+        catalog.column_name(5, j) for j in range(1, 10)
+    ]
+    funcs = [v.get("func") for v in x_col_map.values()]
+    assert funcs[3] == "kqfcop_f%d" % (3 * (catalog.kqfcop_indx(5, 4, 3) - 1))
+    assert funcs[7] == "kqfcop_f%d" % (3 * (catalog.kqfcop_indx(5, 8, 3) - 1))
+    assert funcs.count(None) == 7
+
+
+def test_stdout():
+    """The source should be written to stdout without an output file."""
+    with patch("sys.stdout", new_callable=io.StringIO) as stdout:
+        catalog.main(["--tables", "1", "--columns", "1", "--kqfcop", "0"])
+    assert "X$GEN00001" in stdout.getvalue()
+    assert "kqfcop_f" not in stdout.getvalue()
+
+
+def test_desc_all_open_files(tmp_path, capsys):
+    """desc --all should not keep a file descriptor per cache file."""
+    path = str(tmp_path / "generated")
+    catalog.main(
+        ["--tables", "200", "--columns", "2", "--kqfcop", "0", "-o", path + ".c"]
+    )
+    bench.build_executable(path)
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    # Map every cache file, and keep a few of them open
+    with patch.object(cache, "CACHE_DIR", str(tmp_path)), patch.object(
+        cachefile, "MMAP_MIN_SIZE", 0
+    ), patch.object(cache, "MAX_MAPPED", 8):
+        resource.setrlimit(
+            resource.RLIMIT_NOFILE, (len(os.listdir("/dev/fd")) + 32, hard)
+        )
+        try:
+            outputs = []
+            # Cold and warm runs
+            for _ in range(2):
+                argv = ["desc", "--all", "-b", path, "--ora-version", "19"]
+                assert cli.run(argv) == 0
+                outputs.append(capsys.readouterr().out)
+        finally:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+    assert catalog.table_name(200) in outputs[0]
+    assert outputs[1] == outputs[0]
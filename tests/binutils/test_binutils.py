@@ -0,0 +1,164 @@
+import sys
+from unittest.mock import patch
+
+import pytest
+import xinfo.binutils as binutils
+import xinfo.config.settings as settings
+import xinfo.elf as elf
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="Does not work on Windows"
+)
+
+
+@pytest.fixture(params=["elf", "binutils"])
+def backend(request):
+    """Run a test with each backend."""
+    with patch("xinfo.config.settings.backend", request.param):
+        yield request.param
+
+
+@pytest.fixture
+def cmd_output():
+    """Track commands executed by binutils."""
+    with patch.object(
+        binutils, "_get_cmd_output", wraps=binutils._get_cmd_output
+    ) as mock:
+        yield mock
+
+
+def _kqftab_names():
+    elf_ = elf.get_elf(settings.ora_binary)
+    addr, len_ = elf_.symbols["kqftab"]
+    kqftab = elf_.read(addr, len_).cast("Q")
+    return [(kqftab[i * 10 + 1], kqftab[i * 10] + 1) for i in range(3)]
+
+
+def test_get_strs_from_addrs(test_executable, backend):
+    """Strings should be resolved with both backends."""
+    addr_list = _kqftab_names()
+    strs = binutils.get_strs_from_addrs(addr_list)
+    assert [strs[addr] for addr, _ in addr_list] == [
+        "X$TABLEA1",
+        "X$TABLEB1",
+        "X$TABLEA2",
+    ]
+
+
+@pytest.mark.parametrize("jobs", [1, 4])
+def test_get_strs_from_addrs_jobs(test_executable, cmd_output, jobs):
+    """Ranges read by several workers should keep their strings in order."""
+    addr_list = _kqftab_names()
+    with patch("xinfo.config.settings.backend", "binutils"), patch(
+        "xinfo.config.settings.jobs", jobs
+    ), patch.object(binutils, "STR_READ_GAP", 0), patch.object(
+        binutils, "STR_READ_MAX", 1
+    ):
+        strs = binutils.get_strs_from_addrs(addr_list)
+    assert cmd_output.call_count == 3
+    assert [strs[addr] for addr, _ in addr_list] == [
+        "X$TABLEA1",
+        "X$TABLEB1",
+        "X$TABLEA2",
+    ]
+
+
+def test_get_strs_from_addrs_single_objdump(test_executable, cmd_output):
+    """Nearby strings should be read with a single objdump call."""
+    with patch("xinfo.config.settings.backend", "binutils"):
+        binutils.get_strs_from_addrs(_kqftab_names())
+    assert cmd_output.call_count == 1
+
+
+def test_get_strs_from_addrs_no_null(test_executable, backend):
+    """A string longer than its maximum length should raise ValueError."""
+    addr, _ = _kqftab_names()[0]
+    with pytest.raises(ValueError) as exc_info:
+        binutils.get_strs_from_addrs([(addr, 9)])
+    assert "NULL character is not found" in str(exc_info.value)
+
+
+@pytest.mark.parametrize(
+    "addr_list, expected",
+    [
+        pytest.param([], [], id="empty"),
+        pytest.param(
+            [(0x1010, 4), (0x1000, 8), (0x1000, 8)],
+            [(0x1000, 0x1014, [(0x1000, 8), (0x1010, 4)])],
+            id="merged",
+        ),
+        pytest.param(
+            [(0x1000, 8), (0x1008 + binutils.STR_READ_GAP + 1, 8)],
+            [
+                (0x1000, 0x1008, [(0x1000, 8)]),
+                (
+                    0x1009 + binutils.STR_READ_GAP,
+                    0x1011 + binutils.STR_READ_GAP,
+                    [(0x1009 + binutils.STR_READ_GAP, 8)],
+                ),
+            ],
+            id="gap",
+        ),
+        pytest.param(
+            [(0x1000, binutils.STR_READ_MAX), (0x1000 + binutils.STR_READ_MAX, 8)],
+            [
+                (
+                    0x1000,
+                    0x1000 + binutils.STR_READ_MAX,
+                    [(0x1000, binutils.STR_READ_MAX)],
+                ),
+                (
+                    0x1000 + binutils.STR_READ_MAX,
+                    0x1008 + binutils.STR_READ_MAX,
+                    [(0x1000 + binutils.STR_READ_MAX, 8)],
+                ),
+            ],
+            id="maximum read size",
+        ),
+    ],
+)
+def test_coalesce(addr_list, expected):
+    """Nearby ranges should be merged up to the maximum read size."""
+    assert list(binutils._coalesce(addr_list)) == expected
+
+
+def test_get_symbols(test_executable, backend):
+    """Both backends should resolve exact addresses in a batch."""
+    symbols = elf.get_elf(settings.ora_binary).symbols
+    f1, f2 = symbols["f1"][0], symbols["f2"][0]
+    assert binutils.get_symbols([f1, f2, f1]) == {f1: "f1", f2: "f2"}
+    with pytest.raises(ValueError) as exc_info:
+        binutils.get_symbols([f1, 1 << 40])
+    assert "Symbols not found for addresses: 0x10000000000" in str(exc_info.value)
+
+
+def test_get_symbols_inside_function(test_executable, backend):
+    """Both backends should resolve a callback address as symbol+offset."""
+    f1 = elf.get_elf(settings.ora_binary).symbols["f1"][0]
+    assert binutils.get_symbols([f1 + 4]) == {f1 + 4: "f1+0x4"}
+
+
+def test_get_symbols_alias(test_executable, backend):
+    """Both backends should resolve aliases to the first global symbol."""
+    addr = elf.get_elf(settings.ora_binary).symbols["data_start"][0]
+    assert binutils.get_symbols([addr]) == {addr: "data_start"}
+
+
+def test_parse_nm():
+    """Symbols without a size, local symbols and other lines should be
+    handled like in the symbol table."""
+    output = "\n".join(
+        [
+            "0000000000001000 t local_alias",
+            "0000000000001000 0000000000000010 T f1",
+            "0000000000001000 u unique_alias",
+            "0000000000002000 u unique",
+            "",
+            "tests/test-executable:",
+        ]
+    )
+    assert binutils._parse_nm(output, [0x1000, 0x100F, 0x1010, 0x2000]) == {
+        0x1000: "f1",
+        0x100F: "f1+0xf",
+        0x2000: "unique",
+    }
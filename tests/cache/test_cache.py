@@ -1,7 +1,16 @@
-from unittest.mock import Mock
+import hashlib
+import os
+import pickle
+import stat
+import threading
+from unittest.mock import Mock, patch
 
 import pytest
 import xinfo.cache as cache
+import xinfo.cachefile as cachefile
+import xinfo.config.settings as settings
+import xinfo.elf as elf
+from xinfo.cachefile import CacheFile
 
 OBJ = {"a": 10, "b": 20}
 
@@ -15,7 +24,7 @@ def mock_func():
 
 
 @pytest.fixture
-def tmp_cache_dir(tmp_path):
+def tmp_cache_dir(tmp_path, test_executable):
     """Overwrite the default cache directory with a temporary one."""
     cache.CACHE_DIR = tmp_path
     yield
@@ -29,6 +38,15 @@ def test_force_should_always_call_func(tmp_cache_dir, mock_func):
         assert mock_func.call_count == i + 1
 
 
+def test_forced_once_per_command(tmp_cache_dir, mock_func):
+    """A command forcing the cache should extract each file once."""
+    with patch("xinfo.config.settings.forced", set()):
+        for _ in range(2):
+            assert cache.lazy_load("test.data", force=True, func=mock_func) == OBJ
+        assert settings.forced == {cache.get_path("test.data")}
+    mock_func.assert_called_once_with()
+
+
 def test_func_is_called_when_no_data_in_cache(tmp_cache_dir, mock_func):
     """The callback function should be called when no data in cache."""
     obj = cache.lazy_load("test.data", force=False, func=mock_func)
@@ -45,3 +63,282 @@ def test_func_is_not_called_when_data_in_cache(tmp_cache_dir, mock_func):
     obj = cache.lazy_load("test.data", False, mock_func, "arg1", "arg2")
     assert obj == OBJ
     mock_func.assert_not_called()
+
+
+@pytest.fixture
+def other_binary(tmp_path):
+    """A file without an ELF build ID."""
+    path = tmp_path / "oracle"
+    path.write_bytes(b"\x00" * 1024)
+    yield str(path)
+
+
+def test_fingerprint_uses_build_id(test_executable):
+    """The ELF build ID should identify the binary."""
+    build_id = elf.get_elf(settings.ora_binary).build_id
+    assert len(build_id) == 40
+    assert cache.get_fingerprint(settings.ora_binary) == build_id
+
+
+def test_fingerprint_without_build_id(other_binary):
+    """The fingerprint of a file without a build ID changes with the file."""
+    fingerprint = cache.get_fingerprint(other_binary)
+    assert cache.get_fingerprint(other_binary) == fingerprint
+    with open(other_binary, "ab") as fp:
+        fp.write(b"\x01")
+    assert cache.get_fingerprint(other_binary) != fingerprint
+
+
+def test_cache_is_namespaced_by_binary(tmp_cache_dir, mock_func, other_binary):
+    """Each binary should have its own cache entries."""
+    cache.lazy_load("test.data", False, mock_func)
+    with patch("xinfo.config.settings.ora_binary", other_binary):
+        cache.lazy_load("test.data", False, mock_func)
+        assert mock_func.call_count == 2
+        cache.lazy_load("test.data", False, mock_func)
+        assert mock_func.call_count == 2
+    entries = set(os.listdir(cache.get_root()))
+    assert len(entries - {"binaries"}) == 2
+
+
+def test_cache_is_namespaced_by_user(tmp_cache_dir, mock_func):
+    """Each user should have their own cache directory."""
+    with patch.object(cache, "make_private_dir", side_effect=lambda path: path), patch(
+        "os.getuid", return_value=1000
+    ):
+        cache.lazy_load("test.data", False, mock_func)
+    with patch.object(cache, "make_private_dir", side_effect=lambda path: path), patch(
+        "os.getuid", return_value=1001
+    ):
+        assert cache.get_root() == os.path.join(str(cache.CACHE_DIR), "xinfo-1001")
+        cache.lazy_load("test.data", False, mock_func)
+    assert mock_func.call_count == 2
+    assert sorted(os.listdir(str(cache.CACHE_DIR))) == ["xinfo-1000", "xinfo-1001"]
+
+
+def test_cache_root_is_private(tmp_cache_dir):
+    """The cache directory should be created with mode 0700, and a directory
+    of another user should be rejected."""
+    root = cache.get_root()
+    assert stat.S_IMODE(os.stat(root).st_mode) == 0o700
+    cache._private_dirs.clear()
+    os.chmod(root, 0o755)
+    assert cache.get_root() == root
+    assert stat.S_IMODE(os.stat(root).st_mode) == 0o700
+    cache._private_dirs.clear()
+    with patch("os.getuid", return_value=os.getuid() + 1), pytest.raises(
+        RuntimeError, match="is not a directory of the current user"
+    ):
+        cache.make_private_dir(root)
+    link = os.path.join(str(cache.CACHE_DIR), "link")
+    os.symlink(root, link)
+    with pytest.raises(RuntimeError, match="is not a directory of the current user"):
+        cache.make_private_dir(link)
+
+
+def test_loaded_objects_are_kept_in_memory(tmp_cache_dir, mock_func):
+    """A cache file should be read once until it changes."""
+    cache.lazy_load("test.data", False, mock_func)
+    cache._objects.clear()
+    obj = cache.lazy_load("test.data", False, mock_func)
+    assert obj == OBJ
+    assert cache.lazy_load("test.data", False, mock_func) is obj
+    path = cache.get_path("test.data")
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1))
+    assert cache.lazy_load("test.data", False, mock_func) is not obj
+    mock_func.assert_called_once_with()
+
+
+def test_loaded_objects_are_bounded(tmp_cache_dir, mock_func):
+    """Least recently used cache files should be released beyond the limits."""
+    cache._objects.clear()
+    with patch.object(cache, "MAX_OBJECTS", 3), patch.object(cache, "MAX_MAPPED", 1):
+        with patch.object(cachefile, "MMAP_MIN_SIZE", 0):
+            objs = [cache.lazy_load("%s.data" % i, False, mock_func) for i in "01"]
+        assert [os.path.basename(p) for p in cache._objects] == ["1.data"]
+        assert objs[0] == OBJ
+        for i in "2314":
+            cache.lazy_load("%s.data" % i, False, mock_func)
+        assert [os.path.basename(p) for p in cache._objects] == [
+            "3.data",
+            "1.data",
+            "4.data",
+        ]
+    assert mock_func.call_count == 5
+
+
+def test_pickle_files_are_rebuilt(tmp_cache_dir, mock_func):
+    """Cache files of an older format should be rebuilt."""
+    path = cache.get_path("test.data")
+    os.makedirs(os.path.dirname(path))
+    with open(path, "wb") as fp:
+        pickle.dump(OBJ, fp)
+    assert cache.lazy_load("test.data", False, mock_func) == OBJ
+    mock_func.assert_called_once_with()
+    assert isinstance(cache.lazy_load("test.data", False, mock_func), CacheFile)
+    mock_func.assert_called_once_with()
+
+
+def test_rewritten_files_stay_readable(tmp_cache_dir, mock_func):
+    """Objects of a replaced cache file should stay readable."""
+    obj = cache.lazy_load("test.data", False, mock_func)
+    assert cache.lazy_load("test.data", True, mock_func) is not obj
+    assert obj == OBJ
+
+
+def test_failed_save_keeps_published_file(tmp_cache_dir, mock_func):
+    """A failed write should leave the published file and no temporary file."""
+    cache.lazy_load("test.data", False, mock_func)
+    path = cache.get_path("test.data")
+    with patch.object(cachefile, "write", side_effect=RuntimeError):
+        with pytest.raises(RuntimeError):
+            cache.lazy_load("test.data", True, mock_func)
+    assert sorted(os.listdir(os.path.dirname(path))) == ["test.data", "test.data.lock"]
+    cache._objects.clear()
+    assert cache.lazy_load("test.data", False, mock_func) == OBJ
+
+
+def _load_in_thread(force, func):
+    results = []
+    thread = threading.Thread(
+        target=lambda: results.append(cache.lazy_load("test.data", force, func))
+    )
+    thread.start()
+    return thread, results
+
+
+@pytest.mark.parametrize("force", [False, True])
+def test_waiting_loads_use_published_file(tmp_cache_dir, mock_func, force):
+    """A load waiting for the lock should use the file published meanwhile."""
+    path = cache.get_path("test.data")
+    with cache.locked(path):
+        thread, results = _load_in_thread(force, mock_func)
+        thread.join(0.2)
+        assert thread.is_alive()
+        cache._save_object_to_file(OBJ, "test.data")
+    thread.join()
+    assert results == [OBJ]
+    mock_func.assert_not_called()
+
+
+def test_forced_loads_extract_again(tmp_cache_dir, mock_func):
+    """A forced load should extract again if no file was published meanwhile."""
+    cache.lazy_load("test.data", False, mock_func)
+    path = cache.get_path("test.data")
+    with cache.locked(path):
+        thread, results = _load_in_thread(True, mock_func)
+        thread.join(0.2)
+        assert thread.is_alive()
+    thread.join()
+    assert results == [OBJ]
+    assert mock_func.call_count == 2
+
+
+@pytest.fixture
+def source():
+    """Sample function returning the bytes of a structure."""
+    mock = Mock()
+    mock.return_value = b"abc"
+    yield mock
+
+
+@pytest.fixture
+def refresh():
+    """Refresh the cache files loaded in the context."""
+    with patch("xinfo.config.settings.refresh", set()):
+        yield
+
+
+def test_source_bytes_are_parsed(tmp_cache_dir, mock_func, source):
+    """func should parse the bytes of the source function, which are hashed."""
+    obj = cache.lazy_load("test.data", False, mock_func, "arg", source=source)
+    source.assert_called_once_with("arg")
+    mock_func.assert_called_once_with(b"abc", "arg")
+    assert obj.source == hashlib.sha1(b"abc").hexdigest()
+
+
+def test_refresh_reuses_unchanged_files(tmp_cache_dir, mock_func, source):
+    """Files should be kept if the source bytes did not change."""
+    obj = cache.lazy_load("test.data", False, mock_func, source=source)
+    with patch("xinfo.config.settings.refresh", set()):
+        assert cache.lazy_load("test.data", False, mock_func, source=source) is obj
+        # Each file is checked once
+        assert cache.lazy_load("test.data", False, mock_func, source=source) is obj
+    assert source.call_count == 2
+    mock_func.assert_called_once()
+
+
+def test_refresh_extracts_changed_files(tmp_cache_dir, mock_func, source, refresh):
+    """Files should be extracted again if the source bytes changed."""
+    with patch("xinfo.config.settings.refresh", None):
+        cache.lazy_load("test.data", False, mock_func, source=source)
+    source.return_value = b"abcd"
+    obj = cache.lazy_load("test.data", False, mock_func, source=source)
+    assert obj.source == hashlib.sha1(b"abcd").hexdigest()
+    mock_func.assert_called_with(b"abcd")
+    assert mock_func.call_count == 2
+
+
+def test_refresh_extracts_other_variant(tmp_cache_dir, mock_func, source, refresh):
+    """Files should be extracted again if the settings of the parsing changed."""
+    with patch("xinfo.config.settings.refresh", None):
+        cache.lazy_load("test.data", False, mock_func, source=source, variant="a")
+    obj = cache.lazy_load("test.data", False, mock_func, source=source, variant="b")
+    assert obj.source == hashlib.sha1(b"abc\0b").hexdigest()
+    assert mock_func.call_count == 2
+
+
+def test_refresh_rebuilds_derived_files(tmp_cache_dir, mock_func):
+    """Files without a source function should be rebuilt once."""
+    cache.lazy_load("test.data", False, mock_func)
+    with patch("xinfo.config.settings.refresh", set()):
+        cache.lazy_load("test.data", False, mock_func)
+        cache.lazy_load("test.data", False, mock_func)
+    assert mock_func.call_count == 2
+
+
+def test_force_overrides_refresh(tmp_cache_dir, mock_func, source, refresh):
+    """Forced loads should extract files even if the source bytes did not change."""
+    cache.lazy_load("test.data", False, mock_func, source=source)
+    cache.lazy_load("test.data", True, mock_func, source=source)
+    assert mock_func.call_count == 2
+
+
+def test_dependencies_are_hashed(tmp_cache_dir, mock_func, source):
+    """A file should be extracted again if the source of a dependency changed."""
+    depends = ("dep.data", "missing.data")
+    cache.lazy_load("dep.data", False, Mock(return_value=OBJ), source=source)
+    cache.lazy_load("test.data", False, mock_func, source=source, depends=depends)
+    with patch("xinfo.config.settings.refresh", set()):
+        dep_source = Mock(return_value=b"changed")
+        cache.lazy_load("dep.data", False, Mock(return_value=OBJ), source=dep_source)
+        cache.lazy_load("test.data", False, mock_func, source=source, depends=depends)
+    assert mock_func.call_count == 2
+
+
+def test_refresh_reuses_previous_binary(tmp_cache_dir, mock_func, source, other_binary):
+    """Unchanged files of the binary previously found at the same path should
+    be copied."""
+    with patch("xinfo.config.settings.ora_binary", other_binary):
+        cache.lazy_load("test.data", False, mock_func, source=source)
+        cache.lazy_load("other.data", False, mock_func, source=source)
+        previous = cache.get_fingerprint(other_binary)
+        with open(other_binary, "ab") as fp:
+            fp.write(b"\x01")
+        fingerprint = cache.get_fingerprint(other_binary)
+        with patch("xinfo.config.settings.refresh", set()):
+            obj = cache.lazy_load("test.data", False, mock_func, source=source)
+            assert obj == OBJ
+            assert obj.fingerprint == fingerprint
+            assert mock_func.call_count == 2
+            # Files of the previous binary with other bytes are extracted
+            source.return_value = b"abcd"
+            cache.lazy_load("other.data", False, mock_func, source=source)
+            assert mock_func.call_count == 3
+            # Files missing in the previous binary are extracted
+            cache.lazy_load("new.data", False, mock_func, source=source)
+            assert mock_func.call_count == 4
+        with open(cache._get_binary_path()) as fp:
+            assert fp.read().split() == [fingerprint, previous]
+        assert cache._get_previous_fingerprint(previous) == fingerprint
@@ -0,0 +1,267 @@
+import io
+import pickle
+from collections import OrderedDict
+from unittest.mock import patch
+
+import pytest
+import xinfo.cachefile as cachefile
+
+FINGERPRINT = "0123456789abcdef0123456789abcdef01234567"
+
+ROWS = OrderedDict(
+    [
+        (1, OrderedDict(nam="X$KQFTA", obj=4294950912, xstruct="kqftv")),
+        (2, OrderedDict(nam="X$KSUSE", obj=4294951047, cb1="f1", xstruct="ksuse")),
+        (3, OrderedDict(nam="X$KQFTA", obj=-1, xstruct="kqftv2")),
+        (4, OrderedDict(nam="X$KSLED", obj=4294951099, cb1="f2", xstruct="ksled")),
+    ]
+)
+
+
+def _write(tmp_path, obj, indexes=(), name="test.data"):
+    path = str(tmp_path / name)
+    with open(path, "wb") as fp:
+        cachefile.write(fp, obj, FINGERPRINT, indexes)
+    return path
+
+
+@pytest.fixture
+def rows_file(tmp_path):
+    """A cache file with an index on nam."""
+    return cachefile.CacheFile(_write(tmp_path, ROWS, ("nam",)), FINGERPRINT)
+
+
+def test_rows(rows_file):
+    """Rows are read back with their fields in order."""
+    assert rows_file == ROWS
+    assert len(rows_file) == 4
+    assert list(rows_file) == [1, 2, 3, 4]
+    assert list(rows_file.values()) == list(ROWS.values())
+    assert [list(v) for v in rows_file.values()] == [list(v) for v in ROWS.values()]
+    assert rows_file[2] == ROWS[2]
+    assert rows_file.fingerprint == FINGERPRINT
+    assert repr(rows_file).startswith("CacheFile(OrderedDict(")
+
+
+def test_mapped(tmp_path):
+    """Large files are mapped until they are closed, small files are read."""
+    path = _write(tmp_path, ROWS)
+    assert not cachefile.CacheFile(path).mapped
+    with patch.object(cachefile, "MMAP_MIN_SIZE", 0):
+        cf = cachefile.CacheFile(path, FINGERPRINT)
+    assert cf.mapped
+    assert cf == ROWS
+    cf.close()
+    with pytest.raises(ValueError, match="closed"):
+        cf[1]
+
+
+@pytest.mark.parametrize("key", [0, 5, "1", None])
+def test_missing_key(rows_file, key):
+    """Keys out of the sequence are not found."""
+    assert key not in rows_file
+    with pytest.raises(KeyError):
+        rows_file[key]
+
+
+@pytest.mark.parametrize(
+    "field, value, expected",
+    [
+        ("nam", "X$KQFTA", [1, 3]),
+        ("nam", "X$KSLED", [4]),
+        ("nam", "X$AAAAA", []),
+        ("nam", "X$ZZZZZ", []),
+        ("nam", 1, []),
+        ("cb1", "f2", [4]),
+        ("obj", -1, [3]),
+        ("unknown", "f2", []),
+    ],
+)
+def test_lookup(rows_file, field, value, expected):
+    """Indexed and other fields are looked up."""
+    assert rows_file.lookup(field, value) == expected
+
+
+@pytest.mark.parametrize(
+    "indexes, value, expected",
+    [
+        ([("nam", cachefile.NOCASE)], "x$kqfta", [1, 3]),
+        ([("nam", cachefile.NOCASE)], "X$KSLED", [4]),
+        ([("nam", cachefile.NOCASE)], "X$KSLE", []),
+        (["nam"], "x$kqfta", []),
+        ([], "x$kqfta", []),
+    ],
+)
+def test_lookup_nocase(tmp_path, indexes, value, expected):
+    """Case-insensitive indexes match values in any case."""
+    cf = cachefile.CacheFile(_write(tmp_path, ROWS, indexes))
+    assert cf.lookup("nam", value) == expected
+
+
+@pytest.mark.parametrize(
+    "indexes",
+    [[("nam", cachefile.NOCASE)], ["nam"], []],
+    ids=["nocase", "index", "scan"],
+)
+@pytest.mark.parametrize(
+    "field, prefix, expected",
+    [
+        ("nam", "X$K", [1, 2, 3, 4]),
+        ("nam", "X$KS", [2, 4]),
+        ("nam", "X$KSUSE", [2]),
+        ("nam", "X$L", []),
+        ("nam", "", [1, 2, 3, 4]),
+        ("cb1", "f", [2, 4]),
+        ("obj", "1", []),
+        ("unknown", "X", []),
+    ],
+)
+def test_lookup_prefix(tmp_path, indexes, field, prefix, expected):
+    """Rows are found by prefix in file order."""
+    cf = cachefile.CacheFile(_write(tmp_path, ROWS, indexes))
+    assert cf.lookup_prefix(field, prefix) == expected
+
+
+def test_lookup_prefix_nocase(tmp_path):
+    """Case-insensitive indexes match prefixes in any case."""
+    cf = cachefile.CacheFile(_write(tmp_path, ROWS, [("nam", cachefile.NOCASE)]))
+    assert cf.lookup_prefix("nam", "x$ks") == [2, 4]
+
+
+def test_index_without_values(tmp_path):
+    """Fields which no row has can be indexed."""
+    cf = cachefile.CacheFile(_write(tmp_path, ROWS, ("func", "nam")))
+    assert cf == ROWS
+    assert cf.lookup("func", "f1") == []
+    assert cf.lookup("nam", "X$KSLED") == [4]
+
+
+def test_scan(rows_file):
+    """Rows are found by a function of a field value."""
+    assert rows_file.scan("nam", lambda v: "KQF" in v) == [1, 3]
+    assert rows_file.scan("cb1", lambda v: True) == [2, 4]
+    assert rows_file.scan("unknown", lambda v: True) == []
+
+
+def test_scalars(tmp_path):
+    """Dictionaries of scalars with string keys are stored."""
+    obj = OrderedDict([("X$KSLED", "abc"), ("X$KSUSE", "def"), ("X$A", "")])
+    cf = cachefile.CacheFile(_write(tmp_path, obj))
+    assert cf == obj
+    assert list(cf.items()) == list(obj.items())
+    assert cf["X$KSUSE"] == "def"
+    assert "X$B" not in cf
+    assert cf.lookup("value", "abc") == ["X$KSLED"]
+
+
+def test_empty(tmp_path):
+    """Empty dictionaries are stored."""
+    cf = cachefile.CacheFile(_write(tmp_path, {}))
+    assert cf == {}
+    assert 1 not in cf
+
+
+@pytest.mark.parametrize(
+    "obj, indexes, message",
+    [
+        ({1: {"a": 1.5}}, (), "Cannot store field a = 1.5"),
+        ({1: {"a": True}}, (), "Cannot store field a = True"),
+        ({1: {"a": 1}, 2: {"a": "b"}}, (), "Field a has values of several types"),
+        ({1: 1, "b": 2}, (), "Keys have several types"),
+        ({(1,): 1}, (), "Cannot store key"),
+        ({1: {"f%d" % i: i for i in range(65)}}, (), "Too many fields: 65"),
+        ({1: {"f%d" % i: i for i in range(64)}}, ("b",), "Too many fields: 65"),
+        (
+            {1: {"a": 1}},
+            (("a", cachefile.NOCASE),),
+            "Cannot index integer field a without case",
+        ),
+    ],
+)
+def test_write_errors(obj, indexes, message):
+    """Unsupported dictionaries are rejected."""
+    with pytest.raises(ValueError, match=message.replace("$", r"\$")):
+        cachefile.write(io.BytesIO(), obj, FINGERPRINT, indexes)
+
+
+def _patch_header(path, **values):
+    with open(path, "rb") as fp:
+        data = bytearray(fp.read())
+    fields = list(cachefile.HEADER.unpack_from(data))
+    names = ["magic", "version", "flags", "key_type", "nfields", "nrows"]
+    names += ["nindexes", "fields", "rows", "indexes", "strings", "size"]
+    names += ["fingerprint", "source"]
+    for name, value in values.items():
+        fields[names.index(name)] = value
+    cachefile.HEADER.pack_into(data, 0, *fields)
+    with open(path, "wb") as fp:
+        fp.write(data)
+
+
+@pytest.mark.parametrize(
+    "header, message",
+    [
+        (dict(magic=b"XXXX"), "is not a cache file"),
+        (dict(version=0), "has format version 0 instead of %d" % cachefile.VERSION),
+        (dict(size=1), "is truncated"),
+        (dict(nrows=5), "is corrupted"),
+    ],
+)
+def test_invalid_header(tmp_path, header, message):
+    """Files of other formats are rejected."""
+    path = _write(tmp_path, ROWS)
+    _patch_header(path, **header)
+    with pytest.raises(ValueError, match=message):
+        cachefile.CacheFile(path)
+
+
+def test_other_files(tmp_path):
+    """Short files and pickles are rejected."""
+    path = str(tmp_path / "test.data")
+    with open(path, "wb") as fp:
+        fp.write(b"XINF")
+    with pytest.raises(ValueError, match="is not a cache file"):
+        cachefile.CacheFile(path)
+    with open(path, "wb") as fp:
+        pickle.dump(ROWS, fp)
+    with pytest.raises(ValueError, match="is not a cache file"):
+        cachefile.CacheFile(path)
+
+
+def test_truncated(tmp_path):
+    """Truncated files are rejected."""
+    path = _write(tmp_path, ROWS)
+    with open(path, "r+b") as fp:
+        fp.truncate(cachefile.HEADER.size + 10)
+    with pytest.raises(ValueError, match="is truncated"):
+        cachefile.CacheFile(path)
+
+
+def test_other_fingerprint(tmp_path):
+    """Files of another binary are rejected, and closed."""
+    path = _write(tmp_path, ROWS)
+    with pytest.raises(ValueError, match="belongs to another binary: %s" % FINGERPRINT):
+        cachefile.CacheFile(path, "other")
+    with patch.object(cachefile, "MMAP_MIN_SIZE", 0), patch.object(
+        cachefile.CacheFile, "close", autospec=True
+    ) as close:
+        with pytest.raises(ValueError, match="belongs to another binary"):
+            cachefile.CacheFile(path, "other")
+    close.assert_called_once()
+
+
+def test_source(tmp_path):
+    """The hash of the source bytes is stored in the header."""
+    path = str(tmp_path / "test.data")
+    with open(path, "wb") as fp:
+        cachefile.write(fp, ROWS, FINGERPRINT, source="abc")
+    assert cachefile.CacheFile(path).source == "abc"
+    assert cachefile.CacheFile(_write(tmp_path, ROWS, name="other.data")).source == ""
+
+
+def test_row_size(tmp_path):
+    """Rows have a fixed width of 8 bytes per cell."""
+    path = _write(tmp_path, ROWS)
+    cf = cachefile.CacheFile(path)
+    # Mask, key and three string and one integer fields
+    assert cf._row.size == 8 * 6
@@ -0,0 +1,200 @@
+import gc
+import sys
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+import xinfo
+import xinfo.cache as cache
+import xinfo.catalog as catalog_
+import xinfo.config.settings as settings
+import xinfo.x.columns as xcolumns
+import xinfo.x.tables as xtables
+from xinfo.catalog import Catalog, get_catalog
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="Does not work on Windows"
+)
+
+
+@pytest.fixture
+def binary(request, tmp_path):
+    """Path of the test executable, with an empty cache directory."""
+    with patch.object(cache, "CACHE_DIR", str(tmp_path)), patch(
+        "xinfo.config.settings.force", False
+    ), patch("xinfo.config.settings.refresh", None):
+        yield request.config.getoption("--test-executable")
+
+
+@pytest.fixture
+def catalog(binary):
+    return Catalog(binary, 19)
+
+
+def test_structures(catalog):
+    """Structures should be loaded from the binary of the catalog."""
+    assert [v["nam"] for v in catalog.tables.values()] == [
+        "X$TABLEA1",
+        "X$TABLEB1",
+        "X$TABLEA2",
+    ]
+    assert catalog.kqftab[1]["xstruct"] == "tablea1"
+    assert catalog.kqftap[1]["xstruct"] == "tablea1_c"
+    assert catalog.kqfcop[4]["func"] == "f1"
+    assert repr(catalog) == "Catalog(%r, 19)" % catalog.binary
+
+
+def test_tables(catalog):
+    """Tables should be found by name and expression in any case."""
+    assert catalog.table("x$tablea2")[0] == 3
+    assert [k for k, _ in catalog.match("x$table?1")] == [1, 2]
+    with pytest.raises(ValueError, match=r"Table X\$NO_SUCH_TABLE not found"):
+        catalog.table("X$NO_SUCH_TABLE")
+
+
+def test_columns(catalog):
+    """Columns of a table should be extracted once."""
+    columns = catalog.columns("x$tablea1")
+    assert [v["nam"] for v in columns.values()] == ["COL1", "COL2"]
+    with patch.object(xcolumns, "_parse_xdesc", side_effect=AssertionError):
+        assert catalog.columns("X$TABLEA1") is columns
+    with pytest.raises(ValueError, match=r"Table X\$TABLEA2 has no kqftap entry"):
+        catalog.columns("X$TABLEA2")
+
+
+def test_iter_columns(catalog):
+    """Columns of several tables should be read with the catalog settings."""
+    assert [
+        (table, list(v["nam"] for v in columns.values()))
+        for table, columns in catalog.iter_columns([("X$TABLEA1", "tablea1_c")])
+    ] == [("X$TABLEA1", ["COL1", "COL2"])]
+
+
+def test_settings_are_restored(binary):
+    """Loads should use the binary, version and backend of the catalog."""
+    catalog = Catalog(binary, 19, backend="binutils", jobs=2)
+    seen = []
+
+    def get_tables():
+        seen.append((settings.ora_binary, settings.ora_version, settings.backend))
+        return {}
+
+    with patch("xinfo.config.settings.ora_binary", None), patch(
+        "xinfo.config.settings.ora_version", None
+    ), patch.object(xtables, "get_tables", get_tables):
+        assert catalog.tables == {}
+        assert settings.ora_binary is None and settings.ora_version is None
+    assert seen == [(binary, 19, "binutils")]
+
+
+def test_threads(catalog):
+    """Threads sharing a catalog should extract each structure once."""
+    catalog.tables
+    with patch.object(
+        xcolumns, "_parse_xdesc", wraps=xcolumns._parse_xdesc
+    ) as mock, ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: catalog.columns("X$TABLEA1"), range(32)))
+    assert all(columns is results[0] for columns in results)
+    mock.assert_called_once()
+
+
+def test_catalogs_load_at_once(binary):
+    """A load of a catalog should not block loads of other catalogs, and each
+    load should see the binary of its catalog."""
+    first, second = Catalog(binary, 19), Catalog("other", 19)
+    started, release = threading.Event(), threading.Event()
+    seen = []
+
+    def get_tables():
+        seen.append(settings.ora_binary)
+        if settings.ora_binary == binary:
+            started.set()
+            assert release.wait(5)
+        return {}
+
+    with patch.object(xtables, "get_tables", get_tables), ThreadPoolExecutor(
+        max_workers=1
+    ) as executor:
+        future = executor.submit(lambda: first.tables)
+        assert started.wait(5)
+        assert second.tables == {}
+        release.set()
+        assert future.result() == {}
+    assert seen == [binary, "other"]
+
+
+def test_iter_columns_unlocked(catalog):
+    """Nothing should be locked and the settings should not change while the
+    caller handles a table, and columns should be extracted once."""
+    tables = [("X$TABLEA1", "tablea1_c"), ("X$TABLEA1_COPY", "tablea1_c")]
+    with patch("xinfo.config.settings.ora_binary", None):
+        for table, columns in catalog.iter_columns(tables):
+            assert settings.ora_binary is None
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                assert executor.submit(lambda: catalog.kqftab).result(5)
+    with patch.object(xcolumns, "_parse_xdesc", side_effect=AssertionError):
+        assert list(catalog.iter_columns(tables[1:])) == [("X$TABLEA1_COPY", columns)]
+        assert catalog.columns("X$TABLEA1") is columns
+
+
+def test_iter_columns_closed_by_other_thread(catalog):
+    """An iteration should be closed by any thread."""
+    columns = catalog.iter_columns([("X$TABLEA1", "tablea1_c")])
+    assert next(columns)[0] == "X$TABLEA1"
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        executor.submit(columns.close).result(5)
+
+
+def test_files_are_owned_by_the_cache(catalog):
+    """A catalog should not keep the cache files released by the cache."""
+    columns = weakref.ref(catalog.columns("X$TABLEA1"))
+    cache._objects.clear()
+    gc.collect()
+    assert columns() is None
+    assert catalog.columns("X$TABLEA1") is not None
+
+
+def test_forced_once(catalog):
+    """A catalog forcing the cache outside commands should extract each
+    structure once."""
+    with patch("xinfo.config.settings.force", True), patch(
+        "xinfo.config.settings.forced", None
+    ), patch.object(xcolumns, "_parse_xdesc", wraps=xcolumns._parse_xdesc) as mock:
+        for _ in range(2):
+            catalog.columns("X$TABLEA1")
+    mock.assert_called_once()
+
+
+def test_package_attribute():
+    """Catalog should be imported from the package on first use."""
+    assert xinfo.Catalog is Catalog
+    with pytest.raises(AttributeError):
+        xinfo.NoSuchName
+
+
+def test_get_catalog(binary):
+    """Commands should share the catalog of a binary unless the cache is
+    forced or refreshed."""
+    with patch.dict(catalog_._catalogs, clear=True), patch(
+        "xinfo.config.settings.ora_binary", binary
+    ), patch("xinfo.config.settings.ora_version", 19):
+        catalog = get_catalog()
+        assert get_catalog() is catalog
+        assert catalog.binary == binary
+        with patch("xinfo.config.settings.force", True):
+            assert get_catalog() is not catalog
+        with patch("xinfo.config.settings.refresh", set()):
+            assert get_catalog() is not catalog
+
+
+def test_get_catalog_bounded(binary):
+    """Only the most recently used catalogs should be kept."""
+    with patch.dict(catalog_._catalogs, clear=True), patch.object(
+        catalog_, "MAX_CATALOGS", 1
+    ), patch("xinfo.config.settings.ora_binary", binary):
+        for version in (19, 23):
+            with patch("xinfo.config.settings.ora_version", version):
+                get_catalog()
+        assert [key[1] for key in catalog_._catalogs] == [23]
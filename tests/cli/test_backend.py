@@ -0,0 +1,43 @@
+from unittest.mock import patch
+
+import pytest
+import xinfo.cli as cli
+import xinfo.config.settings as settings
+
+
+@pytest.fixture
+def cmd_args(request):
+    """Create input arguments for the command."""
+    with patch(
+        "sys.argv",
+        [
+            "program",
+            "list",
+            "--ora-binary",
+            "some_path",
+            "--ora-version",
+            "19",
+            "X$TABLE",
+        ],
+    ) as mock_argv:
+        if request.param:
+            mock_argv.extend(request.param)
+        yield mock_argv
+
+
+@pytest.fixture
+def backend():
+    """Restore the backend setting changed by the CLI."""
+    with patch("xinfo.config.settings.backend", settings.backend):
+        yield
+
+
+@pytest.mark.parametrize(
+    "cmd_args, expected",
+    [((), "elf"), (("--backend", "binutils"), "binutils")],
+    indirect=["cmd_args"],
+)
+def test_backend(mock_command, mock_exists, backend, cmd_args, expected):
+    """The ELF reader is used by default, binutils when specified."""
+    cli.main()
+    assert settings.backend == expected
@@ -0,0 +1,91 @@
+import importlib
+import logging
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+import xinfo.cli as cli
+
+LOGGING_CONFIG = """\
+version: 1
+root:
+  level: WARNING
+"""
+
+
+@pytest.mark.parametrize("cmd", list(cli.COMMANDS))
+def test_registry(cmd):
+    """The registry matches the arguments of command modules."""
+    module, help_ = cli.COMMANDS[cmd]
+    name, (action, args_cb, module_help) = importlib.import_module(
+        module
+    ).get_cmd_args()
+    assert name == cmd
+    assert module_help == help_
+    assert cli._load_command(cmd) == (action, args_cb, module_help)
+
+
+@pytest.mark.parametrize("cmd", list(cli.COMMANDS))
+def test_command_help(cmd, capsys):
+    """Each command has its own arguments."""
+    with pytest.raises(SystemExit) as e:
+        cli.run([cmd, "-h"])
+    assert e.value.code == 0
+    out = capsys.readouterr().out
+    assert "--ora-binary" in out
+    assert cli.COMMANDS[cmd][1] in out
+
+
+def test_main_help(capsys):
+    """All commands are listed without loading them."""
+    with pytest.raises(SystemExit) as e:
+        cli.run(["-h"])
+    assert e.value.code == 0
+    out = capsys.readouterr().out
+    for cmd, (_, help_) in cli.COMMANDS.items():
+        assert cmd in out
+        assert help_ in out
+
+
+def test_logging_config(tmp_path):
+    """A YAML logging configuration replaces the default one."""
+    config_path = tmp_path / "logging.yaml"
+    config_path.write_text(LOGGING_CONFIG)
+    with patch.dict("os.environ", {cli.LOGGING_CONFIG_ENV: str(config_path)}), patch(
+        "logging.config.dictConfig"
+    ) as mock_config, patch.object(cli, "LOGGER", None):
+        cli._setup_logging()
+        assert cli.LOGGER is logging.getLogger(cli.__name__)
+    mock_config.assert_called_once_with(dict(version=1, root=dict(level="WARNING")))
+
+
+def test_logging_config_without_yaml(tmp_path):
+    """A YAML logging configuration needs the optional PyYAML."""
+    config_path = tmp_path / "logging.yaml"
+    config_path.write_text(LOGGING_CONFIG)
+    with patch.dict(
+        "os.environ", {cli.LOGGING_CONFIG_ENV: str(config_path)}
+    ), patch.dict("sys.modules", {"yaml": None}), pytest.raises(
+        RuntimeError, match=r"xinfo\[yaml\]"
+    ):
+        cli.configure_logging()
+
+
+def test_default_logging():
+    """Logging is configured in code once per process."""
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+    with patch.dict("os.environ"), patch.object(cli, "LOGGER", None):
+        os.environ.pop(cli.LOGGING_CONFIG_ENV, None)
+        try:
+            cli._setup_logging()
+            added = [h for h in root.handlers if h not in handlers]
+            assert len(added) == 1
+            assert added[0].stream is sys.stdout
+            assert added[0].formatter._fmt == cli.LOG_FORMAT
+            # Configured only once
+            cli._setup_logging()
+            assert [h for h in root.handlers if h not in handlers] == added
+        finally:
+            root.handlers[:] = handlers
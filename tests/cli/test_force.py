@@ -34,6 +34,8 @@ def test_force_false_by_default(mock_command, mock_exists, cmd_args):
 
 @pytest.mark.parametrize("cmd_args", [("--force",)], indirect=["cmd_args"])
 def test_force_true_when_specified(mock_command, mock_exists, cmd_args):
-    """force is set to True when specified."""
-    cli.main()
-    assert settings.force
+    """force is set to True when specified, with no file extracted yet."""
+    with patch("xinfo.config.settings.forced", None):
+        cli.main()
+        assert settings.force
+        assert settings.forced == set()
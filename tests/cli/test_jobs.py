@@ -0,0 +1,53 @@
+from unittest.mock import patch
+
+import pytest
+import xinfo.cli as cli
+import xinfo.config.settings as settings
+
+
+@pytest.fixture
+def cmd_args(request):
+    """Create input arguments for the command."""
+    with patch(
+        "sys.argv",
+        [
+            "program",
+            "list",
+            "--ora-binary",
+            "some_path",
+            "--ora-version",
+            "19",
+            "X$TABLE",
+        ],
+    ) as mock_argv:
+        if request.param:
+            mock_argv.extend(request.param)
+        yield mock_argv
+
+
+@pytest.fixture
+def jobs():
+    """Restore the jobs setting changed by the CLI."""
+    with patch("xinfo.config.settings.jobs", settings.jobs):
+        yield
+
+
+@pytest.mark.parametrize(
+    "cmd_args, expected",
+    [((), 1), (("--jobs", "4"), 4), (("-j", "16"), 16)],
+    indirect=["cmd_args"],
+)
+def test_jobs(mock_command, mock_exists, jobs, cmd_args, expected):
+    """A single worker is used by default."""
+    cli.main()
+    assert settings.jobs == expected
+
+
+@pytest.mark.parametrize(
+    "cmd_args", [("--jobs", "0"), ("--jobs", "x")], indirect=["cmd_args"]
+)
+def test_invalid_jobs(mock_exists, jobs, cmd_args, capsys):
+    """The number of jobs should be a positive integer."""
+    with pytest.raises(SystemExit):
+        cli.main()
+    assert "is not a positive integer" in capsys.readouterr().err
@@ -0,0 +1,68 @@
+import json
+import sys
+from unittest.mock import patch
+
+import pytest
+import xinfo.cli as cli
+import xinfo.profiler as profiler
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="Does not work on Windows"
+)
+
+
+@pytest.fixture
+def argv(request):
+    """Command line arguments running list for the test executable."""
+    with patch("xinfo.config.settings.forced", None):
+        yield [
+            "list",
+            "-b",
+            request.config.getoption("--test-executable"),
+            "--ora-version",
+            "19",
+            "-f",
+        ]
+
+
+def test_profile(argv, capsys):
+    """Phase statistics should be printed to stderr."""
+    with patch("xinfo.config.settings.force", False):
+        assert cli.run(argv + ["--profile"]) == 0
+    phases = [line.split()[0] for line in capsys.readouterr().err.splitlines()]
+    assert phases[0] == "phase"
+    assert {"kqftab.parse", "cache.lazy_load", "formatter", "command"} <= set(phases)
+    assert not profiler.is_enabled()
+
+
+def test_trace(argv, tmp_path, capsys):
+    """Phases should be written to the trace file."""
+    path = tmp_path / "trace.json"
+    with patch("xinfo.config.settings.force", False):
+        assert cli.run(argv + ["--trace", str(path)]) == 0
+    names = {e["name"] for e in json.loads(path.read_text())["traceEvents"]}
+    assert {"kqftab.parse", "command"} <= names
+    assert capsys.readouterr().err == ""
+
+
+def test_no_profile(argv):
+    """Profiling should be disabled by default."""
+    with patch("xinfo.config.settings.force", False), patch.object(
+        profiler, "enable"
+    ) as mock_enable:
+        assert cli.run(argv) == 0
+    mock_enable.assert_not_called()
+
+
+@pytest.mark.parametrize("command", [["desc", "--all"], ["where-used", "*"]])
+def test_forced_structures_parsed_once(argv, capsys, command):
+    """A forced command should extract each structure once."""
+    argv = command + argv[1:] + ["--profile"]
+    with patch("xinfo.config.settings.force", False):
+        assert cli.run(argv) == 0
+    calls = {
+        line.split()[0]: line.split()[1]
+        for line in capsys.readouterr().err.splitlines()
+    }
+    assert calls["kqftab.parse"] == calls["kqfcop.parse"] == "1"
+    assert calls["kqftap.parse"] == "1"
@@ -0,0 +1,41 @@
+from unittest.mock import patch
+
+import pytest
+import xinfo.cli as cli
+import xinfo.config.settings as settings
+
+
+@pytest.fixture
+def cmd_args(request):
+    """Create input arguments for the command."""
+    with patch(
+        "sys.argv",
+        [
+            "program",
+            "list",
+            "--ora-binary",
+            "some_path",
+            "--ora-version",
+            "19",
+            "X$TABLE",
+        ],
+    ) as mock_argv:
+        if request.param:
+            mock_argv.extend(request.param)
+        yield mock_argv
+
+
+@pytest.mark.parametrize("cmd_args", [()], indirect=["cmd_args"])
+def test_refresh_off_by_default(mock_command, mock_exists, cmd_args):
+    """refresh is not set by default."""
+    with patch("xinfo.config.settings.refresh", None):
+        cli.main()
+        assert settings.refresh is None
+
+
+@pytest.mark.parametrize("cmd_args", [("--refresh",)], indirect=["cmd_args"])
+def test_refresh_when_specified(mock_command, mock_exists, cmd_args):
+    """refresh starts with no checked cache files when specified."""
+    with patch("xinfo.config.settings.refresh", None):
+        cli.main()
+        assert settings.refresh == set()
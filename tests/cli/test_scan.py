@@ -0,0 +1,40 @@
+import json
+import os
+import shutil
+import sys
+from unittest.mock import patch
+
+import pytest
+import xinfo.cache as cache
+import xinfo.cli as cli
+import xinfo.config.settings as settings
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="Does not work on Windows"
+)
+
+
+def test_scan(request, tmp_path, capsys):
+    """Binaries under roots and given with -b should be summarized."""
+    executable = request.config.getoption("--test-executable")
+    (tmp_path / "home" / "bin").mkdir(parents=True)
+    binary = str(tmp_path / "home" / "bin" / "oracle")
+    shutil.copy(executable, binary)
+    with patch.object(cache, "CACHE_DIR", str(tmp_path / "cache")), patch(
+        "xinfo.config.settings.force", False
+    ), patch("xinfo.config.settings.refresh", None), patch(
+        "xinfo.config.settings.ora_binary"
+    ), patch.dict(
+        "os.environ"
+    ):
+        os.environ.pop("ORACLE_HOME", None)
+        argv = ["scan", str(tmp_path), "-b", executable, "--ora-version", "19"]
+        assert cli.run(argv + ["-o", "json"]) == 0
+        # -b does not set the binary of the settings
+        assert not isinstance(settings.ora_binary, list)
+    rows = json.loads(capsys.readouterr().out)
+    assert [(r["status"], r["tables"]) for r in rows.values()] == [
+        ("extracted", 3),
+        ("duplicate", ""),
+    ]
+    assert rows["2"]["binary"] == os.path.abspath(executable)
@@ -0,0 +1,91 @@
+import os
+import subprocess
+import sys
+
+import pytest
+import xinfo
+
+# Modules only some commands or output formats need
+DEFERRED_MODULES = (
+    "logging.config",
+    "prettytable",
+    "sqlite3",
+    "yaml",
+    "xinfo.db",
+    "xinfo.diff",
+    "xinfo.scan",
+    "xinfo.server",
+)
+
+# Cumulative import time of xinfo.cli in microseconds, several times the
+# usual time to leave room for slow machines
+IMPORT_BUDGET = 250000
+
+
+def _env():
+    env = dict(os.environ)
+    env["XINFO_NO_DAEMON"] = "1"
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(xinfo.__file__)))
+    env["PYTHONPATH"] = os.pathsep.join(
+        p for p in (package_dir, env.get("PYTHONPATH")) if p
+    )
+    return env
+
+
+def _imported_modules(argv):
+    """Run xinfo in a new process. Return the names of imported modules."""
+    script = (
+        "import sys\n"
+        "import xinfo.cli as cli\n"
+        "try:\n"
+        "    cli.run(sys.argv[1:])\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "sys.stderr.write('\\n'.join(sys.modules))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script] + argv,
+        env=_env(),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    return set(result.stderr.splitlines())
+
+
+def _import_times(argv):
+    """Run xinfo with -X importtime. Return module name to cumulative time."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "xinfo"] + argv,
+        env=_env(),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize(
+    "argv, command",
+    [(["--version"], None), (["list", "-h"], "list"), (["desc", "-h"], "desc")],
+)
+def test_deferred_imports(argv, command):
+    """Startup imports only the module of the command being run."""
+    modules = _imported_modules(argv)
+    assert "xinfo.cli" in modules
+    expected = {"xinfo.commands.%s" % command} if command else set()
+    assert {m for m in modules if m.startswith("xinfo.commands.")} == expected
+    assert not [m for m in DEFERRED_MODULES if m in modules]
+
+
+def test_import_budget():
+    """The CLI module is imported within the budget."""
+    times = _import_times(["--version"])
+    assert times["xinfo.cli"] < IMPORT_BUDGET
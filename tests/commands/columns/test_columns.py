@@ -0,0 +1,56 @@
+import sys
+from argparse import Namespace
+
+import pytest
+from xinfo.commands.columns import find_columns
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="Does not work on Windows"
+)
+
+
+@pytest.fixture
+def columns_args(request):
+    """Create input arguments for the columns command."""
+    args = Namespace(
+        command="columns",
+        pattern="*",
+        dty=None,
+        siz=None,
+        func=None,
+        output="table",
+    )
+    for k, v in request.param.items():
+        setattr(args, k, v)
+    yield args
+
+
+@pytest.mark.parametrize(
+    "columns_args, expected",
+    [
+        pytest.param({"pattern": "col*"}, ["COL1", "COL2"], id="expression"),
+        pytest.param({"pattern": "*", "dty": 2}, ["COL2"], id="dty"),
+        pytest.param({"pattern": "X"}, [], id="no match"),
+    ],
+    indirect=["columns_args"],
+)
+def test_columns(test_executable, columns_args, expected, mock_formatter):
+    """Matching columns should be numbered with their table."""
+    find_columns(columns_args)
+    mock_formatter.assert_called_once()
+    command_name, response = mock_formatter.call_args[0]
+    assert command_name == "columns"
+    assert list(response) == list(range(1, len(expected) + 1))
+    assert [row["nam"] for row in response.values()] == expected
+    assert all(row["table"] == "X$TABLEA1" for row in response.values())
+
+
+@pytest.mark.parametrize(
+    "columns_args", [{"pattern": "COL2", "output": "csv"}], indirect=["columns_args"]
+)
+def test_columns_csv(test_executable, columns_args, capsys):
+    """Columns should be written as CSV."""
+    find_columns(columns_args)
+    assert capsys.readouterr().out == (
+        "table,xstruct,cno,nam,dty,siz,func\nX$TABLEA1,tablea1_c,2,COL2,2,1,f1\n"
+    )
@@ -1,3 +1,4 @@
+from collections import OrderedDict
 from unittest.mock import patch
 
 import pytest
@@ -6,6 +7,12 @@ from xinfo.formatter import Formatter
 
 @pytest.fixture
 def mock_formatter():
-    """Mock Formatter."""
-    with patch.object(Formatter, "__call__") as mock:
+    """Mock Formatter. Streamed responses are collected into an OrderedDict."""
+
+    def write(self, command_name, response, file=None, fields=None):
+        mock(command_name, OrderedDict(response))
+
+    with patch.object(Formatter, "__call__") as mock, patch.object(
+        Formatter, "write", write
+    ):
         yield mock
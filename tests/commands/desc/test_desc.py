@@ -1,7 +1,7 @@
 import sys
 from argparse import Namespace
 from collections import OrderedDict
-from unittest.mock import ANY
+from unittest.mock import ANY, patch
 
 import pytest
 from xinfo.commands.desc import describe_table
@@ -18,6 +18,7 @@ def desc_args(request):
     args = Namespace(
         command="desc",
         table=None,
+        all=False,
         output="table",
         ora_version=19,
     )
@@ -75,6 +76,7 @@ TABLEA1 = [
     "desc_args, expected",
     [
         pytest.param(*({"table": "X$TABLEA1"}, TABLEA1), id="desc with table name"),
+        pytest.param(*({"table": "x$tablea1"}, TABLEA1), id="desc in lower case"),
     ],
     indirect=["desc_args"],
 )
@@ -94,3 +96,47 @@ def test_desc_no_such_table(test_executable, desc_args):
     with pytest.raises(ValueError) as exc_info:
         describe_table(desc_args)
     assert "Table X$NO_SUCH_TABLE not found" in str(exc_info)
+
+
+@pytest.mark.parametrize(
+    "desc_args",
+    [pytest.param({"table": "X$TABLEA2"}, id="desc a table without kqftap")],
+    indirect=["desc_args"],
+)
+def test_desc_no_kqftap(test_executable, desc_args):
+    """The desc command should throw an error for tables without columns."""
+    with pytest.raises(ValueError, match=r"Table X\$TABLEA2 has no kqftap entry"):
+        describe_table(desc_args)
+
+
+@pytest.mark.parametrize(
+    "desc_args",
+    [
+        pytest.param({"table": "X$TABLEA*", "output": "json"}, id="expression"),
+        pytest.param({"all": True, "output": "json"}, id="all"),
+    ],
+    indirect=["desc_args"],
+)
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_desc_tables(test_executable, desc_args, mock_formatter, jobs):
+    """Columns of matching tables should be returned keyed by table name.
+    Tables without a kqftap entry are skipped."""
+    with patch("xinfo.config.settings.jobs", jobs):
+        describe_table(desc_args)
+    mock_formatter.assert_called_once_with(
+        "desc", OrderedDict({"X$TABLEA1": OrderedDict(TABLEA1)})
+    )
+
+
+@pytest.mark.parametrize(
+    "desc_args", [{"table": "X$TABLE?1", "output": "table"}], indirect=["desc_args"]
+)
+def test_desc_tables_flattened(test_executable, desc_args, mock_formatter):
+    """Tabular output should have one row per column with the table name."""
+    describe_table(desc_args)
+    mock_formatter.assert_called_once_with(
+        "desc",
+        OrderedDict(
+            (cno, OrderedDict(table="X$TABLEA1", **col)) for cno, col in TABLEA1
+        ),
+    )
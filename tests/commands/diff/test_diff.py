@@ -0,0 +1,42 @@
+import sys
+from argparse import Namespace
+from collections import OrderedDict
+from unittest.mock import patch
+
+import pytest
+import xinfo.diff as xdiff
+from xinfo.commands.diff import diff_binaries
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="Does not work on Windows"
+)
+
+
+def _args(*ora_binary):
+    return Namespace(command="diff", ora_binary=list(ora_binary), output="table")
+
+
+def test_diff(tmp_path, mock_formatter):
+    """Changes should be passed to the formatter numbered from 1."""
+    old, new = tmp_path / "old", tmp_path / "new"
+    old.touch()
+    new.touch()
+    rows = [OrderedDict(table="X$TABLEA1", change="added")]
+    with patch.object(xdiff, "diff", return_value=iter(rows)) as mock_diff:
+        diff_binaries(_args(str(old), str(new)))
+    mock_diff.assert_called_once_with(str(old), str(new))
+    mock_formatter.assert_called_once_with("diff", OrderedDict(enumerate(rows, 1)))
+
+
+@pytest.mark.parametrize(
+    "ora_binary, message",
+    [
+        pytest.param(["old"], "Two Oracle binaries should be specified", id="one"),
+        pytest.param(["old", "new"], "old does not exist", id="missing"),
+    ],
+)
+def test_diff_errors(ora_binary, message):
+    """Exactly two existing binaries should be specified."""
+    with pytest.raises(ValueError) as exc_info:
+        diff_binaries(_args(*ora_binary))
+    assert message in str(exc_info.value)
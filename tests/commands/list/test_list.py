@@ -129,6 +129,13 @@ TABLEA2 = (
             ),
             id="list without match",
         ),
+        pytest.param(
+            *(
+                {"expr": "x$tablea1"},
+                [TABLEA1],
+            ),
+            id="list in lower case",
+        ),
         pytest.param(
             *(
                 {"expr": "X$TABLEA1", "with_kqftap": True},
@@ -136,9 +143,40 @@ TABLEA2 = (
             ),
             id="list with kqftap",
         ),
+        pytest.param(
+            *(
+                {"expr": "X$TABLE?2", "with_kqftap": True},
+                [TABLEA2],
+            ),
+            id="list with kqftap without an entry",
+        ),
     ],
     indirect=["list_args"],
 )
 def test_list(test_executable, list_args, expected, mock_formatter):
     list_tables(list_args)
     mock_formatter.assert_called_once_with("list", OrderedDict(expected))
+
+
+@pytest.mark.parametrize(
+    "list_args, expected",
+    [
+        pytest.param(
+            {"expr": "X$TABLEA*", "output": "ndjson"},
+            '{"obj": 1, "ver": 1, "nam_ptr": ',
+            id="ndjson",
+        ),
+        pytest.param(
+            {"expr": "X$TABLEA*", "output": "csv"},
+            "obj,ver,nam_ptr,nam,xstruct_nam_ptr,xstruct,typ,flg,rsz,coc\n1,1,0x",
+            id="csv",
+        ),
+    ],
+    indirect=["list_args"],
+)
+def test_list_streamed(test_executable, list_args, expected, capsys):
+    """Streamed formats should write one line per table."""
+    list_tables(list_args)
+    out = capsys.readouterr().out
+    assert out.startswith(expected)
+    assert out.count("\n") == 2 + (list_args.output == "csv")
@@ -0,0 +1,38 @@
+import sys
+from argparse import Namespace
+from collections import OrderedDict
+from unittest.mock import patch
+
+import pytest
+import xinfo.scan as xscan
+from xinfo.commands.scan import scan_homes
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="Does not work on Windows"
+)
+
+
+def _args(roots, binaries=()):
+    return Namespace(
+        command="scan",
+        roots=list(roots),
+        binaries=list(binaries),
+        ora_version=19,
+        output="table",
+    )
+
+
+def test_scan(mock_formatter):
+    """Summary rows should be passed to the formatter numbered from 1."""
+    args = _args(["/u01"], ["/u02/bin/oracle"])
+    rows = [OrderedDict(binary="/u01/app/bin/oracle", status="extracted")]
+    with patch.object(xscan, "scan", return_value=rows) as mock_scan:
+        scan_homes(args)
+    mock_scan.assert_called_once_with(["/u01", "/u02/bin/oracle"], 19)
+    mock_formatter.assert_called_once_with("scan", OrderedDict(enumerate(rows, 1)))
+
+
+def test_scan_nothing():
+    """Roots or binaries should be specified."""
+    with pytest.raises(ValueError, match="Specify directories"):
+        scan_homes(_args([]))
@@ -0,0 +1,22 @@
+import sys
+from argparse import Namespace
+from collections import OrderedDict
+from unittest.mock import patch
+
+import pytest
+import xinfo.db as db
+from xinfo.commands.sql import run_query
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="Does not work on Windows"
+)
+
+
+def test_sql(mock_formatter):
+    """Query rows should be passed to the formatter numbered from 1."""
+    rows = [OrderedDict(nam="X$TABLEA1"), OrderedDict(nam="X$TABLEA2")]
+    args = Namespace(command="sql", query="SELECT nam FROM kqftab", output="table")
+    with patch.object(db, "iter_query", return_value=iter(rows)) as mock_query:
+        run_query(args)
+    mock_query.assert_called_once_with("SELECT nam FROM kqftab")
+    mock_formatter.assert_called_once_with("sql", OrderedDict(enumerate(rows, 1)))
@@ -0,0 +1,92 @@
+import csv
+import io
+import json
+import sys
+
+import pytest
+import xinfo.cli as cli
+import xinfo.x.column_index as column_index
+import xinfo.x.columns as xcolumns
+import xinfo.x.kqftab as kqftab
+import xinfo.x.symbol_index as symbol_index
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="Does not work on Windows"
+)
+
+# Command arguments, number of rows, and whether JSON rows are grouped by table
+COMMANDS = [
+    pytest.param(["desc", "X$TABLEA1"], 2, False, id="desc"),
+    pytest.param(["desc", "X$TABLE*"], 2, True, id="desc-expr"),
+    pytest.param(["desc", "--all"], 2, True, id="desc-all"),
+    pytest.param(["list"], 3, False, id="list"),
+    pytest.param(["list", "--with-kqftap"], 3, False, id="list-kqftap"),
+    pytest.param(["columns", "*"], 2, False, id="columns"),
+    pytest.param(["where-used", "*"], 3, False, id="where-used"),
+]
+
+
+@pytest.fixture
+def run(request, capsys):
+    """Run a command with the real formatters. Return its output."""
+    binary = request.config.getoption("--test-executable")
+
+    def run(argv, output):
+        argv = argv + ["-b", binary, "--ora-version", "19", "-o", output]
+        assert cli.run(argv) == 0
+        return capsys.readouterr().out
+
+    return run
+
+
+@pytest.mark.parametrize("argv, count, grouped", COMMANDS)
+def test_json(run, argv, count, grouped):
+    """JSON output should be one object of rows."""
+    response = json.loads(run(argv, "json"))
+    if grouped:
+        rows = [col for table in response.values() for col in table.values()]
+    else:
+        rows = list(response.values())
+    assert len(rows) == count
+
+
+@pytest.mark.parametrize("argv, count, grouped", COMMANDS)
+def test_ndjson(run, argv, count, grouped):
+    """ndjson output should have one row per line."""
+    rows = [json.loads(line) for line in run(argv, "ndjson").splitlines()]
+    assert len(rows) == count
+
+
+@pytest.mark.parametrize("argv, count, grouped", COMMANDS)
+def test_csv(run, argv, count, grouped):
+    """CSV output should have a header and one line per row."""
+    rows = list(csv.DictReader(io.StringIO(run(argv, "csv"))))
+    assert len(rows) == count
+
+
+@pytest.mark.parametrize(
+    "argv, fields",
+    [
+        pytest.param(["desc", "X$TABLEA1"], xcolumns.FIELDS, id="desc"),
+        pytest.param(["desc", "--all"], ("table",) + xcolumns.FIELDS, id="desc-all"),
+        pytest.param(
+            ["list", "X$TABLEA2", "--with-kqftap"],
+            kqftab.FIELDS + ("kqftap",),
+            id="list-no-kqftap",
+        ),
+        pytest.param(
+            ["list", "--with-kqftap"], kqftab.FIELDS + ("kqftap",), id="list-kqftap"
+        ),
+        pytest.param(["columns", "*"], column_index.FIELDS, id="columns"),
+        pytest.param(["where-used", "*"], symbol_index.FIELDS, id="where-used"),
+    ],
+)
+def test_csv_fields(run, argv, fields):
+    """The CSV header should have all the fields of the command, and rows
+    should keep fields missing in the first row."""
+    reader = csv.DictReader(io.StringIO(run(argv, "csv")))
+    rows = list(reader)
+    assert tuple(reader.fieldnames) == fields
+    expected = [json.loads(line) for line in run(argv, "ndjson").splitlines()]
+    for row, values in zip(rows, expected):
+        assert [k for k, v in row.items() if v] == list(values)
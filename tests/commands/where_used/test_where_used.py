@@ -0,0 +1,44 @@
+import sys
+from argparse import Namespace
+from collections import OrderedDict
+
+import pytest
+from xinfo.commands.where_used import where_used
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="Does not work on Windows"
+)
+
+
+@pytest.fixture
+def where_used_args(request):
+    """Create input arguments for the where-used command."""
+    args = Namespace(command="where-used", symbol=None, output="table")
+    for k, v in request.param.items():
+        setattr(args, k, v)
+    yield args
+
+
+@pytest.mark.parametrize(
+    "where_used_args, expected",
+    [
+        pytest.param(
+            {"symbol": "f1"},
+            [
+                OrderedDict(symbol="f1", table="X$TABLEA1", usage="cb1"),
+                OrderedDict(
+                    symbol="f1", table="X$TABLEA1", usage="column", column="COL2"
+                ),
+            ],
+            id="symbol",
+        ),
+        pytest.param({"symbol": "x*"}, [], id="no match"),
+    ],
+    indirect=["where_used_args"],
+)
+def test_where_used(test_executable, where_used_args, expected, mock_formatter):
+    """Usages should be numbered."""
+    where_used(where_used_args)
+    mock_formatter.assert_called_once_with(
+        "where-used", OrderedDict(enumerate(expected, 1))
+    )
@@ -0,0 +1,35 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import xinfo.config.settings as settings
+
+
+def test_local():
+    """Local values should be used by the current thread only, and restored
+    when the context exits."""
+    with patch("xinfo.config.settings.ora_binary", "global"):
+        with settings.local(ora_binary="first", ora_version=19):
+            with settings.local(ora_binary="second"):
+                assert (settings.ora_binary, settings.ora_version) == ("second", 19)
+            assert settings.ora_binary == "first"
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                assert executor.submit(lambda: settings.ora_binary).result() == (
+                    "global"
+                )
+        assert settings.ora_binary == "global"
+
+
+def test_bind():
+    """Bound functions should run with the values of the binding thread."""
+
+    def get_binary():
+        return settings.ora_binary
+
+    assert settings.bind(get_binary) is get_binary
+    with settings.local(ora_binary="local"):
+        bound = settings.bind(get_binary)
+    with patch("xinfo.config.settings.ora_binary", "global"), ThreadPoolExecutor(
+        max_workers=1
+    ) as executor:
+        assert executor.submit(bound).result() == "local"
+        assert executor.submit(get_binary).result() == "global"
@@ -0,0 +1,75 @@
+import os
+import sqlite3
+import sys
+from unittest.mock import patch
+
+import pytest
+import xinfo.cache as cache
+import xinfo.db as db
+import xinfo.x.kqftab as kqftab
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="Does not work on Windows"
+)
+
+
+@pytest.fixture
+def catalog(tmp_path, test_executable):
+    """Build the catalog in a temporary cache directory."""
+    with patch.object(cache, "CACHE_DIR", str(tmp_path)), patch(
+        "xinfo.config.settings.force", False
+    ), patch("xinfo.config.settings.ora_version", 19):
+        yield
+
+
+def test_query_columns(catalog):
+    """Columns of X$ tables should be queried by table and column name."""
+    rows = db.query(
+        "SELECT table_name, nam, siz, func FROM xcolumns WHERE nam LIKE ? ORDER BY cno",
+        ("col%",),
+    )
+    assert rows == [
+        {"table_name": "X$TABLEA1", "nam": "COL1", "siz": 128, "func": None},
+        {"table_name": "X$TABLEA1", "nam": "COL2", "siz": 1, "func": "f1"},
+    ]
+
+
+def test_query_structures(catalog):
+    """kqftab, kqftap and kqfcop should be materialized."""
+    assert db.query("SELECT nam FROM kqftab WHERE obj = 1 ORDER BY indx") == [
+        {"nam": "X$TABLEA1"},
+        {"nam": "X$TABLEB1"},
+        {"nam": "X$TABLEA2"},
+    ]
+    assert db.query("SELECT xstruct, cb1, cb2 FROM kqftap") == [
+        {"xstruct": "tablea1_c", "cb1": "f1", "cb2": "f2"}
+    ]
+    assert db.query("SELECT indx FROM kqfcop WHERE func = 'f1'") == [{"indx": 4}]
+
+
+@pytest.mark.parametrize("flag, value", [("force", True), ("refresh", set())])
+def test_catalog_is_built_once(catalog, flag, value):
+    """The catalog should be reused unless the force or refresh flag is set."""
+    db.query("SELECT 1")
+    with patch.object(db, "_build") as mock_build:
+        db.query("SELECT 1")
+        mock_build.assert_not_called()
+        with patch("xinfo.config.settings." + flag, value):
+            db.query("SELECT 1")
+        mock_build.assert_called_once()
+
+
+def test_catalog_is_read_only(catalog):
+    """The catalog cannot be modified by queries."""
+    with pytest.raises(sqlite3.OperationalError):
+        db.query("DELETE FROM kqftab")
+
+
+def test_failed_build_leaves_no_files(catalog):
+    """A failed build should not leave a partial catalog."""
+    with patch.object(kqftab, "get_kqftab", side_effect=RuntimeError):
+        with pytest.raises(RuntimeError):
+            db.query("SELECT 1")
+    assert os.listdir(os.path.dirname(cache.get_path(db.DB_NAME))) == [
+        db.DB_NAME + ".lock"
+    ]
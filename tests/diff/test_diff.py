@@ -0,0 +1,146 @@
+import sys
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+import xinfo.cache as cache
+import xinfo.config.settings as settings
+import xinfo.diff as xdiff
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="Does not work on Windows"
+)
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    """Use a temporary cache directory."""
+    with patch.object(cache, "CACHE_DIR", str(tmp_path)), patch(
+        "xinfo.config.settings.force", False
+    ), patch("xinfo.config.settings.ora_version", 19):
+        yield
+
+
+def _columns(**columns):
+    return OrderedDict(
+        (nam, OrderedDict((f, fields.get(f)) for f in xdiff.COLUMN_FIELDS))
+        for nam, fields in columns.items()
+    )
+
+
+def _table(obj, **columns):
+    return (OrderedDict(obj=obj), _columns(**columns))
+
+
+BINARIES = {
+    "old": OrderedDict(
+        [
+            ("X$SAME", _table(1, COL1=dict(siz=2))),
+            ("X$CHANGED", _table(2, COL1=dict(siz=2), COL2=dict(off=8))),
+            ("X$REMOVED", _table(3)),
+        ]
+    ),
+    "new": OrderedDict(
+        [
+            ("X$SAME", _table(1, COL1=dict(siz=2))),
+            ("X$CHANGED", _table(4, COL1=dict(siz=4), COL3=dict(off=8))),
+            ("X$ADDED", _table(5)),
+        ]
+    ),
+}
+
+
+@pytest.fixture
+def binaries():
+    """Replace the tables of the Oracle binaries with sample tables."""
+
+    def get_tables(names=None):
+        tables = BINARIES[settings.ora_binary]
+        return OrderedDict(
+            (k, v) for k, v in tables.items() if names is None or k in names
+        )
+
+    with patch.object(
+        xdiff, "get_tables", side_effect=get_tables
+    ) as mock, patch.object(
+        xdiff,
+        "get_table_hashes",
+        side_effect=lambda: OrderedDict(
+            (k, repr(v)) for k, v in BINARIES[settings.ora_binary].items()
+        ),
+    ):
+        yield mock
+
+
+def test_diff(binaries):
+    """Changed fields, added and removed tables and columns should be returned.
+    Columns should be loaded only for tables with different hashes."""
+    ora_binary = settings.ora_binary
+    assert [tuple(row.values()) for row in xdiff.diff("old", "new")] == [
+        ("X$CHANGED", "", "changed", "obj", 2, 4),
+        ("X$CHANGED", "COL1", "changed", "siz", 2, 4),
+        ("X$CHANGED", "COL2", "removed", "", "", ""),
+        ("X$CHANGED", "COL3", "added", "", "", ""),
+        ("X$REMOVED", "", "removed", "", "", ""),
+        ("X$ADDED", "", "added", "", "", ""),
+    ]
+    assert [c.args for c in binaries.call_args_list] == [
+        ({"X$CHANGED"},),
+        ({"X$CHANGED"},),
+    ]
+    assert settings.ora_binary == ora_binary
+
+
+def test_diff_other_threads(binaries):
+    """Other threads should keep reading the Oracle binary of the settings."""
+    seen = []
+
+    def get_table_hashes():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            seen.append(executor.submit(lambda: settings.ora_binary).result())
+        return OrderedDict()
+
+    with patch("xinfo.config.settings.ora_binary", "global"), patch.object(
+        xdiff, "get_table_hashes", get_table_hashes
+    ):
+        assert list(xdiff.diff("old", "new")) == []
+    assert seen == ["global", "global"]
+
+
+def test_diff_same(binaries):
+    """Columns should not be loaded if all hashes are the same."""
+    assert list(xdiff.diff("old", "old")) == []
+    binaries.assert_not_called()
+
+
+def test_get_tables(test_executable, cache_dir):
+    """Table fields and columns keyed by name should be compared."""
+    tables = xdiff.get_tables()
+    assert list(tables) == ["X$TABLEA1", "X$TABLEB1", "X$TABLEA2"]
+    fields, columns = tables["X$TABLEA1"]
+    assert fields == OrderedDict(
+        obj=1, ver=1, xstruct="tablea1", typ=4, flg=5, rsz=2, coc=1, cb1="f1", cb2="f2"
+    )
+    assert list(columns) == ["COL1", "COL2"]
+    assert columns["COL2"]["func"] == "f1"
+    assert tables["X$TABLEB1"][1] == OrderedDict()
+    assert list(xdiff.get_tables({"X$TABLEA2"})) == ["X$TABLEA2"]
+
+
+def test_duplicate_columns():
+    """Columns with the same name should be compared by occurrence."""
+    columns = xdiff._get_columns(
+        OrderedDict((i, dict(nam="COL", siz=i)) for i in range(1, 4))
+    )
+    assert list(columns) == ["COL", "COL#2", "COL#3"]
+
+
+def test_table_hashes(test_executable, cache_dir):
+    """Hashes of the same binary should be cached and equal."""
+    hashes = xdiff.get_table_hashes()
+    assert list(hashes) == ["X$TABLEA1", "X$TABLEB1", "X$TABLEA2"]
+    with patch.object(xdiff, "get_tables") as mock:
+        assert xdiff.get_table_hashes() == hashes
+    mock.assert_not_called()
+    assert list(xdiff.diff(settings.ora_binary, settings.ora_binary)) == []
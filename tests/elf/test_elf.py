@@ -0,0 +1,220 @@
+import shutil
+import struct
+import subprocess
+import sys
+from unittest.mock import patch
+
+import pytest
+import xinfo.binutils as binutils
+import xinfo.config.settings as settings
+import xinfo.elf as elf
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="Does not work on Windows"
+)
+
+SHSTRTAB = b"\x00.shstrtab\x00"
+
+
+def _elf_image(ei_class=2, ei_data=1, shentsize=64, sections=None):
+    """Build a minimal ELF image with the given section headers."""
+    sections = sections if sections is not None else []
+    shoff = 64 + len(SHSTRTAB)
+    header = struct.pack(
+        "<4sBBB9xHHIQQQIHHHHHH",
+        elf.ELF_MAGIC,
+        ei_class,
+        ei_data,
+        1,
+        2,
+        62,
+        1,
+        0,
+        0,
+        shoff,
+        0,
+        64,
+        0,
+        0,
+        shentsize,
+        len(sections),
+        len(sections) - 1 if sections else 0,
+    )
+    shdrs = b"".join(
+        struct.pack("<IIQQQQIIQQ", name, type_, flags, addr, offset, size, 0, 0, 1, 0)
+        for name, type_, flags, addr, offset, size in sections
+    )
+    return header + SHSTRTAB + shdrs
+
+
+@pytest.fixture
+def elf_file(tmp_path, request):
+    """Write an ELF image to a file and return its path."""
+    path = tmp_path / "binary"
+    path.write_bytes(request.param)
+    yield str(path)
+
+
+def _nm(path):
+    output = subprocess.check_output(["nm", "-S", path], text=True)
+    symbols = {}
+    for line in output.splitlines():
+        fields = line.split()
+        if len(fields) == 4:
+            symbols[fields[3]] = (int(fields[0], 16), int(fields[1], 16))
+    return symbols
+
+
+@pytest.mark.parametrize(
+    "symbol", ["kqftab", "kqftap", "kqftap19", "kqftap23", "kqfcop", "f1"]
+)
+def test_symbols_match_nm(test_executable, symbol):
+    """Symbol addresses and sizes should be the same as reported by nm."""
+    symbols = elf.get_elf(settings.ora_binary).symbols
+    assert symbols[symbol] == _nm(settings.ora_binary)[symbol]
+
+
+def test_symbols_exact_match(test_executable):
+    """Symbol lookups should not match a symbol by its prefix."""
+    symbols = elf.get_elf(settings.ora_binary).symbols
+    assert symbols["kqftap"][0] != symbols["kqftap23"][0]
+    assert "kqfta" not in symbols
+
+
+def test_stripped_binary_uses_dynsym(test_executable, tmp_path):
+    """A stripped binary should fall back to the dynamic symbol table."""
+    path = str(tmp_path / "stripped")
+    shutil.copy(settings.ora_binary, path)
+    subprocess.check_call(["strip", path])
+    assert "kqftab" not in elf.get_elf(path).symbols
+
+
+def test_get_elf_reloads_changed_file(test_executable, tmp_path):
+    """A parsed file should be reused until the file is changed."""
+    path = tmp_path / "binary"
+    shutil.copy(settings.ora_binary, path)
+    elf_file = elf.get_elf(str(path))
+    assert elf.get_elf(str(path)) is elf_file
+    with open(path, "ab") as fp:
+        fp.write(b"\x00")
+    assert elf.get_elf(str(path)) is not elf_file
+
+
+@pytest.mark.parametrize(
+    "elf_file, error",
+    [
+        pytest.param(b"#!/bin/sh\n", "is not an ELF file", id="short file"),
+        pytest.param(b"#!/bin/sh\n" * 8, "is not an ELF file", id="not ELF"),
+        pytest.param(_elf_image(ei_class=1), "is not a 64-bit ELF", id="32-bit"),
+        pytest.param(_elf_image(ei_data=3), "unknown data encoding", id="encoding"),
+        pytest.param(_elf_image(), "has no section headers", id="no sections"),
+        pytest.param(
+            _elf_image(shentsize=40, sections=[(0, 0, 0, 0, 0, 0)]),
+            "unexpected section header size",
+            id="section header size",
+        ),
+        pytest.param(
+            _elf_image(sections=[(0, 0, 0, 0, 0, 0), (1, 3, 0, 0, 64, 1024)]),
+            "is truncated",
+            id="truncated",
+        ),
+        pytest.param(
+            _elf_image(sections=[(0, 0, 0, 0, 0, 0), (1 << 20, 3, 0, 0, 64, 1)]),
+            "no string terminator",
+            id="section name",
+        ),
+    ],
+    indirect=["elf_file"],
+)
+def test_invalid_file(elf_file, error):
+    """Unsupported or corrupted files should raise ValueError."""
+    with pytest.raises(ValueError) as exc_info:
+        elf.get_elf(elf_file)
+    assert error in str(exc_info.value)
+
+
+@pytest.mark.parametrize(
+    "elf_file",
+    [_elf_image(sections=[(0, 0, 0, 0, 0, 0), (1, 3, 0, 0, 64, len(SHSTRTAB))])],
+    indirect=True,
+)
+def test_no_symbol_table(elf_file):
+    """A file without any symbol tables should raise ValueError."""
+    elf_ = elf.get_elf(elf_file)
+    assert [s.name for s in elf_.sections] == ["", ".shstrtab"]
+    assert elf_.build_id is None
+    with pytest.raises(ValueError) as exc_info:
+        elf_.symbols
+    assert "has no symbol table" in str(exc_info.value)
+
+
+@pytest.fixture
+def binutils_backend():
+    """Read the binary with objdump."""
+    with patch("xinfo.config.settings.backend", "binutils"):
+        yield
+
+
+@pytest.mark.parametrize("symbol", ["kqftab", "kqftap23", "kqfcop", "tablea1_c"])
+def test_read_matches_objdump(test_executable, binutils_backend, symbol):
+    """Bytes read through the mapped file should be the same as objdump output."""
+    addr, len_ = binutils.get_addr_len(symbol)
+    data = elf.get_elf(settings.ora_binary).read(addr, len_)
+    assert isinstance(data, memoryview)
+    assert data == binutils.objdump(addr, len_)
+
+
+def test_read_str(test_executable):
+    """A NULL terminated string should be read from the virtual address."""
+    elf_ = elf.get_elf(settings.ora_binary)
+    addr, _ = elf_.symbols["kqftab"]
+    _, nam_ptr = struct.unpack_from("<qQ", elf_.read(addr, 16))
+    assert elf_.read_str(nam_ptr, 10) == "X$TABLEA1"
+    with pytest.raises(ValueError) as exc_info:
+        elf_.read_str(nam_ptr, 9)
+    assert "NULL character is not found" in str(exc_info.value)
+
+
+@pytest.mark.parametrize("addr, size", [(0, 1 << 40), (1 << 40, 8)])
+def test_read_unmapped_address(test_executable, addr, size):
+    """Addresses outside of file-backed segments should raise ValueError."""
+    with pytest.raises(ValueError) as exc_info:
+        elf.get_elf(settings.ora_binary).read(addr, size)
+    assert "is not mapped" in str(exc_info.value)
+
+
+@pytest.mark.parametrize(
+    "elf_file",
+    [
+        _elf_image(
+            sections=[
+                (0, 0, 0, 0, 0, 0),
+                (1, 1, elf.SHF_ALLOC, 0x1000, 64, len(SHSTRTAB)),
+                (1, 3, 0, 0, 64, len(SHSTRTAB)),
+            ]
+        )
+    ],
+    indirect=True,
+)
+def test_read_without_program_headers(elf_file):
+    """Allocated sections should be used when there are no program headers."""
+    assert bytes(elf.get_elf(elf_file).read(0x1001, 9)) == SHSTRTAB[1:10]
+
+
+def test_get_symbol(test_executable):
+    """Only an exact address should be resolved to a symbol."""
+    elf_ = elf.ElfFile(settings.ora_binary)
+    addrs, _, names = elf_.addr_index
+    addr = addrs[names.index("f1")]
+    assert elf_.get_symbol(addr) == "f1"
+    assert elf_.get_symbol(addr + 1) is None
+    assert elf_.get_symbol(1 << 40) is None
+
+
+def test_resolve(test_executable):
+    """An address inside a symbol should be resolved to symbol+offset."""
+    elf_ = elf.get_elf(settings.ora_binary)
+    addr, size = elf_.symbols["f1"]
+    assert elf_.resolve(addr) == ("f1", 0)
+    assert elf_.resolve(addr + size - 1) == ("f1", size - 1)
+    assert elf_.resolve(0) is None
@@ -0,0 +1,136 @@
+import io
+import json
+from collections import OrderedDict
+from collections.abc import Mapping
+
+import pytest
+from xinfo.formatter import get_formatter
+
+RESPONSE = OrderedDict(
+    [
+        (1, OrderedDict([("nam", "X$TABLEA1"), ("nam_ptr", 16), ("rsz", 2)])),
+        (
+            2,
+            OrderedDict(
+                [
+                    ("nam", "X$TABLEB1"),
+                    ("nam_ptr", 32),
+                    ("rsz", 4),
+                    ("kqftap", OrderedDict(cb1="f1")),
+                ]
+            ),
+        ),
+    ]
+)
+
+
+def _write(format_type, response, fields=None):
+    output = io.StringIO()
+    get_formatter(format_type).write("list", response, output, fields)
+    return output.getvalue()
+
+
+@pytest.mark.parametrize("response", [RESPONSE, OrderedDict()], ids=["rows", "empty"])
+def test_json(response):
+    """Streamed JSON should be the same as the whole response dumped at once."""
+    expected = json.dumps(response, indent=2) + "\n"
+    assert _write("json", iter(response.items())) == expected
+    assert get_formatter("json")("list", response) + "\n" == expected
+
+
+class _Rows(Mapping):
+    """Mapping which is not a dictionary, like cache files."""
+
+    def __init__(self, rows):
+        self._rows = rows
+
+    def __getitem__(self, key):
+        return self._rows[key]
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def __len__(self):
+        return len(self._rows)
+
+
+@pytest.mark.parametrize("format_type", ["json", "ndjson"])
+def test_json_mapping(format_type):
+    """Mappings nested in rows should be written as JSON objects."""
+    rows = _Rows(RESPONSE)
+    assert len(rows) == 2
+    response = [("X$TABLEA1", rows)]
+    output = _write(format_type, response)
+    expected = json.loads(json.dumps(RESPONSE))
+    if format_type == "json":
+        assert json.loads(output) == {"X$TABLEA1": expected}
+    else:
+        assert json.loads(output) == expected
+    with pytest.raises(TypeError, match="Object of type object"):
+        _write(format_type, [(1, object())])
+
+
+def test_ndjson():
+    """Each row should be written as JSON on its own line."""
+    assert _write("ndjson", RESPONSE) == (
+        '{"nam": "X$TABLEA1", "nam_ptr": 16, "rsz": 2}\n'
+        '{"nam": "X$TABLEB1", "nam_ptr": 32, "rsz": 4, "kqftap": {"cb1": "f1"}}\n'
+    )
+
+
+def test_csv():
+    """The header should be made of the fields, and pointers in hex."""
+    fields = ("nam", "nam_ptr", "rsz", "kqftap")
+    assert _write("csv", iter(RESPONSE.items()), fields) == (
+        "nam,nam_ptr,rsz,kqftap\n"
+        "X$TABLEA1,0x10,2,\n"
+        'X$TABLEB1,0x20,4,"{""cb1"": ""f1""}"\n'
+    )
+
+
+def test_csv_first_row():
+    """Without fields, the header should be taken from the first row."""
+    response = OrderedDict(list(RESPONSE.items())[:1])
+    expected = "nam,nam_ptr,rsz\nX$TABLEA1,0x10,2\n"
+    assert _write("csv", iter(response.items())) == expected
+    assert get_formatter("csv")("list", response) == expected.rstrip("\n")
+
+
+@pytest.mark.parametrize("fields", [None, ("nam", "nam_ptr", "rsz")])
+def test_csv_unknown_field(fields):
+    """Rows with fields missing in the header should not be written."""
+    with pytest.raises(ValueError, match="kqftap"):
+        _write("csv", RESPONSE, fields)
+
+
+def test_csv_nested():
+    """Nested dictionaries should be written as JSON."""
+    response = [(1, OrderedDict(nam="X$TABLEA1", kqftap=OrderedDict(cb1_ptr=16)))]
+    assert _write("csv", response) == (
+        'nam,kqftap\nX$TABLEA1,"{""cb1_ptr"": ""0x10""}"\n'
+    )
+
+
+@pytest.mark.parametrize("format_type", ["json", "ndjson", "csv"])
+def test_streaming(format_type):
+    """Rows should be written before the next ones are produced."""
+    output = io.StringIO()
+    lengths = []
+
+    def rows():
+        for item in RESPONSE.items():
+            lengths.append(len(output.getvalue()))
+            yield item
+
+    fields = ("nam", "nam_ptr", "rsz", "kqftap")
+    get_formatter(format_type).write("list", rows(), output, fields)
+    assert lengths[0] == 0
+    assert lengths[1] > 0
+
+
+@pytest.mark.parametrize("format_type", ["table", "html"])
+def test_collected(format_type):
+    """Tabular formatters should collect all rows and print the whole table."""
+    formatter = get_formatter(format_type)
+    expected = str(formatter("list", RESPONSE)) + "\n"
+    assert _write(format_type, iter(RESPONSE.items())) == expected
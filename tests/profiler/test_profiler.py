@@ -0,0 +1,118 @@
+import io
+import json
+import subprocess
+import threading
+
+import pytest
+import xinfo.profiler as profiler
+
+
+@pytest.fixture(params=[False, True], ids=["no memory", "memory"])
+def enabled(request):
+    """Collect phase statistics."""
+    profiler.enable(memory=request.param)
+    yield request.param
+    profiler.disable()
+
+
+def test_disabled():
+    """Nothing should be collected when profiling is disabled."""
+    profiler.enable()
+    profiler.disable()
+    with profiler.phase("outer"):
+        profiler.add_bytes_read(10)
+    assert profiler.get_stats() == {}
+    assert not profiler.is_enabled()
+
+
+def test_phases(enabled):
+    """Phases should be measured inclusively of nested phases."""
+
+    @profiler.profiled("inner")
+    def inner(size):
+        profiler.add_bytes_read(size)
+        subprocess.run(["true"])
+        return bytearray(1024 * 1024)
+
+    with profiler.phase("outer"):
+        assert len(inner(5)) == 1024 * 1024
+        inner(7)
+        data = bytearray(2 * 1024 * 1024)
+    del data
+
+    stats = profiler.get_stats()
+    assert list(stats) == ["inner", "outer"]
+    assert stats["inner"]["calls"] == 2
+    assert stats["inner"]["bytes_read"] == 12
+    assert stats["inner"]["subprocesses"] == 2
+    assert stats["outer"]["calls"] == 1
+    assert stats["outer"]["bytes_read"] == 12
+    assert stats["outer"]["subprocesses"] == 2
+    assert stats["outer"]["wall"] >= stats["inner"]["wall"] > 0
+    if enabled:
+        assert stats["inner"]["peak_memory"] >= 1024 * 1024
+        assert stats["outer"]["peak_memory"] >= 2 * 1024 * 1024
+    else:
+        assert stats["outer"]["peak_memory"] == 0
+
+
+def test_threads(enabled):
+    """Phases of several threads should be counted separately."""
+
+    def work():
+        with profiler.phase("work"):
+            profiler.add_bytes_read(1)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stats = profiler.get_stats()
+    assert stats["work"]["calls"] == 4
+    assert stats["work"]["bytes_read"] == 4
+
+
+def test_summary(enabled):
+    """The summary should have a line per phase."""
+    with profiler.phase("some.phase"):
+        pass
+    output = io.StringIO()
+    profiler.print_summary(output)
+    lines = output.getvalue().splitlines()
+    assert lines[0].split() == [
+        "phase",
+        "calls",
+        "wall,",
+        "s",
+        "subprocesses",
+        "bytes",
+        "read",
+        "peak,",
+        "MiB",
+    ]
+    assert lines[1].split()[:2] == ["some.phase", "1"]
+    assert (lines[1].split()[-1] == "-") != enabled
+
+
+def test_trace(enabled, tmp_path):
+    """Phases should be written as complete trace events."""
+    with profiler.phase("some.phase", fname="kqftab.data"):
+        profiler.add_bytes_read(3)
+    path = tmp_path / "trace.json"
+    profiler.write_trace(str(path))
+    trace = json.loads(path.read_text())
+    (event,) = trace["traceEvents"]
+    assert event["name"] == "some.phase"
+    assert event["ph"] == "X"
+    assert event["ts"] >= 0
+    assert event["dur"] > 0
+    assert event["args"] == dict(fname="kqftab.data", subprocesses=0, bytes_read=3)
+
+
+def test_exception(enabled):
+    """Phases should be recorded when they raise an exception."""
+    with pytest.raises(ValueError):
+        with profiler.phase("failed"):
+            raise ValueError()
+    assert profiler.get_stats()["failed"]["calls"] == 1
@@ -0,0 +1,189 @@
+import os
+import shutil
+import sys
+from unittest.mock import patch
+
+import pytest
+import xinfo.cache as cache
+import xinfo.config.settings as settings
+import xinfo.scan as xscan
+from xinfo.catalog import Catalog
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="Does not work on Windows"
+)
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    """Empty cache directory."""
+    path = tmp_path / "cache"
+    with patch.object(cache, "CACHE_DIR", str(path)), patch(
+        "xinfo.config.settings.force", False
+    ), patch("xinfo.config.settings.refresh", None):
+        yield str(path)
+
+
+@pytest.fixture
+def executable(request):
+    return request.config.getoption("--test-executable")
+
+
+def _home(root, name, executable, oraversion=None):
+    """Create an Oracle home with a copy of the executable. Return the path
+    of the binary."""
+    bin_dir = root / name / "bin"
+    bin_dir.mkdir(parents=True)
+    binary = bin_dir / "oracle"
+    shutil.copy(executable, str(binary))
+    if oraversion is not None:
+        script = bin_dir / "oraversion"
+        script.write_text("#!/bin/sh\n%s\n" % oraversion)
+        script.chmod(0o755)
+    return str(binary)
+
+
+def test_find_binaries(tmp_path, executable):
+    """Homes should be found once, in order, without searching inside homes."""
+    homes = tmp_path / "homes"
+    a = _home(homes, "a", executable)
+    b = _home(homes, "b", executable)
+    # A home within a home is not searched
+    _home(homes / "b", "nested", executable)
+    (homes / "c" / "bin").mkdir(parents=True)
+    assert list(xscan.find_binaries([str(homes), a, str(homes / "a")])) == [a, b]
+    assert list(xscan.find_binaries([os.path.relpath(a)])) == [a]
+
+
+@pytest.mark.parametrize(
+    "script, default, expected",
+    [
+        pytest.param(None, 19, 19, id="default"),
+        pytest.param("echo 23", None, 23, id="oraversion"),
+        pytest.param("echo 23", 19, 23, id="oraversion-first"),
+    ],
+)
+def test_get_version(tmp_path, executable, script, default, expected):
+    """The version should be read next to the binary, or be the default."""
+    binary = _home(tmp_path, "home", executable, script)
+    assert xscan._get_version(binary, default) == expected
+
+
+@pytest.mark.parametrize(
+    "script, message",
+    [
+        pytest.param(None, "Specify the version with --ora-version", id="missing"),
+        pytest.param("exit 2", "Unexpected exitcode = 2", id="exitcode"),
+        pytest.param("echo x", "Cannot convert Oracle version to number", id="nan"),
+    ],
+)
+def test_get_version_errors(tmp_path, executable, script, message):
+    binary = _home(tmp_path, "home", executable, script)
+    with pytest.raises((ValueError, RuntimeError), match=message):
+        xscan._get_version(binary, None)
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_scan(tmp_path, cache_dir, executable, jobs):
+    """Identical binaries should be extracted once, and other binaries should
+    be reported as failed."""
+    homes = tmp_path / "homes"
+    a = _home(homes, "a", executable, "echo 19")
+    b = _home(homes, "b", executable)
+    # Hardlink of the first binary
+    (homes / "c" / "bin").mkdir(parents=True)
+    c = str(homes / "c" / "bin" / "oracle")
+    os.link(a, c)
+    # Not an ELF file
+    (homes / "d" / "bin").mkdir(parents=True)
+    d = homes / "d" / "bin" / "oracle"
+    d.write_text("not a binary")
+
+    with patch.object(settings, "jobs", jobs):
+        rows = xscan.scan([str(homes)], 19)
+
+    catalog = Catalog(executable, 19)
+    fingerprint = cache.get_fingerprint(executable)
+    assert [(r["binary"], r["status"], r["source"]) for r in rows] == [
+        (a, "extracted", ""),
+        (b, "duplicate", a),
+        (c, "duplicate", a),
+        (str(d), "failed", ""),
+    ]
+    assert rows[0]["fingerprint"] == rows[1]["fingerprint"] == fingerprint
+    assert rows[0]["version"] == rows[1]["version"] == 19
+    assert rows[0]["tables"] == len(catalog.tables)
+    assert rows[0]["columns"] == sum(
+        len(catalog.columns(v["nam"]))
+        for v in catalog.tables.values()
+        if "columns" in v
+    )
+    assert rows[0]["seconds"] >= 0
+    assert rows[1]["tables"] == ""
+    assert rows[3]["error"]
+    # The catalog is cached for later commands
+    assert os.listdir(os.path.join(cache.get_root(), fingerprint))
+
+
+def test_scan_pool(tmp_path, cache_dir, executable):
+    """Unique binaries should be extracted by a process pool."""
+    a = _home(tmp_path, "a", executable, "echo 19")
+    b = _home(tmp_path, "b", executable, "echo 19")
+    with open(b, "ab") as fp:
+        fp.write(b"\0")
+    # Without build IDs, binaries with different contents are extracted
+    with patch.object(cache, "get_build_id", return_value=None), patch.object(
+        settings, "jobs", 2
+    ):
+        rows = xscan.scan([str(tmp_path)])
+    assert [r["status"] for r in rows] == ["extracted", "extracted"]
+    assert rows[0]["fingerprint"] != rows[1]["fingerprint"]
+    assert rows[0]["tables"] == rows[1]["tables"] == 3
+
+
+def test_scan_copies(tmp_path, cache_dir, executable):
+    """Copies without a build ID should be extracted once."""
+    a = _home(tmp_path, "a", executable)
+    _home(tmp_path, "b", executable)
+    with patch.object(cache, "get_build_id", return_value=None), patch.object(
+        xscan, "CONTENT_BLOCK_SIZE", 1024
+    ), patch.object(xscan, "_extract", wraps=xscan._extract) as mock_extract:
+        rows = xscan.scan([str(tmp_path)], 19)
+    mock_extract.assert_called_once_with(a, 19)
+    assert [(r["status"], r["source"]) for r in rows] == [
+        ("extracted", ""),
+        ("duplicate", a),
+    ]
+    assert rows[0]["fingerprint"] != rows[1]["fingerprint"]
+
+
+def test_scan_error(tmp_path, cache_dir, executable):
+    """Extraction errors should be reported in the summary row."""
+    a = _home(tmp_path, "a", executable)
+    with patch.object(xscan, "_extract", side_effect=RuntimeError("boom")):
+        rows = xscan.scan([a], 19)
+    assert rows[0]["status"] == "failed"
+    assert rows[0]["error"] == "RuntimeError: boom"
+
+
+def test_init_worker(tmp_path):
+    """Pool processes should use the settings of the scan."""
+    with patch.object(cache, "CACHE_DIR", None), patch.multiple(
+        settings, backend="elf", force=False, forced=None, refresh=None, jobs=4
+    ):
+        xscan._init_worker("binutils", True, True, str(tmp_path))
+        assert cache.CACHE_DIR == str(tmp_path)
+        assert (settings.backend, settings.force, settings.jobs) == (
+            "binutils",
+            True,
+            1,
+        )
+        assert settings.forced == settings.refresh == set()
+
+
+def test_scan_no_version(tmp_path, cache_dir, executable):
+    """Binaries without a version should be reported as failed."""
+    a = _home(tmp_path, "a", executable)
+    rows = xscan.scan([a])
+    assert (rows[0]["status"], rows[0]["fingerprint"]) == ("failed", "")
+    assert "Specify the version with --ora-version" in rows[0]["error"]
@@ -0,0 +1,255 @@
+import json
+import logging
+import os
+import socket
+import stat
+import sys
+import threading
+from argparse import Namespace
+from unittest.mock import patch
+
+import pytest
+import xinfo.cli as cli
+import xinfo.client as client
+import xinfo.config.settings as settings
+import xinfo.server as server
+from xinfo.commands import serve as serve_cmd
+
+LOGGING_CONFIG = """\
+version: 1
+disable_existing_loggers: false
+formatters:
+  plain:
+    format: "CONFIGURED %(message)s"
+handlers:
+  stderr:
+    class: logging.StreamHandler
+    formatter: plain
+    stream: ext://sys.stderr
+root:
+  level: DEBUG
+  handlers: [stderr]
+"""
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="Does not work on Windows"
+)
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    """Use a socket in a temporary directory."""
+    path = str(tmp_path / "xinfo.sock")
+    with patch.dict("os.environ", {client.SOCKET_ENV: path}):
+        os.environ.pop(client.NO_DAEMON_ENV, None)
+        yield path
+
+
+@pytest.fixture
+def running_server(socket_path):
+    """Run the server in a thread."""
+    srv = server.Server(socket_path)
+    thread = threading.Thread(target=srv.serve_forever)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    thread.join()
+    srv.server_close()
+
+
+@pytest.fixture
+def list_argv(request):
+    """Arguments of a list command for the test executable."""
+    yield [
+        "list",
+        "-b",
+        os.path.abspath(request.config.getoption("--test-executable")),
+        "--ora-version",
+        "19",
+        "-o",
+        "json",
+        "X$TABLEA*",
+    ]
+
+
+def test_no_server(socket_path):
+    """None is returned when the server is not running."""
+    assert client.request(["list"]) is None
+
+
+def test_no_daemon_env(running_server):
+    """The server is not used when disabled in the environment."""
+    with patch.dict("os.environ", {client.NO_DAEMON_ENV: "1"}):
+        assert client.request(["list"]) is None
+
+
+@pytest.mark.parametrize("command", ["serve", "scan"])
+def test_not_forwarded(running_server, command):
+    """serve and scan are always run in-process."""
+    assert client.request([command]) is None
+
+
+def test_request(running_server, list_argv, capsys):
+    """The server output should be the same as the in-process output."""
+    assert cli.run(list_argv) == 0
+    expected = capsys.readouterr().out
+    assert json.loads(expected)["1"]["nam"] == "X$TABLEA1"
+    assert client.request(list_argv) == 0
+    assert capsys.readouterr().out == expected
+
+
+def test_request_restores_settings(running_server, list_argv):
+    """Settings of a request should not be used by the following requests."""
+    force = settings.force
+    assert client.request(list_argv + ["--force", "--jobs", "2"]) == 0
+    assert settings.force == force
+    assert settings.jobs == 1
+
+
+def test_request_restores_environment(running_server, list_argv):
+    """The server environment should be restored after a request."""
+    cwd = os.getcwd()
+    with patch.dict("os.environ", {"ORACLE_HOME": "/server/home"}):
+        message = dict(argv=list_argv, cwd="/", env={"ORACLE_HOME": "/client/home"})
+        assert server._run(message)["exit_code"] == 0
+        assert os.environ["ORACLE_HOME"] == "/server/home"
+    assert os.getcwd() == cwd
+
+
+def test_request_logging(running_server, list_argv, capsys):
+    """Log records of a request should be written to its output, and the
+    server logging should be restored."""
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+    with patch.dict("os.environ"):
+        os.environ.pop(cli.LOGGING_CONFIG_ENV, None)
+        assert client.request(list_argv + ["-v"]) == 0
+        out = capsys.readouterr().out
+        assert "[DEBUG xinfo.commands.list.list_tables]" in out
+        assert root.handlers == handlers
+        # Levels set by -v are not used by the following requests
+        assert client.request(list_argv) == 0
+        assert "DEBUG" not in capsys.readouterr().out
+
+
+def test_request_logging_new_loggers():
+    """Loggers created by a request should not keep its levels."""
+    with server._request_logging():
+        logger = logging.getLogger("xinfo.tests.request_logger")
+        logger.setLevel(logging.DEBUG)
+        logger.addHandler(logging.NullHandler())
+    assert (logger.level, logger.handlers) == (logging.NOTSET, [])
+
+
+def test_request_logging_config(running_server, list_argv, tmp_path, capsys):
+    """The logging configuration of the client should be used."""
+    config_path = tmp_path / "logging.yaml"
+    config_path.write_text(LOGGING_CONFIG)
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    with patch.dict("os.environ", {cli.LOGGING_CONFIG_ENV: str(config_path)}):
+        assert client.request(list_argv + ["-v"]) == 0
+    captured = capsys.readouterr()
+    assert "CONFIGURED Namespace(" in captured.err
+    assert "DEBUG" not in captured.out
+    assert (root.handlers, root.level) == (handlers, level)
+
+
+@pytest.mark.parametrize(
+    "argv, exit_code, error",
+    [
+        (["list", "--no-such-option"], 2, "unrecognized arguments"),
+        (["desc", "-b", "/", "--ora-version", "19", "X$T"], 255, "Traceback"),
+        (["list", "-b", "/"], 255, "ORACLE_HOME is not set"),
+    ],
+)
+def test_request_errors(running_server, argv, exit_code, error, capsys):
+    """Errors should be returned to the client."""
+    with patch.dict("os.environ", {}) as env:
+        env.pop("ORACLE_HOME", None)
+        assert client.request(argv) == exit_code
+    assert error in capsys.readouterr().err
+
+
+def test_request_stale_socket(socket_path):
+    """A socket without a server should fall back to in-process execution."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.bind(socket_path)
+    assert client.request(["list"]) is None
+
+
+def test_request_other_user(running_server, list_argv, capsys):
+    """A socket of another user should not be used."""
+    with patch("os.getuid", return_value=os.getuid() + 1):
+        assert client.request(list_argv) is None
+    assert "of another user" in capsys.readouterr().err
+
+
+def test_request_denied(running_server, list_argv):
+    """A socket which cannot be used should fall back to in-process
+    execution."""
+    with patch.object(socket.socket, "connect", side_effect=PermissionError):
+        assert client.request(list_argv) is None
+
+
+def test_request_timeout(socket_path, list_argv, capsys):
+    """A server which does not answer should fall back to in-process
+    execution."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock, patch.object(
+        client, "TIMEOUT", 0.01
+    ):
+        sock.bind(socket_path)
+        sock.listen()
+        assert client.request(list_argv) is None
+    assert "no answer" in capsys.readouterr().err
+
+
+def test_serve_default_socket(tmp_path):
+    """The default socket should be in a directory of the current user."""
+    directory = tmp_path / ("xinfo-%d" % os.getuid())
+    with patch.dict("os.environ"), patch(
+        "tempfile.gettempdir", return_value=str(tmp_path)
+    ), patch.object(server.Server, "serve_forever", side_effect=KeyboardInterrupt):
+        os.environ.pop(client.SOCKET_ENV, None)
+        server.serve()
+        assert client.get_socket_path() == str(directory / "server.sock")
+    assert stat.S_IMODE(os.stat(str(directory)).st_mode) == 0o700
+
+
+def test_serve(socket_path):
+    """serve should replace a stale socket and remove it when stopped."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.bind(socket_path)
+    with patch.object(
+        server.Server, "serve_forever", side_effect=KeyboardInterrupt
+    ) as mock:
+        server.serve()
+    mock.assert_called_once()
+    assert not os.path.exists(socket_path)
+
+
+def test_serve_already_running(running_server, socket_path, list_argv):
+    """Only one server can use the socket."""
+    with pytest.raises(RuntimeError) as exc_info:
+        server.serve(socket_path)
+    assert "already running" in str(exc_info.value)
+    assert client.request(list_argv) == 0
+
+
+def test_main_uses_server():
+    """main should return the server exit code without running the command."""
+    with patch("sys.argv", ["program", "list"]), patch.object(
+        client, "request", return_value=3
+    ), patch.object(cli, "run") as mock_run:
+        assert cli.main() == 3
+    mock_run.assert_not_called()
+
+
+def test_serve_command(test_executable):
+    """The serve command should load the catalogs before serving."""
+    args = Namespace(command="serve", socket="some.sock")
+    with patch("xinfo.config.settings.ora_version", 19), patch.object(
+        server, "serve"
+    ) as mock_serve:
+        serve_cmd.serve(args)
+    mock_serve.assert_called_once_with("some.sock")
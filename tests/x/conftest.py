@@ -8,3 +8,10 @@ def force():
     """Set the force flag to ignore existing data files."""
     with patch("xinfo.config.settings.force", True):
         yield
+
+
+@pytest.fixture
+def ora_version():
+    """Read kqftap with the layout of the test executable."""
+    with patch("xinfo.config.settings.ora_version", 19):
+        yield
@@ -0,0 +1,82 @@
+import os
+import sys
+from collections import OrderedDict
+from unittest.mock import patch
+
+import pytest
+import xinfo.cache as cache
+import xinfo.x.column_index as column_index
+
+pytestmark = [
+    pytest.mark.skipif(sys.platform == "win32", reason="Does not work on Windows"),
+    pytest.mark.usefixtures("ora_version"),
+]
+
+COL1 = OrderedDict(
+    table="X$TABLEA1", xstruct="tablea1_c", cno=1, nam="COL1", dty=1, siz=128
+)
+COL2 = OrderedDict(
+    table="X$TABLEA1", xstruct="tablea1_c", cno=2, nam="COL2", dty=2, siz=1, func="f1"
+)
+
+
+@pytest.fixture
+def cache_dir(tmp_path, test_executable):
+    """Use an empty cache directory."""
+    with patch.object(cache, "CACHE_DIR", str(tmp_path)), patch(
+        "xinfo.config.settings.force", False
+    ):
+        yield
+
+
+@pytest.fixture
+def warm_index(cache_dir):
+    """Build the index, and fail if it is built again."""
+    list(column_index.search("*"))
+    with patch.object(column_index, "_build", side_effect=AssertionError):
+        yield
+
+
+def test_cold_search(cache_dir):
+    """The first search should build and cache the index."""
+    assert list(column_index.search("col2")) == [COL2]
+    assert os.path.isfile(cache.get_path(column_index.FNAME))
+    assert list(cache.get_cached(column_index.FNAME).values()) == [COL1, COL2]
+
+
+def test_interrupted_search(cache_dir):
+    """An interrupted search should not cache a partial index."""
+    rows = column_index.search("*")
+    assert next(rows) == COL1
+    rows.close()
+    assert cache.get_cached(column_index.FNAME) is None
+
+
+@pytest.mark.parametrize("flag, value", [("force", True), ("refresh", set())])
+def test_forced_search(warm_index, flag, value):
+    """The index should be built again with the force or refresh flag."""
+    with patch("xinfo.config.settings." + flag, value):
+        with pytest.raises(AssertionError):
+            list(column_index.search("*"))
+
+
+@pytest.mark.parametrize(
+    "expr, filters, expected",
+    [
+        ("COL*", {}, [COL1, COL2]),
+        ("col1", {}, [COL1]),
+        ("%ol%", {}, [COL1, COL2]),
+        ("*2", {}, [COL2]),
+        ("COL3", {}, []),
+        ("*", dict(dty=1), [COL1]),
+        ("COL*", dict(siz=1), [COL2]),
+        ("*", dict(siz=2), []),
+        ("*", dict(func="f*"), [COL2]),
+        ("*", dict(func="*"), [COL2]),
+        ("C*", dict(func="f1"), [COL2]),
+        ("COL*", dict(func="f"), []),
+    ],
+)
+def test_search(warm_index, expr, filters, expected):
+    """Columns should be found by name, data type, size and function."""
+    assert list(column_index.search(expr, **filters)) == expected
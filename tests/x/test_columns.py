@@ -1,6 +1,8 @@
 import sys
+from unittest.mock import patch
 
 import pytest
+import xinfo.binutils as binutils
 import xinfo.x.columns as xcolumns
 
 pytestmark = pytest.mark.skipif(
@@ -17,3 +19,43 @@ def test_invalid_xstruct_length(test_executable, xstruct):
     """get_xstruct should throw ValueError for an invalid xstruct length."""
     with pytest.raises(ValueError):
         xcolumns.get_xstruct(xstruct)
+
+
+def test_get_xstruct_cached(test_executable):
+    """A cached xstruct should be returned without reading the binary."""
+    with patch("xinfo.config.settings.force", True):
+        x_col_map = xcolumns.get_xstruct("tablea1_c")
+    assert [v["nam"] for v in x_col_map.values()] == ["COL1", "COL2"]
+    with patch("xinfo.config.settings.force", False), patch.object(
+        binutils, "objdump", side_effect=AssertionError
+    ):
+        assert xcolumns.get_xstruct("tablea1_c") == x_col_map
+
+
+def test_get_xstruct_refresh(test_executable):
+    """A refreshed xstruct should be parsed again only if its bytes changed."""
+    with patch("xinfo.config.settings.force", True):
+        x_col_map = xcolumns.get_xstruct("tablea1_c")
+    with patch("xinfo.config.settings.force", False), patch(
+        "xinfo.config.settings.refresh", set()
+    ), patch.object(xcolumns, "_parse_xdesc", side_effect=AssertionError):
+        assert xcolumns.get_xstruct("tablea1_c") == x_col_map
+
+
+def test_iter_loaded():
+    """xstructs should be loaded once, a few tables ahead of the caller."""
+    tables = [("T%d" % i, "x%d" % (i % 3)) for i in range(6)] + [("T6", "x6")]
+    loaded = []
+
+    def load(xstruct):
+        loaded.append(xstruct)
+        return xstruct.upper()
+
+    rows = xcolumns.iter_loaded(tables, load, 1)
+    assert next(rows) == ("T0", "X0")
+    assert list(rows) == [(t, x.upper()) for t, x in tables[1:]]
+    assert loaded == ["x0", "x1", "x2", "x6"]
+
+    rows = xcolumns.iter_loaded(tables, load, 1)
+    next(rows)
+    rows.close()
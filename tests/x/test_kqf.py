@@ -0,0 +1,103 @@
+import asyncio
+import hashlib
+import sys
+from unittest.mock import patch
+
+import pytest
+import xinfo.abinutils as abinutils
+import xinfo.cache as cache
+import xinfo.x.kqf as kqf
+import xinfo.x.kqfcop as kqfcop
+import xinfo.x.kqftab as kqftab
+import xinfo.x.kqftap as kqftap
+import xinfo.x.tables as xtables
+
+pytestmark = [
+    pytest.mark.skipif(sys.platform == "win32", reason="Does not work on Windows"),
+    pytest.mark.usefixtures("ora_version"),
+]
+
+
+@pytest.fixture
+def cache_dir(tmp_path, test_executable):
+    """Use an empty cache directory and the binutils backend."""
+    with patch.object(cache, "CACHE_DIR", str(tmp_path)), patch(
+        "xinfo.config.settings.force", False
+    ), patch("xinfo.config.settings.refresh", None), patch(
+        "xinfo.config.settings.backend", "binutils"
+    ):
+        yield
+
+
+@pytest.fixture
+def no_run():
+    """Fail if structures are extracted concurrently."""
+    with patch.object(abinutils, "run", side_effect=AssertionError) as mock:
+        yield mock
+
+
+def test_prefetch(cache_dir):
+    """Missing structures should be cached as if extracted one by one."""
+    kqf.prefetch(*kqf.STRUCTURES)
+    with patch.object(abinutils, "run", side_effect=AssertionError):
+        kqf.prefetch(*kqf.STRUCTURES)
+    for module, read, extract, variant in [
+        (kqftab, kqftab._read_kqftab, kqftab._get_kqftab_from_binary, b""),
+        (
+            kqftap,
+            kqftap._read_kqftap,
+            kqftap._get_kqftap_from_binary,
+            b"\0" + kqftap.get_variant().encode(),
+        ),
+        (kqfcop, kqfcop._read_kqfcop, kqfcop._get_kqfcop_from_binary, b""),
+    ]:
+        obj = cache.get_cached(module.FNAME)
+        data = read()
+        assert obj.source == hashlib.sha1(data + variant).hexdigest()
+        assert obj == extract(data)
+    assert cache.get_cached(kqftab.FNAME).lookup("nam", "X$TABLEA2") == [3]
+
+
+@pytest.mark.parametrize(
+    "flag, value",
+    [("backend", "elf"), ("force", True), ("refresh", set())],
+)
+def test_prefetch_skipped(cache_dir, no_run, flag, value):
+    """Structures should be read as usual by the ELF backend, forced and
+    refreshed loads."""
+    with patch("xinfo.config.settings." + flag, value):
+        kqf.prefetch(*kqf.STRUCTURES)
+    assert cache.get_cached(kqftab.FNAME) is None
+
+
+def test_prefetch_in_event_loop(cache_dir, no_run):
+    """Structures should be extracted when loaded within an event loop."""
+
+    async def prefetch():
+        kqf.prefetch(*kqf.STRUCTURES)
+
+    asyncio.run(prefetch())
+    assert cache.get_cached(kqftab.FNAME) is None
+    assert kqftab.get_kqftab()[3]["nam"] == "X$TABLEA2"
+
+
+def test_prefetch_single_structure(cache_dir, no_run):
+    """A single missing structure should be extracted when loaded."""
+    kqftab.get_kqftab()
+    kqftap.get_kqftap()
+    kqf.prefetch(*kqf.STRUCTURES)
+    assert cache.get_cached(kqfcop.FNAME) is None
+
+
+@pytest.mark.parametrize("jobs, limit", [(1, 3), (4, 4)])
+def test_tables_prefetch(cache_dir, jobs, limit):
+    """Building tables should extract the three structures at the same time,
+    with at most --jobs commands, and at least one per structure, at a
+    time."""
+    with patch.object(abinutils, "run", wraps=abinutils.run) as mock, patch(
+        "xinfo.config.settings.jobs", jobs
+    ):
+        assert xtables.get_table("X$TABLEA2")[0] == 3
+    mock.assert_called_once()
+    assert mock.call_args[0][1] == limit
+    assert cache.get_cached(kqfcop.FNAME) is not None
@@ -1,3 +1,4 @@
+import logging
 import sys
 
 import pytest
@@ -21,3 +22,13 @@ def test_get_func_unhandled_type(typ):
     with pytest.raises(ValueError) as exc_info:
         kqfcop.get_func(0, typ)
     assert "Unhandled kqfcop typ" in str(exc_info)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Does not work on Windows")
+def test_debug_logging(test_executable, force, caplog):
+    """kqfcop should be logged in verbose mode only."""
+    kqfcop.get_kqfcop()
+    assert not caplog.records
+    caplog.set_level(logging.DEBUG, logger=kqfcop.LOGGER.name)
+    kqfcop.get_kqfcop()
+    assert "'func': 'f1'" in caplog.text
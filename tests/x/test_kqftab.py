@@ -1,6 +1,7 @@
+import logging
 import sys
 from collections import OrderedDict
-from unittest.mock import ANY
+from unittest.mock import ANY, patch
 
 import pytest
 import xinfo.x.kqftab as kqftab
@@ -65,7 +66,29 @@ def test_get_index(test_executable, force, table, expected):
     assert index == expected
 
 
+def test_get_index_not_found(test_executable, force):
+    """get_index should raise an error for unknown tables."""
+    with pytest.raises(ValueError, match=r"Table X\$TABLEA not found"):
+        kqftab.get_index("X$TABLEA")
+
+
 def test_get_kqftab(test_executable, force):
     """The expected kqftab structure should be returned."""
     kqftab_map = kqftab.get_kqftab()
     assert kqftab_map == KQFTAB
+
+
+def test_get_kqftab_binutils_backend(test_executable, force):
+    """The binutils backend should return the same kqftab structure."""
+    with patch("xinfo.config.settings.backend", "binutils"):
+        kqftab_map = kqftab.get_kqftab()
+    assert kqftab_map == KQFTAB
+
+
+def test_debug_logging(test_executable, force, caplog):
+    """kqftab should be logged in verbose mode only."""
+    kqftab.get_kqftab()
+    assert not caplog.records
+    caplog.set_level(logging.DEBUG, logger=kqftab.LOGGER.name)
+    kqftab.get_kqftab()
+    assert "('nam', 'X$TABLEA1')" in caplog.text
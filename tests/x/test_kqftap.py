@@ -1,3 +1,4 @@
+import logging
 import sys
 from collections import OrderedDict
 from unittest.mock import ANY, patch
@@ -69,3 +70,12 @@ def test_get_kqftap_invalid_version(test_executable, invalid_ora_version, force)
     """Should throw ValueError for an invalid Oracle version."""
     with pytest.raises(ValueError):
         _ = kqftap.get_kqftap()
+
+
+def test_debug_logging(test_executable, kqftap_map, force, caplog):
+    """kqftap should be logged in verbose mode only."""
+    kqftap.get_kqftap()
+    assert not caplog.records
+    caplog.set_level(logging.DEBUG, logger=kqftap.LOGGER.name)
+    kqftap.get_kqftap()
+    assert "('cb1', 'f1')" in caplog.text
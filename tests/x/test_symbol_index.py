@@ -0,0 +1,43 @@
+import sys
+from collections import OrderedDict
+from unittest.mock import patch
+
+import pytest
+import xinfo.cache as cache
+import xinfo.x.symbol_index as symbol_index
+
+pytestmark = [
+    pytest.mark.skipif(sys.platform == "win32", reason="Does not work on Windows"),
+    pytest.mark.usefixtures("ora_version"),
+]
+
+CB1 = OrderedDict(symbol="f1", table="X$TABLEA1", usage="cb1")
+CB2 = OrderedDict(symbol="f2", table="X$TABLEA1", usage="cb2")
+COL2 = OrderedDict(symbol="f1", table="X$TABLEA1", usage="column", column="COL2")
+
+
+def test_get_symbol_index(test_executable, force):
+    """Callbacks and column functions of each table should be indexed."""
+    assert list(symbol_index.get_symbol_index().values()) == [CB1, CB2, COL2]
+
+
+@pytest.mark.parametrize(
+    "expr, expected",
+    [
+        ("f1", [CB1, COL2]),
+        ("f*", [CB1, CB2, COL2]),
+        ("*2", [CB2]),
+        ("f", []),
+        ("g*", []),
+    ],
+)
+def test_where_used(test_executable, tmp_path, expr, expected):
+    """Usages should be found from the cached index."""
+    with patch.object(cache, "CACHE_DIR", str(tmp_path)), patch(
+        "xinfo.config.settings.force", False
+    ):
+        symbol_index.get_symbol_index()
+        with patch.object(
+            symbol_index, "_get_symbol_index", side_effect=AssertionError
+        ):
+            assert symbol_index.where_used(expr) == expected
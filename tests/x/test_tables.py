@@ -0,0 +1,69 @@
+import sys
+from collections import OrderedDict
+
+import pytest
+import xinfo.x.tables as xtables
+
+pytestmark = [
+    pytest.mark.skipif(sys.platform == "win32", reason="Does not work on Windows"),
+    pytest.mark.usefixtures("ora_version"),
+]
+
+TABLEA1 = OrderedDict(nam="X$TABLEA1", obj=1, xstruct="tablea1", columns="tablea1_c")
+TABLEB1 = OrderedDict(nam="X$TABLEB1", obj=1, xstruct="tableb1")
+TABLEA2 = OrderedDict(nam="X$TABLEA2", obj=1, xstruct="tablea2")
+
+
+def test_get_tables(test_executable, force):
+    """Tables should be joined with the column arrays of their kqftap entries."""
+    assert xtables.get_tables() == OrderedDict(
+        [(1, TABLEA1), (2, TABLEB1), (3, TABLEA2)]
+    )
+
+
+@pytest.mark.parametrize("name", ["X$TABLEA1", "x$tablea1", "X$TableA1"])
+def test_get_table(test_executable, force, name):
+    """Tables should be found by name in any case."""
+    assert xtables.get_table(name) == (1, TABLEA1)
+
+
+def test_get_table_not_found(test_executable, force):
+    """Unknown tables should raise an error."""
+    with pytest.raises(ValueError, match=r"Table X\$TABLEA not found"):
+        xtables.get_table("X$TABLEA")
+
+
+def test_find_by_obj(test_executable, force):
+    """Tables should be found by object number in kqftab order."""
+    assert xtables.find_by_obj(1) == [(1, TABLEA1), (2, TABLEB1), (3, TABLEA2)]
+    assert xtables.find_by_obj(2) == []
+
+
+def test_find_by_xstruct(test_executable, force):
+    """Tables should be found by xstruct name."""
+    assert xtables.find_by_xstruct("tableb1") == [(2, TABLEB1)]
+    assert xtables.find_by_xstruct("tableb") == []
+
+
+@pytest.mark.parametrize(
+    "expr, expected",
+    [
+        ("X$TABLEA*", [1, 3]),
+        ("x$table?1", [1, 2]),
+        ("X$TABLEB1", [2]),
+        ("*A2", [3]),
+        ("[X]$TABLE*", [1, 2, 3]),
+        ("X$TABLEC*", []),
+    ],
+)
+def test_match(test_executable, force, expr, expected):
+    """Tables should be matched by glob expressions in any case."""
+    assert [k for k, _ in xtables.match(expr)] == expected
+
+
+@pytest.mark.parametrize(
+    "expr, prefix", [("X$KSU*", "X$KSU"), ("X$KSLED", "X$KSLED"), ("*", "")]
+)
+def test_literal_prefix(expr, prefix):
+    """The literal prefix should end before the first wildcard."""
+    assert xtables.literal_prefix(expr) == prefix